@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import json
 import os
+import sys
 
 import aws_cdk as cdk
 
@@ -48,6 +49,7 @@ env_config = {
         "db_instance_class": "db.t3.micro",
         "db_publicly_accessible": True,  # Allow direct access for development
         "ecs_desired_count": 1,
+        "control_plane_max_tasks": 2,
         "enable_deletion_protection": False,
         "redis_max_storage_gb": 1,  # 1 GB minimum (CloudFormation only supports GB)
         "redis_max_ecpu": 3000,
@@ -58,6 +60,7 @@ env_config = {
         "db_instance_class": "db.t3.micro",
         "db_publicly_accessible": True,  # Private for staging
         "ecs_desired_count": 1,
+        "control_plane_max_tasks": 2,
         "enable_deletion_protection": False,
         "redis_max_storage_gb": 1,  # 1 GB minimum (CloudFormation only supports GB)
         "redis_max_ecpu": 5000,
@@ -68,6 +71,7 @@ env_config = {
         "db_instance_class": "db.t3.micro",
         "db_publicly_accessible": True,  # Private for production
         "ecs_desired_count": 1,
+        "control_plane_max_tasks": 4,
         "enable_deletion_protection": True,
         "redis_max_storage_gb": 1,  # 1 GB minimum (CloudFormation only supports GB)
         "redis_max_ecpu": 10000,
@@ -80,32 +84,26 @@ env_config = {
 def load_domains_for_env(environment: str):
     """Load domains directly from database for this environment"""
     # Get database connection parameters from SSM Parameter Store
-    import boto3
     import psycopg2
 
-    ssm = boto3.client("ssm", region_name="us-east-1")
+    # Reuse the control plane's cached loader: one get_parameters_by_path pass per environment
+    control_plane_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "apps", "control-plane"
+    )
+    if control_plane_dir not in sys.path:
+        sys.path.insert(0, control_plane_dir)
+    from config_loader import get_config
 
     try:
         # Read database connection parameters from SSM
-        db_host = ssm.get_parameter(Name=f"/storefront-{environment}/database/host")["Parameter"][
-            "Value"
-        ]
-        db_name = ssm.get_parameter(Name=f"/storefront-{environment}/database/name")["Parameter"][
-            "Value"
-        ]
-        db_user = ssm.get_parameter(Name=f"/storefront-{environment}/database/username")[
-            "Parameter"
-        ]["Value"]
-        db_password = ssm.get_parameter(
-            Name=f"/storefront-{environment}/database/password", WithDecryption=True
-        )["Parameter"]["Value"]
+        database = get_config(environment, region_name="us-east-1").get_path("database")
 
         # Connect to database
         conn = psycopg2.connect(
-            host=db_host,
-            database=db_name,
-            user=db_user,
-            password=db_password,
+            host=database["host"],
+            database=database["name"],
+            user=database["username"],
+            password=database["password"],
             connect_timeout=10,
         )
 
@@ -327,6 +325,7 @@ for current_env in environments_to_deploy:
         db_secret=database_stack.secret,
         sqs_managed_policy=sqs_stack.sqs_managed_policy,
         desired_count=current_config["ecs_desired_count"],
+        max_capacity=current_config["control_plane_max_tasks"],
     )
 
     # Deploy API service (internal only) for this environment
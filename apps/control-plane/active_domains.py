@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Active Domains - Incrementally maintained set of active domains
+
+Responsibilities:
+- Install a trigger on domains that NOTIFYs every status change with a version
+- Warm up once with a full scan, then apply change notifications via LISTEN
+- Serve the current set and its version without re-scanning the table
+- Re-scan only after a reconnect or when a notification did not arrive in time
+"""
+
+import json
+import logging
+import select
+import threading
+import time
+from typing import FrozenSet, Tuple
+
+from metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "domain_changes"
+
+# Versions come from a sequence, so they increase monotonically across writers
+INSTALL_SQL = """
+CREATE SEQUENCE IF NOT EXISTS domains_change_version;
+
+CREATE OR REPLACE FUNCTION notify_domain_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF OLD.full_url = NEW.full_url
+           AND OLD.active_status IS NOT DISTINCT FROM NEW.active_status THEN
+            RETURN NULL;
+        END IF;
+        IF OLD.full_url <> NEW.full_url THEN
+            PERFORM pg_notify('domain_changes', json_build_object(
+                'version', nextval('domains_change_version'),
+                'full_url', OLD.full_url,
+                'active_status', 'N')::text);
+        END IF;
+    END IF;
+
+    PERFORM pg_notify('domain_changes', json_build_object(
+        'version', nextval('domains_change_version'),
+        'full_url', CASE WHEN TG_OP = 'DELETE' THEN OLD.full_url ELSE NEW.full_url END,
+        'active_status', CASE WHEN TG_OP = 'DELETE' THEN 'N' ELSE NEW.active_status END)::text);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgname = 'domains_change_feed' AND tgrelid = 'domains'::regclass
+    ) THEN
+        CREATE TRIGGER domains_change_feed
+            AFTER INSERT OR UPDATE OR DELETE ON domains
+            FOR EACH ROW EXECUTE FUNCTION notify_domain_change();
+    END IF;
+END
+$$;
+"""
+
+# Serialises trigger installation across tasks starting at the same time
+INSTALL_LOCK_ID = 0x646F6D61696E  # "domain"
+
+DEFAULT_SYNC_TIMEOUT = 2.0  # seconds to wait for our own writes to be notified
+
+
+def update_domains(domains: set, event: dict):
+    """Apply one change notification to a set of active domains"""
+    if event["active_status"] == "Y":
+        domains.add(event["full_url"])
+    else:
+        domains.discard(event["full_url"])
+
+
+class ActiveDomainSet:
+    """Active domains kept current by the domains change feed"""
+
+    def __init__(self, db_pool, sync_timeout: float = DEFAULT_SYNC_TIMEOUT):
+        """
+        Initialize active domain set (installs the feed and warms up)
+
+        Args:
+            db_pool: DatabasePool for the warm-up scan and version reads
+            sync_timeout: Seconds wait_for_latest waits before falling back to a scan
+        """
+        self.db_pool = db_pool
+        self.sync_timeout = sync_timeout
+
+        self._domains = set()
+        self._version = 0
+        self._snapshot = None  # cached frozenset, cleared on every change
+        self._scan_logs = []  # notifications received while a scan is running, per scan
+        self._cond = threading.Condition()
+        self._listen_conn = None
+        self._stop = threading.Event()
+
+        # Stats
+        self.stats = {
+            "version": 0,
+            "domains": 0,
+            "notifications": 0,
+            "scans": 0,
+            "reconnects": 0,
+        }
+        register_stats("active_domains", self._snapshot_stats)
+
+        self._install()
+        self._warm_up()
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ActiveDomains")
+        self._thread.start()
+
+    def _snapshot_stats(self) -> dict:
+        self.stats["version"] = self._version
+        self.stats["domains"] = len(self._domains)
+        return self.stats
+
+    def _install(self):
+        """Create the version sequence, notify function and trigger"""
+        with self.db_pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (INSTALL_LOCK_ID,))
+            cur.execute(INSTALL_SQL)
+            conn.commit()
+        logger.info("✅ Domain change feed installed")
+
+    def _current_version(self) -> int:
+        """Latest version handed out by the sequence"""
+        with self.db_pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT last_value, is_called FROM domains_change_version")
+            last_value, is_called = cur.fetchone()
+            conn.rollback()
+        return last_value if is_called else 0
+
+    def _scan(self):
+        """
+        Replace the set with a full scan of active domains
+
+        Notifications applied while the scan runs are recorded and replayed onto
+        the scanned set, so a change notified mid-scan is not overwritten.
+        """
+        log = []
+        with self._cond:
+            self._scan_logs.append(log)
+        try:
+            with self.db_pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT last_value, is_called FROM domains_change_version")
+                last_value, is_called = cur.fetchone()
+                cur.execute("SELECT full_url FROM domains WHERE active_status = 'Y'")
+                domains = {row[0] for row in cur.fetchall()}
+                conn.rollback()
+        except Exception:
+            with self._cond:
+                self._scan_logs.remove(log)
+            raise
+
+        with self._cond:
+            self._scan_logs.remove(log)
+            # Replayed in arrival (commit) order, so the latest change per domain wins
+            for event in log:
+                update_domains(domains, event)
+            self._domains = domains
+            self._version = max(self._version, last_value if is_called else 0)
+            self._snapshot = None
+            self._cond.notify_all()
+        self.stats["scans"] += 1
+        logger.info(f"🌐 Loaded {len(domains)} active domains (version {self._version})")
+
+    def _warm_up(self):
+        """LISTEN first, then scan, so no change between the two is missed"""
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception:
+                pass
+        conn = self.db_pool.connect_dedicated()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        self._listen_conn = conn
+        self._scan()
+
+    def _apply(self, event: dict):
+        """Apply one change notification"""
+        with self._cond:
+            update_domains(self._domains, event)
+            for log in self._scan_logs:
+                log.append(event)
+            self._version = max(self._version, int(event["version"]))
+            self._snapshot = None
+            self._cond.notify_all()
+        self.stats["notifications"] += 1
+
+    def _run(self):
+        """Background thread: apply notifications, reconnecting (and re-scanning) on failure"""
+        while not self._stop.is_set():
+            try:
+                if select.select([self._listen_conn], [], [], 5) == ([], [], []):
+                    continue
+                self._listen_conn.poll()
+                while self._listen_conn.notifies:
+                    notify = self._listen_conn.notifies.pop(0)
+                    self._apply(json.loads(notify.payload))
+            except Exception as e:
+                if self._stop.is_set():
+                    return
+                logger.warning(f"⚠️ Domain change feed lost ({e}), reconnecting...")
+                self.stats["reconnects"] += 1
+                time.sleep(5)
+                try:
+                    self._warm_up()
+                except Exception as warm_up_error:
+                    logger.error(f"❌ Failed to re-establish domain change feed: {warm_up_error}")
+
+    @property
+    def version(self) -> int:
+        """Version of the newest change applied to the set"""
+        return self._version
+
+    def snapshot(self) -> Tuple[int, FrozenSet[str]]:
+        """
+        Current active domains and their version
+
+        Returns:
+            tuple: (version, frozenset of domains); reused until the next change
+        """
+        with self._cond:
+            if self._snapshot is None:
+                self._snapshot = frozenset(self._domains)
+            return self._version, self._snapshot
+
+    def wait_for_latest(self, timeout: float = None) -> int:
+        """
+        Make sure changes committed before this call are reflected in the set
+
+        Waits for the notifications up to the sequence's current value and re-scans
+        if they do not arrive in time (e.g. a rolled-back write burned a version).
+
+        Args:
+            timeout: Seconds to wait (defaults to sync_timeout)
+
+        Returns:
+            int: Version of the set afterwards
+        """
+        target = self._current_version()
+        deadline = time.monotonic() + (self.sync_timeout if timeout is None else timeout)
+        with self._cond:
+            while self._version < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if self._version >= target:
+                return self._version
+
+        self._scan()
+        return self._version
+
+    def close(self):
+        """Stop listening"""
+        self._stop.set()
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception:
+                pass
+
+
+_active_domains = None
+_active_domains_lock = threading.Lock()
+
+
+def get_active_domains(db_pool) -> ActiveDomainSet:
+    """Return the process-wide active domain set (installed and warmed up on first use)"""
+    global _active_domains
+    with _active_domains_lock:
+        if _active_domains is None:
+            _active_domains = ActiveDomainSet(db_pool)
+        return _active_domains
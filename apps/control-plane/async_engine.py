@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Async Engine - asyncio runtime for the control plane workers
+
+Responsibilities:
+- Multiplex every worker queue on one event loop instead of one thread per queue
+- Keep several receives in flight per queue (the worker's max_receivers)
+- Process received messages in parallel up to a configurable concurrency limit
+- Preserve FIFO ordering within each SQS message group
+
+Workers keep their synchronous boto3/psycopg2/requests clients; the engine runs
+those calls on a bounded executor so a blocking call never stalls the loop.
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from metrics import HANDLE_SECONDS, register_stats
+from queue_worker import group_messages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncControlPlane:
+    """Drive a set of QueueWorkers from a single asyncio event loop"""
+
+    def __init__(self, workers: list, concurrency: int = None):
+        """
+        Initialize async engine
+
+        Args:
+            workers: QueueWorker instances (they are driven, not started as threads)
+            concurrency: Maximum messages handled in parallel across all queues
+        """
+        self.workers = workers
+        self.concurrency = concurrency or int(
+            os.environ.get("CONTROL_PLANE_CONCURRENCY", DEFAULT_CONCURRENCY)
+        )
+        self.running = True
+
+        # Stats
+        self.stats = {
+            "receives": 0,
+            "messages_handled": 0,
+            "handler_errors": 0,
+        }
+        register_stats("async_engine", lambda: self.stats)
+
+    async def _run_group(self, worker, messages: List[dict], indexes: List[int], results: list):
+        """Process one message group sequentially under the shared concurrency limit"""
+        for index in indexes:
+            async with self._semaphore:
+                try:
+                    results[index] = await asyncio.to_thread(
+                        worker.process_message, messages[index]
+                    )
+                except Exception as e:
+                    logger.error(f"❌ [ASYNC] {worker.name} handler error: {e}")
+                    self.stats["handler_errors"] += 1
+                    results[index] = False
+
+    async def _handle(self, worker, messages: List[dict]):
+        """Handle one receive: parallel across message groups, then acknowledge"""
+        try:
+            results = await self._process(worker, messages)
+        except Exception:
+            # Let the messages be retried now instead of after the visibility timeout
+            await asyncio.to_thread(worker.release_messages, messages)
+            raise
+
+        await asyncio.to_thread(worker.complete_messages, messages, results)
+        self.stats["messages_handled"] += len(messages)
+
+    async def _process(self, worker, messages: List[dict]) -> List[bool]:
+        """Run the worker's handlers for one receive"""
+        if getattr(worker, "batch_processing", False):
+            # Worker applies the whole receive at once (e.g. set-based DB writes)
+            async with self._semaphore:
+                with HANDLE_SECONDS.labels(worker.name).time():
+                    results = await asyncio.to_thread(worker.process_messages, messages)
+        else:
+            results = [False] * len(messages)
+            with HANDLE_SECONDS.labels(worker.name).time():
+                await asyncio.gather(
+                    *(
+                        self._run_group(worker, messages, indexes, results)
+                        for indexes in group_messages(messages)
+                    )
+                )
+        return results
+
+    async def _receive(self, worker):
+        """One receive: long-poll, handle and acknowledge"""
+        try:
+            messages = await asyncio.to_thread(
+                worker.receive_messages, worker.receive_wait_seconds()
+            )
+            self.stats["receives"] += 1
+            messages = await asyncio.to_thread(worker.skip_duplicates, messages)
+
+            if messages:
+                logger.info(f"📬 {worker.log_prefix} Received {len(messages)} messages")
+                await self._handle(worker, messages)
+
+            await asyncio.to_thread(worker.on_poll)
+            worker.log_stats()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ [ASYNC] Error in {worker.name} loop: {e}")
+            await asyncio.sleep(5)
+
+    async def _poll(self, worker):
+        """
+        Receive loop for one worker queue
+
+        Up to worker.max_receivers receives are in flight at once, so a slow
+        batch does not hold back the next long poll. FIFO queues keep a message
+        group's later messages invisible while one of its messages is in flight,
+        so ordering within a group is unaffected. Workers that batch across
+        receives have max_receivers = 1.
+        """
+        logger.info(f"🔄 [ASYNC] Polling {worker.name} queue ({worker.max_receivers} receives)...")
+
+        in_flight = asyncio.Semaphore(worker.max_receivers)
+        tasks = set()
+
+        def done(task):
+            tasks.discard(task)
+            in_flight.release()
+
+        while self.running and worker.running:
+            await in_flight.acquire()
+            if not (self.running and worker.running):
+                in_flight.release()
+                break
+            task = asyncio.create_task(self._receive(worker))
+            tasks.add(task)
+            task.add_done_callback(done)
+
+        # Let in-flight receives finish and acknowledge their messages
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info(f"👋 [ASYNC] {worker.name} poller stopped")
+
+    async def run(self):
+        """Run every worker poller until stopped"""
+        loop = asyncio.get_running_loop()
+        # One thread per in-flight long-poll plus one per in-flight handler
+        loop.set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=self.concurrency + sum(worker.max_receivers for worker in self.workers),
+                thread_name_prefix="control-plane",
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        logger.info(
+            f"🚀 [ASYNC] Running {len(self.workers)} workers on one event loop "
+            f"(concurrency={self.concurrency})"
+        )
+        await asyncio.gather(*(self._poll(worker) for worker in self.workers))
+
+    def stop(self):
+        """Stop all pollers after their current receive"""
+        self.running = False
+        for worker in self.workers:
+            worker.stop()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Cache Client - Shared connection to the environment's Valkey cache
+
+Responsibilities:
+- Resolve the endpoint from /storefront-{env}/redis/* (provisioned by RedisStack)
+- Connect over TLS (required by ElastiCache Serverless) with short timeouts
+- Hand every worker in the process the same pooled client
+"""
+
+import logging
+import os
+import threading
+
+import redis
+from config_loader import get_config
+
+logger = logging.getLogger(__name__)
+
+# Cache calls sit on the message path; a slow cache must not stall the workers
+DEFAULT_SOCKET_TIMEOUT = 0.25
+
+_client = None
+_client_resolved = False
+_client_lock = threading.Lock()
+
+
+def get_valkey_client():
+    """
+    Return the process-wide Valkey client
+
+    Returns:
+        redis.Redis: Client, or None when no cache endpoint is configured
+    """
+    global _client, _client_resolved
+    with _client_lock:
+        if _client_resolved:
+            return _client
+        _client_resolved = True
+
+        config = get_config()
+        try:
+            host = config.get("redis/endpoint")
+        except KeyError:
+            logger.warning("⚠️ No Valkey endpoint configured, running without the shared cache")
+            return None
+        port = int(config.get("redis/port", "6379"))
+        timeout = float(os.environ.get("REDIS_SOCKET_TIMEOUT", DEFAULT_SOCKET_TIMEOUT))
+
+        _client = redis.Redis(
+            host=host,
+            port=port,
+            ssl=True,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            health_check_interval=30,
+            decode_responses=True,
+        )
+        logger.info(f"✅ Valkey cache client ready: {host}:{port}")
+        return _client
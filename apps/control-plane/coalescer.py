@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Adaptive Coalescer - Decides when an in-memory batch of domain changes is flushed
+
+Responsibilities:
+- Flush after a quiet period with no new arrivals (trailing-edge debounce)
+- Widen the quiet period while arrivals come in bursts, so floods collapse into one batch
+- Cap how long the oldest item may wait and flush early once the batch is large enough
+- Report every flush decision as metrics
+"""
+
+import math
+import os
+import threading
+import time
+
+from metrics import COALESCED_BATCH_SIZE, COALESCER_FLUSHES, register_stats
+
+DEFAULT_QUIET_PERIOD = 3.0  # seconds without arrivals before a batch is flushed
+DEFAULT_MAX_QUIET_PERIOD = 30.0  # widest quiet period under bursts
+DEFAULT_MAX_WAIT = 120.0  # oldest pending item never waits longer than this
+DEFAULT_MAX_BATCH = 500  # flush immediately at this many pending items
+DEFAULT_BURST_RATE = 0.5  # arrivals/second at which the quiet period has doubled
+DEFAULT_RATE_HALF_LIFE = 10.0  # seconds for the arrival-rate estimate to decay by half
+
+
+class AdaptiveCoalescer:
+    """Debounced flush decisions with a size trigger, a wait cap and burst widening"""
+
+    def __init__(
+        self,
+        name: str,
+        quiet_period: float = DEFAULT_QUIET_PERIOD,
+        max_quiet_period: float = DEFAULT_MAX_QUIET_PERIOD,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        burst_rate: float = DEFAULT_BURST_RATE,
+        rate_half_life: float = DEFAULT_RATE_HALF_LIFE,
+    ):
+        """
+        Initialize adaptive coalescer
+
+        Args:
+            name: Worker name used in metric labels
+            quiet_period: Base seconds without arrivals before flushing
+            max_quiet_period: Upper bound for the widened quiet period
+            max_wait: Seconds after the first pending arrival at which a flush is forced
+            max_batch: Pending item count that flushes immediately
+            burst_rate: Arrival rate (per second) that doubles the quiet period
+            rate_half_life: Half-life of the exponentially decayed arrival-rate estimate
+        """
+        self.name = name
+        self.quiet_period = quiet_period
+        self.max_quiet_period = max_quiet_period
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.burst_rate = burst_rate
+        self.rate_half_life = rate_half_life
+
+        self._first_at = None  # monotonic time of the first pending arrival
+        self._last_at = None  # monotonic time of the latest arrival
+        self._decayed_count = 0.0
+        self._decayed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.stats = {
+            "flushes_quiet": 0,
+            "flushes_max_wait": 0,
+            "flushes_size": 0,
+            "arrival_rate": 0.0,
+            "window_seconds": quiet_period,
+        }
+        register_stats(f"{name}.coalescer", self._snapshot)
+
+    def _decay(self, now: float):
+        """Bring the decayed arrival count up to now (caller holds the lock)"""
+        elapsed = now - self._decayed_at
+        self._decayed_count *= 0.5 ** (elapsed / self.rate_half_life)
+        self._decayed_at = now
+
+    def _rate(self) -> float:
+        """Arrivals per second implied by the decayed count (caller holds the lock)"""
+        return self._decayed_count * math.log(2) / self.rate_half_life
+
+    def _window(self) -> float:
+        """Current quiet period, widened in proportion to the arrival rate"""
+        widened = self.quiet_period * (1 + self._rate() / self.burst_rate)
+        return min(self.max_quiet_period, widened)
+
+    def _snapshot(self) -> dict:
+        with self._lock:
+            self._decay(time.monotonic())
+            self.stats["arrival_rate"] = round(self._rate(), 3)
+            self.stats["window_seconds"] = round(self._window(), 3)
+            return dict(self.stats)
+
+    def add(self, count: int = 1):
+        """
+        Record arriving items
+
+        Args:
+            count: Number of items (messages) that arrived
+        """
+        if count <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._decay(now)
+            self._decayed_count += count
+            if self._first_at is None:
+                self._first_at = now
+            self._last_at = now
+
+    def flush_reason(self, pending: int):
+        """
+        Decide whether the batch should be flushed now
+
+        Args:
+            pending: Items currently waiting in the batch
+
+        Returns:
+            str: "size", "max_wait" or "quiet" when it is time to flush, otherwise None
+        """
+        if pending <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if self._first_at is None:
+                # Items left over from before the first add() (e.g. a failed flush)
+                self._first_at = self._last_at = now
+            self._decay(now)
+            if pending >= self.max_batch:
+                return "size"
+            if now - self._first_at >= self.max_wait:
+                return "max_wait"
+            if now - self._last_at >= self._window():
+                return "quiet"
+        return None
+
+    def poll_wait(self, max_wait_seconds: int = 20) -> int:
+        """
+        Long-poll duration that wakes up in time for the next flush
+
+        Args:
+            max_wait_seconds: Normal long-poll duration
+
+        Returns:
+            int: Seconds to wait in receive_message (0-max_wait_seconds)
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._first_at is None:
+                return max_wait_seconds
+            self._decay(now)
+            due = min(self._last_at + self._window(), self._first_at + self.max_wait)
+        return max(0, min(max_wait_seconds, math.ceil(due - now)))
+
+    def flushed(self, reason: str, size: int):
+        """
+        Record a successful flush and start a new window
+
+        Args:
+            reason: Value returned by flush_reason
+            size: Items in the flushed batch
+        """
+        COALESCER_FLUSHES.labels(self.name, reason).inc()
+        COALESCED_BATCH_SIZE.labels(self.name).observe(size)
+        with self._lock:
+            self.stats[f"flushes_{reason}"] += 1
+            self._first_at = self._last_at = None
+
+    def failed(self):
+        """Keep the pending items but wait a full quiet period before the next attempt"""
+        now = time.monotonic()
+        with self._lock:
+            self._first_at = self._last_at = now
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdaptiveCoalescer":
+        """Create a coalescer configured from BATCH_* environment variables"""
+        return cls(
+            name,
+            quiet_period=float(os.environ.get("BATCH_QUIET_PERIOD", DEFAULT_QUIET_PERIOD)),
+            max_quiet_period=float(
+                os.environ.get("BATCH_MAX_QUIET_PERIOD", DEFAULT_MAX_QUIET_PERIOD)
+            ),
+            max_wait=float(os.environ.get("BATCH_MAX_WAIT", DEFAULT_MAX_WAIT)),
+            max_batch=int(os.environ.get("BATCH_MAX_SIZE", DEFAULT_MAX_BATCH)),
+        )
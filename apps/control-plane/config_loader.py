@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Config Loader - Cached SSM configuration for the control plane
+
+Responsibilities:
+- Fetch every parameter under /storefront-{env}/ with paginated get_parameters_by_path
+- Cache values with a TTL so hot paths never call SSM
+- Share one cache between all workers (and the CDK app at synth time)
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_TTL = 300  # seconds before the cached parameters are reloaded
+
+_MISSING = object()
+
+
+class ConfigLoader:
+    """Thread-safe cache of the SSM parameters under one environment prefix"""
+
+    def __init__(
+        self,
+        environment: str,
+        region_name: str = "us-east-1",
+        ttl: float = DEFAULT_CONFIG_TTL,
+        ssm_client=None,
+    ):
+        """
+        Initialize config loader
+
+        Args:
+            environment: Environment name, parameters are read from /storefront-{environment}/
+            region_name: AWS region for the SSM client
+            ttl: Seconds a loaded snapshot is served before it is reloaded
+            ssm_client: Optional boto3 SSM client
+        """
+        self.environment = environment
+        self.prefix = f"/storefront-{environment}/"
+        self.ttl = ttl
+        self.ssm_client = ssm_client or boto3.client("ssm", region_name=region_name)
+
+        self._values = {}  # key relative to the prefix -> value
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+        # Stats
+        self.stats = {
+            "loads": 0,
+            "load_errors": 0,
+            "api_calls": 0,
+            "parameters": 0,
+        }
+
+    def load(self) -> Dict[str, str]:
+        """
+        Fetch all parameters under the prefix in one paginated pass
+
+        Returns:
+            dict: Parameter values keyed by name relative to the prefix
+        """
+        values = {}
+        kwargs = {"Path": self.prefix, "Recursive": True, "WithDecryption": True}
+
+        while True:
+            response = self.ssm_client.get_parameters_by_path(**kwargs)
+            self.stats["api_calls"] += 1
+
+            for parameter in response.get("Parameters", []):
+                values[parameter["Name"][len(self.prefix) :]] = parameter["Value"]
+
+            if not response.get("NextToken"):
+                break
+            kwargs["NextToken"] = response["NextToken"]
+
+        with self._lock:
+            self._values = values
+            self._loaded_at = time.monotonic()
+            self.stats["loads"] += 1
+            self.stats["parameters"] = len(values)
+
+        logger.info(f"✅ [CONFIG] Loaded {len(values)} parameters from {self.prefix}")
+        return values
+
+    def _is_fresh(self) -> bool:
+        """Check whether the snapshot can be served (caller holds the lock)"""
+        if self._loaded_at is None:
+            return False
+        return not self.ttl or time.monotonic() - self._loaded_at < self.ttl
+
+    def _ensure_fresh(self):
+        """Reload when the snapshot is missing or older than the TTL"""
+        with self._lock:
+            if self._is_fresh():
+                return
+
+        # One thread reloads; concurrent callers wait and reuse its result
+        with self._load_lock:
+            with self._lock:
+                if self._is_fresh():
+                    return
+                has_values = bool(self._values)
+
+            try:
+                self.load()
+            except Exception as e:
+                self.stats["load_errors"] += 1
+                if not has_values:
+                    raise
+                # Keep serving the last snapshot rather than failing hot paths
+                logger.warning(f"⚠️ [CONFIG] Reload failed, serving cached parameters: {e}")
+                with self._lock:
+                    self._loaded_at = time.monotonic()
+
+    def get(self, key: str, default=_MISSING) -> str:
+        """
+        Get one parameter value
+
+        Args:
+            key: Name relative to the prefix, e.g. "database/host"
+            default: Returned when the parameter does not exist
+
+        Returns:
+            str: Parameter value
+
+        Raises:
+            KeyError: If the parameter does not exist and no default was given
+        """
+        self._ensure_fresh()
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+        if default is _MISSING:
+            raise KeyError(f"{self.prefix}{key}")
+        return default
+
+    def get_path(self, path: str) -> Dict[str, str]:
+        """
+        Get every parameter below a sub-path
+
+        Args:
+            path: Sub-path relative to the prefix, e.g. "database"
+
+        Returns:
+            dict: Values keyed by name relative to the sub-path
+        """
+        self._ensure_fresh()
+        path = path.strip("/") + "/"
+        with self._lock:
+            return {
+                key[len(path) :]: value
+                for key, value in self._values.items()
+                if key.startswith(path)
+            }
+
+    def invalidate(self):
+        """Force a reload on the next lookup"""
+        with self._lock:
+            self._loaded_at = None
+
+
+_configs = {}
+_configs_lock = threading.Lock()
+
+
+def get_config(environment: str = None, region_name: str = None) -> ConfigLoader:
+    """
+    Return the process-wide config loader for an environment, creating it on first use
+
+    Args:
+        environment: Environment name (defaults to ENVIRONMENT)
+        region_name: AWS region (defaults to AWS_REGION)
+
+    Returns:
+        ConfigLoader: Shared loader
+    """
+    environment = environment or os.environ.get("ENVIRONMENT", "dev")
+    region_name = region_name or os.environ.get("AWS_REGION", "us-east-1")
+
+    with _configs_lock:
+        if environment not in _configs:
+            _configs[environment] = ConfigLoader(
+                environment,
+                region_name=region_name,
+                ttl=float(os.environ.get("CONFIG_CACHE_TTL", DEFAULT_CONFIG_TTL)),
+            )
+        return _configs[environment]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Consumer Scaling - Backlog-driven receiver counts and the BacklogPerTask metric
+
+Responsibilities:
+- Read queue depth from ApproximateNumberOfMessages
+- Size the number of concurrent receivers per queue within configured bounds
+- Publish backlog per running task to CloudWatch for ECS target tracking
+"""
+
+import logging
+import math
+import os
+import threading
+from typing import List
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+# Must match the metric the ControlPlaneServiceStack scaling policy tracks
+METRIC_NAMESPACE = "Storefront/ControlPlane"
+BACKLOG_METRIC_NAME = "BacklogPerTask"
+
+DEFAULT_MIN_RECEIVERS = 1
+DEFAULT_MAX_RECEIVERS = 4
+DEFAULT_MESSAGES_PER_RECEIVER = 10  # one full receive batch per receiver
+DEFAULT_PUBLISH_INTERVAL = 60
+
+
+def queue_backlog(sqs_client, queue_url: str) -> int:
+    """
+    Get the number of messages waiting to be received
+
+    Args:
+        sqs_client: boto3 SQS client
+        queue_url: Queue to inspect
+
+    Returns:
+        int: ApproximateNumberOfMessages
+    """
+    response = sqs_client.get_queue_attributes(
+        QueueUrl=queue_url, AttributeNames=["ApproximateNumberOfMessages"]
+    )
+    return int(response["Attributes"]["ApproximateNumberOfMessages"])
+
+
+def desired_receivers(
+    backlog: int,
+    min_receivers: int = DEFAULT_MIN_RECEIVERS,
+    max_receivers: int = DEFAULT_MAX_RECEIVERS,
+    messages_per_receiver: int = DEFAULT_MESSAGES_PER_RECEIVER,
+) -> int:
+    """
+    Size the receiver pool for a backlog
+
+    Returns:
+        int: ceil(backlog / messages_per_receiver), clamped to [min_receivers, max_receivers]
+    """
+    wanted = math.ceil(backlog / max(1, messages_per_receiver))
+    return max(min_receivers, min(max_receivers, wanted))
+
+
+class BacklogPublisher(threading.Thread):
+    """Publish total queue backlog divided by running tasks as a CloudWatch metric"""
+
+    def __init__(self, queue_urls: List[str], interval: float = DEFAULT_PUBLISH_INTERVAL):
+        """
+        Initialize backlog publisher
+
+        Args:
+            queue_urls: Queues whose backlog drives task scaling
+            interval: Seconds between metric publications
+        """
+        super().__init__(daemon=True, name="BacklogPublisher")
+
+        self.region_name = os.environ.get("AWS_REGION", "us-east-1")
+        self.environment = os.environ.get("ENVIRONMENT", "dev")
+        self.cluster = os.environ.get("ECS_CLUSTER")
+        self.service = os.environ.get("ECS_SERVICE")
+        self.queue_urls = queue_urls
+        self.interval = interval
+
+        self.sqs_client = boto3.client("sqs", region_name=self.region_name)
+        self.ecs_client = boto3.client("ecs", region_name=self.region_name)
+        self.cloudwatch = boto3.client("cloudwatch", region_name=self.region_name)
+
+        self._stop = threading.Event()
+
+    def running_tasks(self) -> int:
+        """Running task count of this service (1 when it cannot be determined)"""
+        if not (self.cluster and self.service):
+            return 1
+        response = self.ecs_client.describe_services(cluster=self.cluster, services=[self.service])
+        services = response.get("services", [])
+        return max(1, services[0]["runningCount"]) if services else 1
+
+    def publish(self) -> float:
+        """
+        Publish one BacklogPerTask datapoint
+
+        Returns:
+            float: Published value
+        """
+        backlog = sum(queue_backlog(self.sqs_client, url) for url in self.queue_urls)
+        tasks = self.running_tasks()
+        value = backlog / tasks
+
+        self.cloudwatch.put_metric_data(
+            Namespace=METRIC_NAMESPACE,
+            MetricData=[
+                {
+                    "MetricName": BACKLOG_METRIC_NAME,
+                    "Dimensions": [{"Name": "Environment", "Value": self.environment}],
+                    "Value": value,
+                    "Unit": "Count",
+                }
+            ],
+        )
+        logger.debug(f"📊 [SCALE] Backlog {backlog} across {tasks} tasks → {value:.1f} per task")
+        return value
+
+    def run(self):
+        """Publish until stopped"""
+        while not self._stop.is_set():
+            try:
+                self.publish()
+            except Exception as e:
+                logger.warning(f"⚠️ [SCALE] Failed to publish backlog metric: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        """Stop publishing"""
+        self._stop.set()
@@ -6,20 +6,30 @@ Runs multiple specialized workers in parallel:
 - Database Worker: Handles domain table operations
 - Route53 Worker: Manages DNS zones and records
 - GitHub Worker: Triggers deployment workflows
+
+Set CONTROL_PLANE_RUNTIME=asyncio to drive all workers from one event loop
+instead of one thread per queue, or WORKER_ISOLATION=process to run each
+supervised worker in its own process (each serving its metrics on its own port,
+from WORKER_METRICS_PORT on).
 """
 
+import asyncio
 import logging
 import os
 import signal
 import sys
-import time
+from functools import partial
 
-import boto3
-import psycopg2
+from async_engine import AsyncControlPlane
+from config_loader import get_config
+from consumer_scaling import BacklogPublisher
 from database_worker import DatabaseWorker
+from db_pool import DatabasePool
 from github_worker import GitHubWorker
-from psycopg2.extras import RealDictCursor
+from metrics import start_metrics_server
 from route53_worker import Route53Worker
+from supervisor import WorkerSupervisor
+from zone_index import get_zone_index
 
 # Configure logging
 logging.basicConfig(
@@ -32,62 +42,70 @@ logger = logging.getLogger(__name__)
 
 # Global workers for signal handling
 workers = []
-db_connection = None
+supervisor = None
+db_pool = None
 
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully."""
     logger.info(f"🛑 Received signal {signum}, shutting down all workers...")
+    if supervisor:
+        supervisor.stop()
     for worker in workers:
         worker.stop()
-    if db_connection:
-        db_connection.close()
+    if db_pool:
+        db_pool.close()
     sys.exit(0)
 
 
 def connect_to_database():
-    """Connect to PostgreSQL database"""
+    """Create the PostgreSQL connection pool shared by all workers"""
     try:
-        region_name = os.environ.get("AWS_REGION", "us-east-1")
-        environment = os.environ.get("ENVIRONMENT", "dev")
-
-        ssm_client = boto3.client("ssm", region_name=region_name)
-
-        db_host = ssm_client.get_parameter(Name=f"/storefront-{environment}/database/host")[
-            "Parameter"
-        ]["Value"]
-
-        db_name = ssm_client.get_parameter(Name=f"/storefront-{environment}/database/name")[
-            "Parameter"
-        ]["Value"]
+        # All /storefront-{env}/ parameters arrive in one paginated, cached fetch
+        database = get_config().get_path("database")
+        db_host = database["host"]
+        db_name = database["name"]
 
-        db_user = ssm_client.get_parameter(Name=f"/storefront-{environment}/database/username")[
-            "Parameter"
-        ]["Value"]
-
-        db_password = ssm_client.get_parameter(
-            Name=f"/storefront-{environment}/database/password", WithDecryption=True
-        )["Parameter"]["Value"]
-
-        connection = psycopg2.connect(
+        pool = DatabasePool(
             host=db_host,
             database=db_name,
-            user=db_user,
-            password=db_password,
-            cursor_factory=RealDictCursor,
+            user=database["username"],
+            password=database["password"],
+            max_connections=int(os.environ.get("DB_POOL_MAX_CONNECTIONS", "5")),
+            statement_timeout_ms=int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "30000")),
         )
 
         logger.info(f"✅ Connected to database: {db_host}/{db_name}")
-        return connection
+        return pool
 
     except Exception as e:
         logger.error(f"❌ Failed to connect to database: {e}")
         raise
 
 
+def build_database_worker():
+    """Build a database worker in its own process, with its own pool"""
+    return DatabaseWorker(connect_to_database())
+
+
+def build_github_worker():
+    """Build a GitHub worker in its own process, with its own pool"""
+    return GitHubWorker(connect_to_database())
+
+
+def build_route53_worker(region_name: str):
+    """Build a Route53 worker in its own process, seeding the zone index from a short-lived pool"""
+    pool = connect_to_database()
+    try:
+        get_zone_index(region_name, db_pool=pool)
+    finally:
+        pool.close()
+    return Route53Worker()
+
+
 def main():
     """Main application entry point."""
-    global workers, db_connection
+    global workers, supervisor, db_pool
 
     logger.info("🚀 Starting Control Plane Service (Modular Architecture)...")
 
@@ -96,36 +114,59 @@ def main():
     signal.signal(signal.SIGINT, signal_handler)
 
     try:
-        # Connect to database (shared by database and github workers)
-        db_connection = connect_to_database()
+        # Prometheus endpoint on the container port declared by ControlPlaneServiceStack
+        start_metrics_server()
 
-        # Initialize all workers
-        database_worker = DatabaseWorker(db_connection)
-        route53_worker = Route53Worker()
-        github_worker = GitHubWorker(db_connection)
-
-        workers = [database_worker, route53_worker, github_worker]
+        region_name = os.environ.get("AWS_REGION", "us-east-1")
+        runtime = os.environ.get("CONTROL_PLANE_RUNTIME", "threads")
+        isolation = os.environ.get("WORKER_ISOLATION", "thread")
+
+        if isolation == "process" and runtime != "asyncio":
+            # Factories are pickled into the spawned processes, which open their own pools
+            factories = {
+                "DatabaseWorker": build_database_worker,
+                "Route53Worker": partial(build_route53_worker, region_name),
+                "GitHubWorker": build_github_worker,
+            }
+        else:
+            # Connection pool shared by database and github workers (one connection per checkout)
+            db_pool = connect_to_database()
+
+            # Shared hosted zone index, seeded from hosted_zone_ids so startup needs no full scan
+            get_zone_index(region_name, db_pool=db_pool)
+
+            factories = {
+                "DatabaseWorker": lambda: DatabaseWorker(db_pool),
+                "Route53Worker": Route53Worker,
+                "GitHubWorker": lambda: GitHubWorker(db_pool),
+            }
+
+        # Queue backlog per running task drives ECS target-tracking autoscaling
+        config = get_config()
+        BacklogPublisher(
+            [
+                config.get(worker_class.queue_parameter)
+                for worker_class in (DatabaseWorker, Route53Worker, GitHubWorker)
+            ]
+        ).start()
 
-        logger.info("✅ All workers initialized successfully")
         logger.info(f"📋 Active Workers:")
         logger.info(f"   - Database Worker (domain table operations)")
         logger.info(f"   - Route53 Worker (DNS zone management)")
         logger.info(f"   - GitHub Worker (workflow triggers)")
 
-        # Start all worker threads
-        for worker in workers:
-            worker.start()
-            logger.info(f"🔄 Started {worker.name}")
+        if runtime == "asyncio":
+            workers = [factory() for factory in factories.values()]
+            logger.info("✅ All workers running on asyncio engine...")
+            asyncio.run(AsyncControlPlane(workers).run())
+            return
+
+        # Start all workers; the supervisor rebuilds any that die or get stuck
+        supervisor = WorkerSupervisor.from_env(factories)
+        supervisor.start()
 
-        # Keep main thread alive
         logger.info("✅ All workers running...")
-        while True:
-            time.sleep(60)
-            # Check if all workers are still alive
-            for worker in workers:
-                if not worker.is_alive():
-                    logger.error(f"❌ Worker {worker.name} died, restarting...")
-                    worker.start()
+        supervisor.run()
 
     except KeyboardInterrupt:
         logger.info("🛑 Received keyboard interrupt, shutting down...")
@@ -134,12 +175,15 @@ def main():
         sys.exit(1)
     finally:
         logger.info("🧹 Cleaning up workers...")
+        if supervisor:
+            supervisor.stop()
         for worker in workers:
             worker.stop()
         for worker in workers:
-            worker.join(timeout=5)
-        if db_connection:
-            db_connection.close()
+            if worker.is_alive():
+                worker.join(timeout=5)
+        if db_pool:
+            db_pool.close()
         logger.info("👋 Control Plane service stopped")
 
 
@@ -10,40 +10,36 @@ Responsibilities:
 
 import json
 import logging
-import os
-import time
-from threading import Thread
+from typing import List
 
-import boto3
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from domain_helpers import bulk_activate_domains, bulk_deactivate_domains
+from queue_worker import QueueWorker
+from tenant_cache import get_tenant_cache
 
 logger = logging.getLogger(__name__)
 
 
-class DatabaseWorker(Thread):
+class DatabaseWorker(QueueWorker):
     """Worker thread to handle database operations for domain management"""
 
-    def __init__(self, db_connection):
+    log_prefix = "[DB]"
+    queue_parameter = "sqs/database-operations-queue-url"
+    visibility_timeout = 30  # extended by the heartbeat while a batch is applied
+    batch_processing = True  # process_messages applies a whole receive in one transaction
+
+    def __init__(self, db_pool):
         """
         Initialize database worker
 
         Args:
-            db_connection: Shared database connection
+            db_pool: Shared DatabasePool (one connection is checked out per operation)
         """
-        super().__init__(daemon=True, name="DatabaseWorker")
-
-        self.region_name = os.environ.get("AWS_REGION", "us-east-1")
-        self.environment = os.environ.get("ENVIRONMENT", "dev")
-        self.db_connection = db_connection
-
-        # Get queue URL from SSM
-        ssm_client = boto3.client("ssm", region_name=self.region_name)
-        self.queue_url = ssm_client.get_parameter(
-            Name=f"/storefront-{self.environment}/sqs/database-operations-queue-url"
-        )["Parameter"]["Value"]
+        super().__init__(name="DatabaseWorker")
 
-        self.sqs_client = boto3.client("sqs", region_name=self.region_name)
+        self.db_pool = db_pool
+        # Committed changes are written through to the storefront tenant cache
+        self.tenant_cache = get_tenant_cache(self.environment)
+        self.tenant_cache.warm_up_in_background(db_pool)
 
         # Stats
         self.stats = {
@@ -54,9 +50,27 @@ class DatabaseWorker(Thread):
             "errors": 0,
         }
 
-        self.running = True
         logger.info("✅ Database worker initialized")
 
+    def _parse_message(self, message: dict):
+        """
+        Extract the domain change from a message
+
+        Returns:
+            tuple: (full_url, tenant_id, active_status) or None if the message is invalid
+        """
+        body = json.loads(message["Body"])
+
+        full_url = body.get("full_url")
+        tenant_id = body.get("tenant_id")
+        active_status = body.get("active_status", "Y")
+
+        if not full_url or not tenant_id:
+            logger.error(f"❌ Invalid message: missing full_url or tenant_id")
+            return None
+
+        return full_url, tenant_id, active_status
+
     def process_message(self, message: dict) -> bool:
         """
         Process a single domain change message
@@ -68,16 +82,12 @@ class DatabaseWorker(Thread):
             bool: True if processed successfully
         """
         try:
-            body = json.loads(message["Body"])
-
-            full_url = body.get("full_url")
-            tenant_id = body.get("tenant_id")
-            active_status = body.get("active_status", "Y")
-
-            if not full_url or not tenant_id:
-                logger.error(f"❌ Invalid message: missing full_url or tenant_id")
+            parsed = self._parse_message(message)
+            if not parsed:
                 return False
 
+            full_url, tenant_id, active_status = parsed
+
             logger.info(
                 f"📨 [DB] Processing domain: {full_url} (active={active_status}, tenant={tenant_id})"
             )
@@ -85,29 +95,90 @@ class DatabaseWorker(Thread):
             if active_status == "Y":
                 return self._activate_domain(full_url, tenant_id)
             else:
-                return self._deactivate_domain(full_url)
+                return self._deactivate_domain(full_url, tenant_id)
 
         except Exception as e:
             logger.error(f"❌ [DB] Error processing message: {e}")
             self.stats["errors"] += 1
             return False
 
+    def process_messages(self, messages: List[dict]) -> List[bool]:
+        """
+        Apply a received batch with one multi-row statement per action in one transaction
+
+        When a domain appears more than once, the last message (FIFO order) wins.
+        If the transaction fails, messages are retried one by one so a single bad
+        row cannot hold back the rest of the batch.
+
+        Args:
+            messages: SQS messages from one receive call
+
+        Returns:
+            list: True for each message that can be deleted
+        """
+        results = [False] * len(messages)
+        latest = {}  # full_url -> (tenant_id, active_status), last write wins
+        applied = []
+
+        for index, message in enumerate(messages):
+            try:
+                parsed = self._parse_message(message)
+            except Exception as e:
+                logger.error(f"❌ [DB] Error processing message: {e}")
+                self.stats["errors"] += 1
+                continue
+
+            if parsed:
+                full_url, tenant_id, active_status = parsed
+                latest[full_url] = (tenant_id, active_status)
+                applied.append(index)
+
+        if not latest:
+            return results
+
+        activations = [
+            (full_url, tenant_id)
+            for full_url, (tenant_id, active_status) in latest.items()
+            if active_status == "Y"
+        ]
+        deactivations = [
+            (full_url, tenant_id)
+            for full_url, (tenant_id, active_status) in latest.items()
+            if active_status != "Y"
+        ]
+
+        try:
+            with self.db_pool.connection() as conn, conn.cursor() as cur:
+                bulk_deactivate_domains(cur, [full_url for full_url, _ in deactivations])
+                bulk_activate_domains(cur, activations)
+                conn.commit()
+
+        except Exception as e:
+            logger.error(f"❌ [DB] Batch write failed, retrying messages individually: {e}")
+            for index in applied:
+                results[index] = self.process_message(messages[index])
+            return results
+
+        self.tenant_cache.publish_changes(activations, deactivations)
+
+        self.stats["domains_added"] += len(activations)
+        self.stats["domains_deleted"] += len(deactivations)
+        logger.info(
+            f"✅ [DB] Applied batch: {len(activations)} activations, "
+            f"{len(deactivations)} deactivations ({len(applied)} messages)"
+        )
+
+        for index in applied:
+            results[index] = True
+        return results
+
     def _activate_domain(self, domain: str, tenant_id: str) -> bool:
         """Add or update domain in domains table"""
         try:
-            with self.db_connection.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO domains (full_url, tenant_id, active_status, activation_date)
-                    VALUES (%s, %s, 'Y', CURRENT_DATE)
-                    ON CONFLICT (full_url) DO UPDATE SET
-                        tenant_id = EXCLUDED.tenant_id,
-                        active_status = 'Y',
-                        activation_date = CURRENT_DATE
-                    """,
-                    (domain, tenant_id),
-                )
-                self.db_connection.commit()
+            with self.db_pool.connection() as conn, conn.cursor() as cur:
+                bulk_activate_domains(cur, [(domain, tenant_id)])
+                conn.commit()
+            self.tenant_cache.publish_changes(activations=[(domain, tenant_id)])
 
             self.stats["domains_added"] += 1
             logger.info(f"✅ [DB] Activated domain: {domain} for tenant {tenant_id}")
@@ -115,18 +186,15 @@ class DatabaseWorker(Thread):
 
         except Exception as e:
             logger.error(f"❌ [DB] Failed to activate domain {domain}: {e}")
-            self.db_connection.rollback()
             return False
 
-    def _deactivate_domain(self, domain: str) -> bool:
+    def _deactivate_domain(self, domain: str, tenant_id: str = None) -> bool:
         """Mark domain as inactive in domains table"""
         try:
-            with self.db_connection.cursor() as cur:
-                cur.execute(
-                    "UPDATE domains SET active_status = 'N' WHERE full_url = %s",
-                    (domain,),
-                )
-                self.db_connection.commit()
+            with self.db_pool.connection() as conn, conn.cursor() as cur:
+                bulk_deactivate_domains(cur, [domain])
+                conn.commit()
+            self.tenant_cache.publish_changes(deactivations=[(domain, tenant_id)])
 
             self.stats["domains_deleted"] += 1
             logger.info(f"✅ [DB] Deactivated domain: {domain}")
@@ -134,53 +202,4 @@ class DatabaseWorker(Thread):
 
         except Exception as e:
             logger.error(f"❌ [DB] Failed to deactivate domain {domain}: {e}")
-            self.db_connection.rollback()
             return False
-
-    def run(self):
-        """Main worker loop"""
-        logger.info("🔄 [DB] Starting database worker thread...")
-
-        while self.running:
-            try:
-                response = self.sqs_client.receive_message(
-                    QueueUrl=self.queue_url,
-                    MaxNumberOfMessages=10,
-                    WaitTimeSeconds=20,
-                    VisibilityTimeout=120,
-                )
-
-                messages = response.get("Messages", [])
-
-                if not messages:
-                    continue
-
-                logger.info(f"📬 [DB] Received {len(messages)} messages")
-
-                for message in messages:
-                    if self.process_message(message):
-                        # Delete message from queue
-                        self.sqs_client.delete_message(
-                            QueueUrl=self.queue_url,
-                            ReceiptHandle=message["ReceiptHandle"],
-                        )
-                        self.stats["messages_processed"] += 1
-                    else:
-                        logger.warning(f"⚠️ [DB] Message processing failed, will retry")
-
-                # Log stats periodically
-                if (
-                    self.stats["messages_processed"] % 10 == 0
-                    and self.stats["messages_processed"] > 0
-                ):
-                    logger.info(f"📊 [DB] Stats: {self.stats}")
-
-            except Exception as e:
-                logger.error(f"❌ [DB] Error in worker loop: {e}")
-                time.sleep(5)
-
-        logger.info("👋 [DB] Database worker stopped")
-
-    def stop(self):
-        """Stop the worker gracefully"""
-        self.running = False
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Database Pool - Thread-safe PostgreSQL connection pool for control plane workers
+
+Responsibilities:
+- Hand out one connection per checkout instead of sharing a single socket
+- Validate connections on checkout and transparently replace dead ones
+- Apply TCP keepalives and a server-side statement_timeout to every connection
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from metrics import observe_call, register_stats
+from psycopg2 import pool
+
+logger = logging.getLogger(__name__)
+
+# Defaults tuned for a small Fargate task talking to a db.t3.micro RDS instance
+DEFAULT_MIN_CONNECTIONS = 1
+DEFAULT_MAX_CONNECTIONS = 5
+DEFAULT_STATEMENT_TIMEOUT_MS = 30000
+DEFAULT_CHECKOUT_TIMEOUT = 30
+# Connections idle for longer than this are probed with SELECT 1 before use
+DEFAULT_VALIDATE_AFTER_IDLE = 30
+
+# Errors that indicate the connection itself is broken and must be discarded
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class DatabasePool:
+    """Thread-safe pool of validated PostgreSQL connections"""
+
+    def __init__(
+        self,
+        host: str,
+        database: str,
+        user: str,
+        password: str,
+        port: str = "5432",
+        min_connections: int = DEFAULT_MIN_CONNECTIONS,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        statement_timeout_ms: int = DEFAULT_STATEMENT_TIMEOUT_MS,
+        checkout_timeout: float = DEFAULT_CHECKOUT_TIMEOUT,
+        validate_after_idle: float = DEFAULT_VALIDATE_AFTER_IDLE,
+    ):
+        """
+        Initialize database pool
+
+        Args:
+            host: Database host
+            database: Database name
+            user: Database user
+            password: Database password
+            port: Database port
+            min_connections: Connections opened eagerly
+            max_connections: Upper bound on concurrently checked-out connections
+            statement_timeout_ms: Server-side statement_timeout for every session
+            checkout_timeout: Seconds to wait for a free connection before failing
+            validate_after_idle: Idle seconds after which a connection is probed on checkout
+        """
+        self.host = host
+        self.database = database
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.validate_after_idle = validate_after_idle
+
+        self._connect_kwargs = dict(
+            host=host,
+            database=database,
+            user=user,
+            password=password,
+            port=port,
+            connect_timeout=10,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+            options=f"-c statement_timeout={int(statement_timeout_ms)}",
+            application_name="storefront-control-plane",
+        )
+        self._pool = pool.ThreadedConnectionPool(
+            min_connections, max_connections, **self._connect_kwargs
+        )
+        # ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait instead
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Stats
+        self.stats = {
+            "checkouts": 0,
+            "reconnects": 0,
+            "checkout_timeouts": 0,
+        }
+        register_stats("db_pool", lambda: self.stats)
+
+        logger.info(
+            f"✅ [POOL] Database pool ready: {host}/{database} "
+            f"(min={min_connections}, max={max_connections})"
+        )
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "DatabasePool":
+        """Build a pool from the PG* environment variables injected by the ECS task"""
+        return cls(
+            host=os.environ["PGHOST"],
+            database=os.environ["PGDATABASE"],
+            user=os.environ["PGUSER"],
+            password=os.environ["PGPASSWORD"],
+            port=os.environ.get("PGPORT", "5432"),
+            **kwargs,
+        )
+
+    def _is_healthy(self, conn) -> bool:
+        """Check whether a pooled connection can still be used"""
+        if conn.closed:
+            return False
+
+        idle = time.time() - self._last_used.get(id(conn), 0)
+        if idle < self.validate_after_idle:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        """Close a broken connection and drop it from the pool"""
+        with self._lock:
+            self._last_used.pop(id(conn), None)
+        try:
+            self._pool.putconn(conn, close=True)
+        except Exception:
+            pass
+
+    def getconn(self):
+        """
+        Check out a healthy connection
+
+        Returns:
+            A psycopg2 connection; must be handed back with putconn()
+        """
+        if self._closed:
+            raise psycopg2.InterfaceError("Database pool is closed")
+
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            self.stats["checkout_timeouts"] += 1
+            raise pool.PoolError(f"Timed out waiting {self.checkout_timeout}s for a connection")
+
+        try:
+            # One retry per slot is enough to replace every stale connection in the pool
+            for _ in range(self.max_connections + 1):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    self.stats["checkouts"] += 1
+                    return conn
+
+                logger.warning("⚠️ [POOL] Discarding dead database connection, reconnecting...")
+                self.stats["reconnects"] += 1
+                self._discard(conn)
+
+            raise psycopg2.OperationalError("Unable to obtain a healthy database connection")
+
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, broken: bool = False):
+        """
+        Return a connection to the pool
+
+        Args:
+            conn: Connection previously obtained from getconn()
+            broken: Discard the connection instead of reusing it
+        """
+        try:
+            if not broken and not conn.closed:
+                try:
+                    # Never hand an open transaction to the next borrower
+                    conn.rollback()
+                except Exception:
+                    broken = True
+
+            if broken or conn.closed:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._last_used[id(conn)] = time.time()
+                self._pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with-block
+
+        Uncommitted work is rolled back when the block exits, and connections that
+        fail with a connection-level error are discarded rather than reused.
+        """
+        with observe_call("db", "checkout"):
+            conn = self.getconn()
+        broken = False
+        try:
+            with observe_call("db", "transaction"):
+                yield conn
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    def connect_dedicated(self):
+        """
+        Open a connection outside the pool with the same settings
+
+        For long-lived sessions such as LISTEN that must not hold a pool slot.
+
+        Returns:
+            A psycopg2 connection owned (and closed) by the caller
+        """
+        return psycopg2.connect(**self._connect_kwargs)
+
+    def close(self):
+        """Close every connection in the pool"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._pool.closeall()
+            logger.info("✅ [POOL] Database pool closed")
+        except Exception as e:
+            logger.error(f"❌ [POOL] Error closing database pool: {e}")
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Delegation Set - Shared Route53 nameservers for every storefront hosted zone
+
+Responsibilities:
+- Reuse the reusable delegation set whose ID is stored in SSM, or create and store one
+- Hand its ID to zone creation so every new zone gets the same four nameservers
+- Report existing zones that are not on the shared set (they keep their own NS records)
+  and how close the set is to its zone limit
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+from config_loader import get_config
+from route53_executor import get_route53_client, get_route53_executor
+
+logger = logging.getLogger(__name__)
+
+PARAMETER_KEY = "route53/delegation-set-id"  # under /storefront-{env}/
+RETRY_INTERVAL = 300  # seconds before a failed resolution is attempted again
+
+
+def normalize_id(resource_id: str) -> str:
+    """Strip the /delegationset/ or /hostedzone/ prefix from a Route53 ID"""
+    return resource_id.split("/")[-1]
+
+
+class ReusableDelegationSet:
+    """Lazily resolved reusable delegation set for one environment"""
+
+    def __init__(self, route53_client, ssm_client, environment: str, executor=None):
+        """
+        Initialize reusable delegation set
+
+        Args:
+            route53_client: boto3 Route53 client
+            ssm_client: boto3 SSM client used to store a newly created set's ID
+            environment: Environment the set belongs to
+            executor: Route53Executor whose rate limiter API calls go through
+        """
+        self.route53_client = route53_client
+        self.ssm_client = ssm_client
+        self.environment = environment
+        self.executor = executor
+        self.parameter_name = f"/storefront-{environment}/{PARAMETER_KEY}"
+        self.caller_reference = f"storefront-{environment}-delegation-set"
+
+        self._id = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+
+    def _call(self, fn, **kwargs):
+        """Make a Route53 call, rate-limited when an executor is attached"""
+        if self.executor:
+            return self.executor.call(fn, **kwargs)
+        return fn(**kwargs)
+
+    def _find_existing(self):
+        """Find the set created earlier with our caller reference (e.g. before SSM was written)"""
+        kwargs = {}
+        while True:
+            response = self._call(self.route53_client.list_reusable_delegation_sets, **kwargs)
+            for delegation_set in response.get("DelegationSets", []):
+                if delegation_set.get("CallerReference") == self.caller_reference:
+                    return normalize_id(delegation_set["Id"])
+            if not response.get("IsTruncated"):
+                return None
+            kwargs["Marker"] = response["NextMarker"]
+
+    def _create(self) -> str:
+        """Create the set (or adopt the one with our caller reference) and store its ID"""
+        try:
+            response = self._call(
+                self.route53_client.create_reusable_delegation_set,
+                CallerReference=self.caller_reference,
+            )
+            delegation_set_id = normalize_id(response["DelegationSet"]["Id"])
+            nameservers = ", ".join(response["DelegationSet"]["NameServers"])
+            logger.info(f"✅ Created reusable delegation set {delegation_set_id}: {nameservers}")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "DelegationSetAlreadyCreated":
+                raise
+            delegation_set_id = self._find_existing()
+            if not delegation_set_id:
+                raise
+
+        try:
+            self.ssm_client.put_parameter(
+                Name=self.parameter_name,
+                Value=delegation_set_id,
+                Type="String",
+                Description="Reusable Route53 delegation set shared by storefront hosted zones",
+                Overwrite=False,
+            )
+            logger.info(f"✅ Stored delegation set ID in {self.parameter_name}")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ParameterAlreadyExists":
+                raise
+            # Another task stored one first; use theirs so all zones share one set
+            stored = self.ssm_client.get_parameter(Name=self.parameter_name)
+            delegation_set_id = stored["Parameter"]["Value"]
+        get_config(self.environment).invalidate()
+        return delegation_set_id
+
+    def resolve(self, create: bool = True):
+        """
+        Return the shared delegation set ID
+
+        Failures are logged and answered with None (zones then get random
+        nameservers) and retried after RETRY_INTERVAL.
+
+        Args:
+            create: Create and store a set when SSM has none
+
+        Returns:
+            str: Delegation set ID, or None
+        """
+        with self._lock:
+            if self._id:
+                return self._id
+            if self._failed_at and time.monotonic() - self._failed_at < RETRY_INTERVAL:
+                return None
+
+            try:
+                self._id = get_config(self.environment).get(PARAMETER_KEY, None)
+                if not self._id and create:
+                    self._id = self._create()
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                logger.warning(f"⚠️ [ZONES] Reusable delegation set unavailable: {e}")
+                return None
+
+            if self._id:
+                logger.info(f"🔗 [ZONES] New hosted zones use delegation set {self._id}")
+            return self._id
+
+    def nameservers(self) -> list:
+        """Nameservers of the shared set (what the registrar should point at)"""
+        response = self._call(self.route53_client.get_reusable_delegation_set, Id=self.resolve())
+        return response["DelegationSet"]["NameServers"]
+
+    def zone_limit(self, delegation_set_id: str) -> tuple:
+        """
+        Zones on the set and the most it can hold
+
+        Returns:
+            tuple: (zone count, zone limit)
+        """
+        response = self._call(
+            self.route53_client.get_reusable_delegation_set_limit,
+            DelegationSetId=delegation_set_id,
+            Type="MAX_ZONES_BY_REUSABLE_DELEGATION_SET",
+        )
+        return response["Count"], response["Limit"]["Value"]
+
+    def report(self) -> dict:
+        """
+        Compare every public hosted zone's nameservers with the shared set
+
+        Returns:
+            dict: "on_set" and "off_set" lists of (zone name, zone ID), plus the
+            set's "zone_count" and "zone_limit" (new zones fall back to their own
+            nameservers once the limit is reached)
+        """
+        delegation_set_id = self.resolve(create=False)
+        if not delegation_set_id:
+            raise RuntimeError(f"No delegation set stored in {self.parameter_name}")
+
+        report = {"on_set": [], "off_set": []}
+        report["zone_count"], report["zone_limit"] = self.zone_limit(delegation_set_id)
+        if report["zone_count"] >= report["zone_limit"]:
+            logger.warning(
+                f"⚠️ [ZONES] Delegation set {delegation_set_id} is full "
+                f"({report['zone_count']}/{report['zone_limit']} zones)"
+            )
+
+        kwargs = {"DelegationSetId": delegation_set_id}
+        shared = set()
+        while True:
+            response = self._call(self.route53_client.list_hosted_zones, **kwargs)
+            for zone in response.get("HostedZones", []):
+                shared.add(normalize_id(zone["Id"]))
+            if not response.get("IsTruncated"):
+                break
+            kwargs["Marker"] = response["NextMarker"]
+
+        kwargs = {}
+        while True:
+            response = self._call(self.route53_client.list_hosted_zones, **kwargs)
+            for zone in response.get("HostedZones", []):
+                if zone.get("Config", {}).get("PrivateZone"):
+                    continue
+                zone_id = normalize_id(zone["Id"])
+                key = "on_set" if zone_id in shared else "off_set"
+                report[key].append((zone["Name"].rstrip("."), zone_id))
+            if not response.get("IsTruncated"):
+                break
+            kwargs["Marker"] = response["NextMarker"]
+        return report
+
+
+_delegation_set = None
+_delegation_set_lock = threading.Lock()
+
+
+def get_delegation_set(region_name: str = "us-east-1"):
+    """
+    Return the process-wide delegation set
+
+    Returns:
+        ReusableDelegationSet: Shared set, or None when ROUTE53_REUSABLE_DELEGATION_SET=false
+    """
+    global _delegation_set
+    if os.environ.get("ROUTE53_REUSABLE_DELEGATION_SET", "true").lower() == "false":
+        return None
+    with _delegation_set_lock:
+        if _delegation_set is None:
+            _delegation_set = ReusableDelegationSet(
+                get_route53_client(region_name),
+                boto3.client("ssm", region_name=region_name),
+                os.environ.get("ENVIRONMENT", "dev"),
+                executor=get_route53_executor(),
+            )
+        return _delegation_set
+
+
+def main():
+    """Set up the shared delegation set or report zones that are not on it"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["ensure", "report"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    delegation_set = get_delegation_set(os.environ.get("AWS_REGION", "us-east-1"))
+    if delegation_set is None:
+        raise SystemExit("❌ ROUTE53_REUSABLE_DELEGATION_SET is disabled")
+
+    if args.command == "ensure":
+        if not delegation_set.resolve():
+            raise SystemExit("❌ Could not resolve the reusable delegation set")
+        print(f"Delegation set {delegation_set.resolve()} (point registrars at these):")
+        for nameserver in delegation_set.nameservers():
+            print(f"  {nameserver}")
+        return
+
+    report = delegation_set.report()
+    print(
+        f"{len(report['on_set'])} zones on delegation set {delegation_set.resolve(create=False)} "
+        f"({report['zone_count']}/{report['zone_limit']} of its zone limit)"
+    )
+    print(f"{len(report['off_set'])} zones with their own nameservers:")
+    for name, zone_id in sorted(report["off_set"]):
+        print(f"  {name} ({zone_id})")
+
+
+if __name__ == "__main__":
+    main()
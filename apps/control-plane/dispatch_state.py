@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Dispatch State - Content-addressed record of the last dispatched domain set
+
+Responsibilities:
+- Hash the sorted active domain set so identical sets are recognised
+- Persist the last dispatched hash and set per environment in the database
+- Compute the added/removed delta that a workflow dispatch carries
+- Serialise plan → dispatch → record across control plane tasks
+"""
+
+import hashlib
+import json
+import logging
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Created on first use; one row per environment
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS workflow_dispatch_state (
+    environment TEXT PRIMARY KEY,
+    domain_set_hash TEXT NOT NULL,
+    domains JSONB NOT NULL,
+    dispatched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+# Advisory lock key (with hashtext(environment)) held from plan to record
+DISPATCH_LOCK_ID = 0x64697370  # "disp"
+
+# Keeps client_payload well under GitHub's size limit; larger deltas mean a full rebuild
+MAX_DELTA_DOMAINS = 200
+
+
+def domain_set_hash(domains: Iterable[str]) -> str:
+    """
+    Stable hash of a domain set (order and duplicates do not matter)
+
+    Returns:
+        str: sha256 hex digest of the sorted, newline-joined domains
+    """
+    canonical = "\n".join(sorted(set(domains)))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DispatchPlan:
+    """What a dispatch for a new domain set has to carry"""
+
+    def __init__(self, domains: Iterable[str], previous_hash: str, previous_domains: set):
+        self.domains = sorted(set(domains))
+        self.domain_set_hash = domain_set_hash(self.domains)
+        self.previous_hash = previous_hash
+        self.added = sorted(set(self.domains) - previous_domains)
+        self.removed = sorted(previous_domains - set(self.domains))
+
+    @property
+    def changed(self) -> bool:
+        return self.domain_set_hash != self.previous_hash
+
+    def client_payload(self, **extra) -> dict:
+        """
+        repository_dispatch client_payload with hash and delta
+
+        Without a previous dispatch, or when the delta is too large, the lists are
+        omitted and delta_truncated tells downstream to rebuild everything.
+        """
+        truncated = (
+            self.previous_hash is None or len(self.added) + len(self.removed) > MAX_DELTA_DOMAINS
+        )
+        payload = dict(extra)
+        payload.update(
+            {
+                "domain_count": len(self.domains),
+                "domain_set_hash": self.domain_set_hash,
+                "previous_hash": self.previous_hash,
+                "added": [] if truncated else self.added,
+                "removed": [] if truncated else self.removed,
+                "delta_truncated": truncated,
+            }
+        )
+        return payload
+
+
+class DispatchState:
+    """Last dispatched domain set per environment, stored in workflow_dispatch_state"""
+
+    def __init__(self, db_pool, environment: str):
+        """
+        Initialize dispatch state
+
+        Args:
+            db_pool: DatabasePool to borrow connections from
+            environment: Environment the dispatches are for
+        """
+        self.db_pool = db_pool
+        self.environment = environment
+        self._table_ready = False
+
+    def _ensure_table(self, cur):
+        if not self._table_ready:
+            cur.execute(CREATE_TABLE_SQL)
+            self._table_ready = True
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold the environment's dispatch lock for a plan → dispatch → record sequence
+
+        Every task runs a dispatching worker; without the lock two tasks could
+        plan against the same record and both dispatch. The lock is transaction
+        scoped: plan() and record() run in that transaction on the yielded cursor,
+        which commits when the block completes and rolls back if it raises.
+
+        Yields:
+            cursor: Cursor to pass to plan() and record()
+        """
+        with self.db_pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT pg_advisory_xact_lock(%s, hashtext(%s))",
+                (DISPATCH_LOCK_ID, self.environment),
+            )
+            yield cur
+            conn.commit()
+
+    def plan(self, cur, domains: Iterable[str]) -> Optional[DispatchPlan]:
+        """
+        Compare a domain set with the last dispatched one
+
+        Args:
+            cur: Cursor yielded by lock()
+            domains: Current active domains
+
+        Returns:
+            DispatchPlan: Hash and delta, or None if the set was already dispatched
+        """
+        self._ensure_table(cur)
+        cur.execute(
+            "SELECT domain_set_hash, domains FROM workflow_dispatch_state WHERE environment = %s",
+            (self.environment,),
+        )
+        row = cur.fetchone()
+
+        previous_hash, previous_domains = (row[0], set(row[1])) if row else (None, set())
+        plan = DispatchPlan(domains, previous_hash, previous_domains)
+        if not plan.changed:
+            logger.info(f"⏭️ Domain set unchanged ({plan.domain_set_hash[:12]}), skipping dispatch")
+            return None
+        return plan
+
+    def record(self, cur, plan: DispatchPlan):
+        """
+        Remember a dispatched domain set (committed when lock() is released)
+
+        Args:
+            cur: Cursor yielded by lock()
+            plan: Plan whose dispatch succeeded
+        """
+        cur.execute(
+            """
+            INSERT INTO workflow_dispatch_state (environment, domain_set_hash, domains)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (environment) DO UPDATE SET
+                domain_set_hash = EXCLUDED.domain_set_hash,
+                domains = EXCLUDED.domains,
+                dispatched_at = now()
+            """,
+            (self.environment, plan.domain_set_hash, json.dumps(plan.domains)),
+        )
@@ -3,57 +3,58 @@
 Domain management helper functions for the listener service
 """
 import logging
-import time
+import os
 
-import boto3
 import psycopg2
-
-
-def ensure_hosted_zone_and_store(conn, domain_name, region_name="us-east-1"):
+from metrics import register_stats
+from psycopg2.extras import execute_values
+from route53_changes import get_change_batcher
+from route53_executor import get_route53_executor
+from ttl_cache import MISSING, TTLCache
+from zone_index import get_zone_index, normalize_zone_id
+
+# purchased_domains lookups; misses expire sooner because a purchase may land any moment
+TENANT_LOOKUP_TTL = float(os.environ.get("TENANT_LOOKUP_TTL", "300"))
+TENANT_LOOKUP_NEGATIVE_TTL = float(os.environ.get("TENANT_LOOKUP_NEGATIVE_TTL", "30"))
+_tenant_lookups = TTLCache(
+    maxsize=int(os.environ.get("TENANT_LOOKUP_CACHE_SIZE", "10000")), ttl=TENANT_LOOKUP_TTL
+)
+register_stats("tenant_lookups", lambda: _tenant_lookups.stats)
+
+
+def ensure_hosted_zone_and_store(db_pool, domain_name, region_name="us-east-1"):
     """
     Ensures hosted zone exists for domain and stores info in database.
     Returns hosted_zone_id (int PK) and aws_hosted_zone_id (string).
 
     Args:
-        conn: Database connection object
+        db_pool: DatabasePool to borrow connections from
         domain_name (str): Domain name to ensure hosted zone for
         region_name (str): AWS region
 
     Returns:
         tuple: (hosted_zone_id, aws_hosted_zone_id) or (None, None) if failed
     """
-    route53_client = boto3.client("route53", region_name=region_name)
+    zone_index = get_zone_index(region_name, db_pool=db_pool)
 
     try:
-        # Check if hosted zone already exists in AWS
-        response = route53_client.list_hosted_zones_by_name(DNSName=domain_name)
-        hosted_zones = response.get("HostedZones", [])
-
-        # Check if zone exists for this exact domain
-        existing_zone = next(
-            (zone for zone in hosted_zones if zone["Name"] == f"{domain_name}."), None
-        )
+        # Check if hosted zone already exists (shared index; only misses call Route53)
+        existing_zone_id = zone_index.get_zone_id(domain_name)
 
-        if existing_zone:
-            aws_zone_id = existing_zone["Id"]
+        if existing_zone_id:
+            aws_zone_id = existing_zone_id
             logging.info(f"🔍 Hosted zone already exists for {domain_name}: {aws_zone_id}")
         else:
             # Create hosted zone if it doesn't exist
-            caller_reference = f"{domain_name}-{int(time.time())}"
-            response = route53_client.create_hosted_zone(
-                Name=domain_name,
-                CallerReference=caller_reference,
-                HostedZoneConfig={
-                    "Comment": f"Auto-created by listener for {domain_name}",
-                    "PrivateZone": False,
-                },
+            response = zone_index.create_zone(
+                domain_name, f"Auto-created by listener for {domain_name}"
             )
 
             aws_zone_id = response["HostedZone"]["Id"]
             logging.info(f"✅ Created hosted zone for {domain_name}: {aws_zone_id}")
 
         # Store/update hosted zone info in database
-        hosted_zone_id = store_hosted_zone_info(conn, domain_name, aws_zone_id)
+        hosted_zone_id = store_hosted_zone_info(db_pool, domain_name, aws_zone_id)
 
         if hosted_zone_id:
             return hosted_zone_id, aws_zone_id
@@ -65,12 +66,12 @@ def ensure_hosted_zone_and_store(conn, domain_name, region_name="us-east-1"):
         return None, None
 
 
-def store_hosted_zone_info(conn, domain_name, aws_zone_id):
+def store_hosted_zone_info(db_pool, domain_name, aws_zone_id):
     """
     Store hosted zone information in database and return the integer PK.
 
     Args:
-        conn: Database connection object
+        db_pool: DatabasePool to borrow connections from
         domain_name (str): Domain name
         aws_zone_id (str): AWS hosted zone ID
 
@@ -78,24 +79,22 @@ def store_hosted_zone_info(conn, domain_name, aws_zone_id):
         int: hosted_zone_id (integer PK) or None if failed
     """
     try:
-        cur = conn.cursor()
-
-        # Insert or update hosted zone info
-        cur.execute(
-            """
-            INSERT INTO hosted_zone_ids (domain_name, aws_hosted_zone_id, description)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (domain_name) DO UPDATE
-            SET aws_hosted_zone_id = EXCLUDED.aws_hosted_zone_id,
-                description = EXCLUDED.description
-            RETURNING hosted_zone_id;
-            """,
-            (domain_name, aws_zone_id, "Created by listener automation"),
-        )
+        with db_pool.connection() as conn, conn.cursor() as cur:
+            # Insert or update hosted zone info
+            cur.execute(
+                """
+                INSERT INTO hosted_zone_ids (domain_name, aws_hosted_zone_id, description)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (domain_name) DO UPDATE
+                SET aws_hosted_zone_id = EXCLUDED.aws_hosted_zone_id,
+                    description = EXCLUDED.description
+                RETURNING hosted_zone_id;
+                """,
+                (domain_name, aws_zone_id, "Created by listener automation"),
+            )
 
-        hosted_zone_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
+            hosted_zone_id = cur.fetchone()[0]
+            conn.commit()
 
         logging.info(
             f"✅ Stored hosted zone info for {domain_name}: {aws_zone_id} (ID: {hosted_zone_id})"
@@ -104,16 +103,127 @@ def store_hosted_zone_info(conn, domain_name, aws_zone_id):
 
     except Exception as e:
         logging.error(f"❌ Error storing hosted zone info for {domain_name}: {e}")
-        conn.rollback()
         return None
 
 
-def update_domain_with_tenant(conn, domain_name, hosted_zone_id, zone_id):
+def ensure_hosted_zones_and_store(
+    db_pool, domain_names, region_name="us-east-1", created_by="listener", on_created=None
+):
+    """
+    Batch version of ensure_hosted_zone_and_store.
+
+    Missing zones are created concurrently on the shared, rate-limited Route53
+    executor; all hosted_zone_ids rows are then written with one statement.
+    Used by the SQS DNS worker for the domains activated in a batch.
+
+    Args:
+        db_pool: DatabasePool to borrow connections from
+        domain_names (list): Domain names to ensure hosted zones for
+        region_name (str): AWS region
+        created_by (str): Who the comment on created zones names
+        on_created (callable): Called with (domain_name, create_hosted_zone response)
+            for every zone created, e.g. to track its change until INSYNC
+
+    Returns:
+        dict: domain name -> (hosted_zone_id, aws_hosted_zone_id) for every requested
+        domain. (None, None) if the lookup or creation failed, (None, aws_hosted_zone_id)
+        if the zone exists but storing it failed.
+    """
+    zone_index = get_zone_index(region_name, db_pool=db_pool)
+    domain_names = list(dict.fromkeys(domain_names))
+    zones = {}
+    missing = []
+    failed = 0
+
+    for domain_name in domain_names:
+        try:
+            existing_zone_id = zone_index.get_zone_id(domain_name)
+        except Exception as e:
+            logging.error(f"❌ Failed to look up hosted zone for {domain_name}: {e}")
+            failed += 1
+            continue
+        if existing_zone_id:
+            zones[domain_name] = existing_zone_id
+        else:
+            missing.append(domain_name)
+
+    def create(domain_name):
+        return zone_index.create_zone(
+            domain_name, f"Auto-created by {created_by} for {domain_name}"
+        )
+
+    existing = len(zones)
+    for domain_name, response, error in get_route53_executor().map(create, missing):
+        if error:
+            logging.error(f"❌ Failed to create hosted zone for {domain_name}: {error}")
+            failed += 1
+            continue
+        zones[domain_name] = normalize_zone_id(response["HostedZone"]["Id"])
+        logging.info(f"✅ Created hosted zone for {domain_name}: {zones[domain_name]}")
+        if on_created:
+            on_created(domain_name, response)
+
+    logging.info(
+        f"🔍 Hosted zones ensured: {existing} existing, {len(zones) - existing} created, "
+        f"{failed} failed"
+    )
+
+    results = {domain_name: (None, None) for domain_name in domain_names}
+    try:
+        with db_pool.connection() as conn, conn.cursor() as cur:
+            results.update(bulk_store_hosted_zone_info(cur, zones.items()))
+            conn.commit()
+    except Exception as e:
+        logging.error(f"❌ Error storing hosted zone info for {len(zones)} domains: {e}")
+        # The zones exist in Route53 either way; hand them back so they are not recreated
+        results.update((domain_name, (None, zone_id)) for domain_name, zone_id in zones.items())
+
+    return results
+
+
+def bulk_store_hosted_zone_info(cur, zones):
+    """
+    Upserts many hosted_zone_ids rows with one multi-row INSERT ... RETURNING.
+
+    Args:
+        cur: Cursor inside the caller's transaction
+        zones (iterable): (domain_name, aws_zone_id) tuples
+
+    Returns:
+        dict: domain name -> (hosted_zone_id, aws_hosted_zone_id)
+    """
+    # ON CONFLICT cannot touch the same row twice in one statement; last one wins
+    zones = dict(zones)
+    if not zones:
+        return {}
+
+    rows = execute_values(
+        cur,
+        """
+        INSERT INTO hosted_zone_ids (domain_name, aws_hosted_zone_id, description)
+        VALUES %s
+        ON CONFLICT (domain_name) DO UPDATE
+        SET aws_hosted_zone_id = EXCLUDED.aws_hosted_zone_id,
+            description = EXCLUDED.description
+        RETURNING domain_name, hosted_zone_id, aws_hosted_zone_id
+        """,
+        [
+            (domain_name, aws_zone_id, "Created by listener automation")
+            for domain_name, aws_zone_id in zones.items()
+        ],
+        page_size=500,
+        fetch=True,
+    )
+    logging.info(f"✅ Stored hosted zone info for {len(rows)} domains")
+    return {domain_name: (pk, aws_zone_id) for domain_name, pk, aws_zone_id in rows}
+
+
+def update_domain_with_tenant(db_pool, domain_name, hosted_zone_id, zone_id):
     """
     Updates the domains table with tenant information from purchased_domains.
 
     Args:
-        conn: Database connection object
+        db_pool: DatabasePool to borrow connections from
         domain_name (str): The domain name to update
         hosted_zone_id (int): The hosted zone ID (integer PK)
         zone_id (str): The AWS hosted zone ID (for logging)
@@ -122,25 +232,19 @@ def update_domain_with_tenant(conn, domain_name, hosted_zone_id, zone_id):
         int or None: tenant_id if found, None otherwise
     """
     try:
-        with conn.cursor() as cursor:
-            # Get tenant_id from purchased_domains table
-            cursor.execute(
-                "SELECT tenant_id FROM purchased_domains WHERE full_url = %s",
-                (domain_name,),
+        # Get tenant_id from purchased_domains table (cached)
+        tenant_id = get_tenants_for_domains(db_pool, [domain_name])[domain_name]
+
+        if tenant_id is not None:
+            logging.info(
+                f"POSTGRES: Found tenant_id {tenant_id} for domain {domain_name} in purchased_domains table."
+            )
+        else:
+            logging.warning(
+                f"POSTGRES: No tenant_id found for domain {domain_name} in purchased_domains table."
             )
-            tenant_result = cursor.fetchone()
-
-            if tenant_result:
-                tenant_id = tenant_result[0]
-                logging.info(
-                    f"POSTGRES: Found tenant_id {tenant_id} for domain {domain_name} in purchased_domains table."
-                )
-            else:
-                tenant_id = None
-                logging.warning(
-                    f"POSTGRES: No tenant_id found for domain {domain_name} in purchased_domains table."
-                )
 
+        with db_pool.connection() as conn, conn.cursor() as cursor:
             # Update or insert into domains table
             cursor.execute(
                 """
@@ -158,93 +262,199 @@ def update_domain_with_tenant(conn, domain_name, hosted_zone_id, zone_id):
                 f"POSTGRES: Updated domains table for domain {domain_name} with hosted zone ID {zone_id} and tenant_id {tenant_id}."
             )
 
-        conn.commit()
+            conn.commit()
         return tenant_id
 
     except Exception as e:
         logging.error(f"POSTGRES: Error updating domain {domain_name} with tenant info: {e}")
-        conn.rollback()
         raise
 
 
-def get_tenant_for_domain(conn, domain_name):
+def bulk_activate_domains(cur, activations):
+    """
+    Upserts many active domains with one multi-row statement.
+
+    Args:
+        cur: Cursor inside the caller's transaction
+        activations (list): (full_url, tenant_id) tuples; full_url must be unique
+
+    Returns:
+        int: Number of domains upserted
+    """
+    if not activations:
+        return 0
+
+    # A domain that just got activated may have been purchased since its lookup missed
+    invalidate_tenant_lookups([full_url for full_url, _ in activations], negative_only=True)
+    execute_values(
+        cur,
+        """
+        INSERT INTO domains (full_url, tenant_id, active_status, activation_date)
+        VALUES %s
+        ON CONFLICT (full_url) DO UPDATE SET
+            tenant_id = EXCLUDED.tenant_id,
+            active_status = 'Y',
+            activation_date = CURRENT_DATE
+        """,
+        activations,
+        template="(%s, %s, 'Y', CURRENT_DATE)",
+        page_size=500,
+    )
+    return len(activations)
+
+
+def bulk_deactivate_domains(cur, domain_names):
+    """
+    Marks many domains inactive with one UPDATE ... FROM (VALUES ...) statement.
+
+    Args:
+        cur: Cursor inside the caller's transaction
+        domain_names (list): Domain names to deactivate
+
+    Returns:
+        int: Number of domains submitted for deactivation
+    """
+    if not domain_names:
+        return 0
+
+    # Released domains can be bought by another tenant
+    invalidate_tenant_lookups(domain_names)
+    execute_values(
+        cur,
+        """
+        UPDATE domains
+        SET active_status = 'N', inactivation_date = CURRENT_DATE
+        FROM (VALUES %s) AS v(full_url)
+        WHERE domains.full_url = v.full_url
+        """,
+        [(name,) for name in domain_names],
+        page_size=500,
+    )
+    return len(domain_names)
+
+
+def get_tenant_for_domain(db_pool, domain_name):
     """
     Retrieves the tenant_id for a given domain from purchased_domains table.
 
     Args:
-        conn: Database connection object
+        db_pool: DatabasePool to borrow connections from
         domain_name (str): The domain name to lookup
 
     Returns:
         int or None: The tenant_id if found, None otherwise
     """
     try:
-        with conn.cursor() as cursor:
-            cursor.execute(
-                "SELECT tenant_id FROM purchased_domains WHERE full_url = %s",
-                (domain_name,),
-            )
-            result = cursor.fetchone()
+        tenant_id = get_tenants_for_domains(db_pool, [domain_name])[domain_name]
 
-            if result:
-                tenant_id = result[0]
-                logging.info(f"POSTGRES: Found tenant_id {tenant_id} for domain {domain_name}.")
-                return tenant_id
-            else:
-                logging.warning(f"POSTGRES: No tenant_id found for domain {domain_name}.")
-                return None
+        if tenant_id is not None:
+            logging.info(f"POSTGRES: Found tenant_id {tenant_id} for domain {domain_name}.")
+        else:
+            logging.warning(f"POSTGRES: No tenant_id found for domain {domain_name}.")
+        return tenant_id
 
     except Exception as e:
         logging.error(f"POSTGRES: Error retrieving tenant for domain {domain_name}: {e}")
         return None
 
 
-def delete_hosted_zone_and_records(conn, domain_name, region_name="us-east-1"):
+def get_tenants_for_domains(db_pool, domain_names):
     """
-    Deletes all DNS records (A, MX, TXT, CNAME) for the domain and then deletes the hosted zone.
-    Also updates the database to mark domain inactive.
+    Retrieves the tenant_id for many domains from purchased_domains table.
+
+    Cached domains (including cached misses) cost nothing; the rest are
+    resolved with a single query.
+
+    Args:
+        db_pool: DatabasePool to borrow connections from
+        domain_names (list): Domain names to lookup
+
+    Returns:
+        dict: domain name -> tenant_id, or None if the domain was not purchased
     """
-    import boto3
+    tenants = {}
+    uncached = []
+    for domain_name in dict.fromkeys(domain_names):
+        tenant_id = _tenant_lookups.get(domain_name)
+        if tenant_id is MISSING:
+            uncached.append(domain_name)
+        else:
+            tenants[domain_name] = tenant_id
 
-    route53_client = boto3.client("route53", region_name=region_name)
+    if not uncached:
+        return tenants
 
-    try:
-        # Find the hosted zone
-        response = route53_client.list_hosted_zones_by_name(DNSName=domain_name)
-        hosted_zones = response.get("HostedZones", [])
-        zone = next((z for z in hosted_zones if z["Name"] == f"{domain_name}."), None)
+    with db_pool.connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT full_url, tenant_id FROM purchased_domains WHERE full_url = ANY(%s)",
+            (uncached,),
+        )
+        found = dict(cursor.fetchall())
 
-        if not zone:
-            logging.warning(f"⚠️ No hosted zone found for {domain_name}, nothing to delete.")
-            return False
+    for domain_name in uncached:
+        tenant_id = found.get(domain_name)
+        ttl = TENANT_LOOKUP_TTL if tenant_id is not None else TENANT_LOOKUP_NEGATIVE_TTL
+        _tenant_lookups.set(domain_name, tenant_id, ttl=ttl)
+        tenants[domain_name] = tenant_id
 
-        zone_id = zone["Id"].split("/")[-1]  # Clean zone ID
+    logging.info(
+        f"POSTGRES: Resolved {len(found)}/{len(uncached)} tenants in one query "
+        f"({len(tenants) - len(uncached)} cached)"
+    )
+    return tenants
 
-        # Get all record sets
-        record_sets = route53_client.list_resource_record_sets(HostedZoneId=zone_id)
 
-        changes = []
-        for record in record_sets["ResourceRecordSets"]:
-            record_type = record["Type"]
-            record_name = record["Name"]
+def invalidate_tenant_lookups(domain_names, negative_only=False):
+    """
+    Drops cached tenant lookups.
 
-            if record_type in ["A", "MX", "TXT", "CNAME"]:
-                logging.info(f"🗑️ Scheduling deletion for {record_type} record {record_name}")
-                changes.append({"Action": "DELETE", "ResourceRecordSet": record})
+    Args:
+        domain_names (list): Domain names whose lookups are stale
+        negative_only (bool): Only drop cached misses, keep known tenants
+    """
+    for domain_name in domain_names:
+        if not negative_only or _tenant_lookups.get(domain_name, default=None) is None:
+            _tenant_lookups.delete(domain_name)
 
-        # Batch delete records (skip SOA/NS, they are required for the zone)
-        if changes:
-            route53_client.change_resource_record_sets(
-                HostedZoneId=zone_id, ChangeBatch={"Changes": changes}
-            )
-            logging.info(f"✅ Deleted {len(changes)} records from zone {zone_id} ({domain_name})")
 
-        # Delete the hosted zone itself
-        route53_client.delete_hosted_zone(Id=zone_id)
+def is_deletable_record(record_set):
+    """Whether zone teardown deletes this record set (A, MX, TXT, CNAME; never SOA/NS)"""
+    if record_set["Type"] in ["A", "MX", "TXT", "CNAME"]:
+        logging.info(f"🗑️ Scheduling deletion for {record_set['Type']} record {record_set['Name']}")
+        return True
+    return False
+
+
+def delete_hosted_zone_and_records(db_pool, domain_name, region_name="us-east-1"):
+    """
+    Deletes all DNS records (A, MX, TXT, CNAME) for the domain and then deletes the hosted zone.
+    Also updates the database to mark domain inactive.
+
+    Args:
+        db_pool: DatabasePool to borrow connections from
+    """
+    zone_index = get_zone_index(region_name, db_pool=db_pool)
+
+    try:
+        # Find the hosted zone (clean zone ID from the shared index)
+        zone_id = zone_index.get_zone_id(domain_name)
+
+        if not zone_id:
+            logging.warning(f"⚠️ No hosted zone found for {domain_name}, nothing to delete.")
+            return False
+
+        # Delete records page by page in chunked batches (skip SOA/NS, they are required)
+        deleted = get_change_batcher(region_name).delete_records(zone_id, is_deletable_record)
+        if deleted:
+            logging.info(f"✅ Deleted {deleted} records from zone {zone_id} ({domain_name})")
+
+        # Delete the hosted zone itself (shared rate limit and retries)
+        get_route53_executor().call(zone_index.route53_client.delete_hosted_zone, Id=zone_id)
+        zone_index.remove(domain_name)
         logging.info(f"✅ Deleted hosted zone {zone_id} for {domain_name}")
 
         # Update DB to set inactive
-        with conn.cursor() as cur:
+        with db_pool.connection() as conn, conn.cursor() as cur:
             cur.execute(
                 "UPDATE domains SET active_status = 'N', inactivation_date = CURRENT_DATE WHERE full_url = %s",
                 (domain_name,),
@@ -255,5 +465,57 @@ def delete_hosted_zone_and_records(conn, domain_name, region_name="us-east-1"):
 
     except Exception as e:
         logging.error(f"❌ Error deleting hosted zone for {domain_name}: {e}")
-        conn.rollback()
         return False
+
+
+def delete_hosted_zones_and_records(db_pool, domain_names, region_name="us-east-1"):
+    """
+    Batch version of delete_hosted_zone_and_records.
+
+    Zones are torn down concurrently on the shared, rate-limited Route53
+    executor; all deleted domains are then marked inactive with one statement.
+
+    Args:
+        db_pool: DatabasePool to borrow connections from
+        domain_names (list): Domain names whose hosted zones should be deleted
+        region_name (str): AWS region
+
+    Returns:
+        list: Domain names whose hosted zone was deleted
+    """
+    zone_index = get_zone_index(region_name, db_pool=db_pool)
+    executor = get_route53_executor()
+    changes = get_change_batcher(region_name)
+
+    def delete(domain_name):
+        zone_id = zone_index.get_zone_id(domain_name)
+        if not zone_id:
+            logging.warning(f"⚠️ No hosted zone found for {domain_name}, nothing to delete.")
+            return False
+
+        # Delete records page by page in chunked batches (skip SOA/NS, they are required)
+        deleted = changes.delete_records(zone_id, is_deletable_record)
+        if deleted:
+            logging.info(f"✅ Deleted {deleted} records from zone {zone_id} ({domain_name})")
+
+        executor.call(zone_index.route53_client.delete_hosted_zone, Id=zone_id)
+        zone_index.remove(domain_name)
+        logging.info(f"✅ Deleted hosted zone {zone_id} for {domain_name}")
+        return True
+
+    deleted_domains = []
+    for domain_name, deleted, error in executor.map(delete, list(dict.fromkeys(domain_names))):
+        if error:
+            logging.error(f"❌ Error deleting hosted zone for {domain_name}: {error}")
+        elif deleted:
+            deleted_domains.append(domain_name)
+
+    if deleted_domains:
+        try:
+            with db_pool.connection() as conn, conn.cursor() as cur:
+                bulk_deactivate_domains(cur, deleted_domains)
+                conn.commit()
+        except Exception as e:
+            logging.error(f"❌ Error deactivating {len(deleted_domains)} domains: {e}")
+
+    return deleted_domains
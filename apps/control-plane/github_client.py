@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+GitHub Client - Pooled, rate-limit-aware access to the GitHub REST API
+
+Responsibilities:
+- Reuse keep-alive connections through one requests.Session per token
+- Bound every request with connect/read timeouts
+- Retry transient failures with exponential backoff
+- Honor Retry-After, X-RateLimit-* and secondary rate limits before retrying
+- Space out mutating requests so bursts do not trip abuse detection
+"""
+
+import logging
+import os
+import threading
+import time
+
+import requests
+from metrics import observe_call, register_stats
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = "https://api.github.com"
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 15.0
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0  # never sleep longer than this for one retry
+DEFAULT_MIN_WRITE_INTERVAL = 1.0  # GitHub asks for >= 1s between mutating requests
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+
+
+class GitHubRateLimited(Exception):
+    """GitHub kept rate limiting the request beyond the retry budget"""
+
+
+class GitHubClient:
+    """Session-backed GitHub API client with retries and rate-limit handling"""
+
+    def __init__(
+        self,
+        token: str,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_backoff: float = DEFAULT_BASE_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        min_write_interval: float = DEFAULT_MIN_WRITE_INTERVAL,
+    ):
+        """
+        Initialize GitHub client
+
+        Args:
+            token: GitHub token used for every request
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait for a response
+            max_attempts: Attempts per request including the first
+            base_backoff: Delay before the first retry, doubled on each further retry
+            max_backoff: Cap for any single wait, including rate-limit waits
+            min_write_interval: Minimum seconds between POST/PUT/PATCH/DELETE requests
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_write_interval = min_write_interval
+
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"token {token}",
+                "Accept": "application/vnd.github.v3+json",
+            }
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+
+        self._write_lock = threading.Lock()
+        self._last_write = 0.0
+        self._blocked_until = 0.0  # monotonic time the primary rate limit resets
+
+        # Stats
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "rate_limit_remaining": -1,
+        }
+
+    def _wait_time(self, response: requests.Response, attempt: int) -> float:
+        """
+        Seconds to wait before retrying a response, or None if it is not retryable
+
+        Retry-After wins; an exhausted primary limit waits for X-RateLimit-Reset;
+        a secondary limit without either header backs off for at least a minute.
+        """
+        status = response.status_code
+        headers = response.headers
+        backoff = self.base_backoff * 2 ** (attempt - 1)
+
+        if "Retry-After" in headers and (status in (403, 429) or status in RETRYABLE_STATUS):
+            return float(headers["Retry-After"])
+
+        if status in (403, 429):
+            if headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in headers:
+                return max(0.0, float(headers["X-RateLimit-Reset"]) - time.time()) + 1
+            if status == 429 or "secondary rate limit" in response.text.lower():
+                return max(60.0, backoff)
+            return None
+
+        if status in RETRYABLE_STATUS:
+            return backoff
+        return None
+
+    def _record_rate_limit(self, response: requests.Response):
+        """Remember the remaining quota and pause all requests once it runs out"""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        self.stats["rate_limit_remaining"] = int(remaining)
+        if remaining == "0" and "X-RateLimit-Reset" in response.headers:
+            reset_in = float(response.headers["X-RateLimit-Reset"]) - time.time()
+            self._blocked_until = time.monotonic() + max(0.0, reset_in)
+
+    def _pace_write(self):
+        """Keep mutating requests at least min_write_interval apart"""
+        with self._write_lock:
+            wait = self._last_write + self.min_write_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_write = time.monotonic()
+
+    def request(self, method: str, path: str, operation: str = None, **kwargs):
+        """
+        Send a request with timeouts, retries and rate-limit handling
+
+        Args:
+            method: HTTP method
+            path: API path, e.g. "/repos/owner/repo/dispatches"
+            operation: Metric label (defaults to the method)
+            **kwargs: Passed to requests.Session.request
+
+        Returns:
+            requests.Response: Successful response
+
+        Raises:
+            GitHubRateLimited: When rate limits outlast the retry budget
+            requests.RequestException: On non-retryable errors or exhausted retries
+        """
+        operation = operation or method.lower()
+        url = f"{GITHUB_API_URL}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(1, self.max_attempts + 1):
+            blocked = self._blocked_until - time.monotonic()
+            if blocked > 0:
+                if blocked > self.max_backoff:
+                    raise GitHubRateLimited(f"GitHub rate limit resets in {blocked:.0f}s")
+                time.sleep(blocked)
+            if method.upper() != "GET":
+                self._pace_write()
+
+            self.stats["requests"] += 1
+            try:
+                with observe_call("github", operation):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_attempts:
+                    raise
+                wait = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+                logger.warning(f"⚠️ [GH] {operation} failed ({e}), retrying in {wait:.1f}s")
+            else:
+                self._record_rate_limit(response)
+                if response.ok:
+                    return response
+
+                wait = self._wait_time(response, attempt)
+                if wait is None:
+                    response.raise_for_status()
+                if response.status_code in (403, 429):
+                    self.stats["rate_limited"] += 1
+                    if wait > self.max_backoff or attempt == self.max_attempts:
+                        raise GitHubRateLimited(
+                            f"GitHub rate limited {operation} (retry after {wait:.0f}s)"
+                        )
+                elif attempt == self.max_attempts:
+                    response.raise_for_status()
+                logger.warning(
+                    f"⚠️ [GH] {operation} returned {response.status_code}, "
+                    f"retrying in {wait:.1f}s"
+                )
+
+            self.stats["retries"] += 1
+            time.sleep(min(wait, self.max_backoff))
+
+    def dispatch(self, repo: str, event_type: str, client_payload: dict):
+        """
+        Send a repository_dispatch event
+
+        Args:
+            repo: "owner/name"
+            event_type: Dispatch event type
+            client_payload: Payload passed to the workflow
+        """
+        self.request(
+            "POST",
+            f"/repos/{repo}/dispatches",
+            operation="dispatch",
+            json={"event_type": event_type, "client_payload": client_payload},
+        )
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_github_client(token: str = None) -> GitHubClient:
+    """Return the process-wide client for a token (GH_TOKEN by default)"""
+    token = token or os.environ["GH_TOKEN"]
+    with _clients_lock:
+        if token not in _clients:
+            client = GitHubClient(
+                token,
+                read_timeout=float(os.environ.get("GITHUB_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+                max_attempts=int(os.environ.get("GITHUB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+            )
+            _clients[token] = client
+            register_stats("github_client", lambda: client.stats)
+        return _clients[token]
@@ -8,62 +8,69 @@ Responsibilities:
 - Commit to domain-updates branch
 """
 
-import base64
 import json
 import logging
 import os
 import time
-from threading import Thread
+from threading import Lock
+from typing import Optional
 
-import boto3
-import psycopg2
-import requests
-from psycopg2.extras import RealDictCursor
+from active_domains import get_active_domains
+from coalescer import AdaptiveCoalescer
+from dispatch_state import DispatchState
+from github_client import get_github_client
+from metrics import track_pending
+from queue_worker import QueueWorker
+from route53_changes import get_change_batcher
 
 logger = logging.getLogger(__name__)
 
 
-class GitHubWorker(Thread):
+class GitHubWorker(QueueWorker):
     """Worker thread to handle GitHub workflow triggers"""
 
-    def __init__(self, db_connection):
+    log_prefix = "[GH]"
+    queue_parameter = "sqs/github-workflow-queue-url"
+    visibility_timeout = 30  # extended by the heartbeat while messages are handled
+    # Messages only queue a workflow dispatch; no DB row or zone changes here
+    track_latency = False
+    # Pending triggers are batched across receives, so one receiver drains this queue
+    scalable = False
+
+    def __init__(self, db_pool):
         """
         Initialize GitHub worker
 
         Args:
-            db_connection: Shared database connection
+            db_pool: Shared DatabasePool (one connection is checked out per query)
         """
-        super().__init__(daemon=True, name="GitHubWorker")
+        super().__init__(name="GitHubWorker")
 
-        self.region_name = os.environ.get("AWS_REGION", "us-east-1")
-        self.environment = os.environ.get("ENVIRONMENT", "dev")
-        self.db_connection = db_connection
+        self.db_pool = db_pool
 
         # GitHub configuration
         self.github_token = os.environ["GH_TOKEN"]
         self.repo = os.environ.get("REPO", "AITeeToolkit/aws-fargate-cdk")
-
-        # Get queue URL from SSM
-        ssm_client = boto3.client("ssm", region_name=self.region_name)
-        self.queue_url = ssm_client.get_parameter(
-            Name=f"/storefront-{self.environment}/sqs/github-workflow-queue-url"
-        )["Parameter"]["Value"]
-
-        self.sqs_client = boto3.client("sqs", region_name=self.region_name)
-
-        # Batching configuration
-        self.batch_timeout = 30  # Wait 30 seconds to batch messages
+        self.github = get_github_client(self.github_token)
+        # Last dispatched domain set, so unchanged sets are not dispatched again
+        self.dispatch_state = DispatchState(db_pool, self.environment)
+        # Active domains maintained from the domains change feed (no per-trigger scans)
+        self.active_domains = get_active_domains(db_pool)
+
+        # Batching configuration: debounce triggers, widening the window under bursts
+        self.coalescer = AdaptiveCoalescer.from_env(self.name)
         self.pending_triggers = set()
-        self.last_trigger_time = time.time()
+        self.pending_lock = Lock()  # Messages may be processed from several threads
 
         # Stats
         self.stats = {
             "messages_processed": 0,
             "workflows_triggered": 0,
+            "dispatches_skipped": 0,
             "errors": 0,
         }
+        track_pending(self.name, "pending_triggers", lambda: len(self.pending_triggers))
 
-        self.running = True
         logger.info("✅ GitHub worker initialized")
 
     def process_message(self, message: dict) -> bool:
@@ -88,7 +95,9 @@ class GitHubWorker(Thread):
             logger.info(f"📨 [GH] Queuing workflow trigger for: {full_url}")
 
             # Add to pending triggers (will be batched)
-            self.pending_triggers.add(full_url)
+            with self.pending_lock:
+                self.pending_triggers.add(full_url)
+            self.coalescer.add()
 
             return True
 
@@ -97,108 +106,86 @@ class GitHubWorker(Thread):
             self.stats["errors"] += 1
             return False
 
-    def should_trigger_workflow(self) -> bool:
-        """Check if we should trigger workflow now"""
-        if not self.pending_triggers:
-            return False
+    def should_trigger_workflow(self) -> Optional[str]:
+        """
+        Check if we should trigger workflow now
 
-        time_since_last = time.time() - self.last_trigger_time
-        return time_since_last >= self.batch_timeout
+        Returns:
+            str: Flush trigger ("quiet", "max_wait" or "size"), or None to keep batching
+        """
+        return self.coalescer.flush_reason(len(self.pending_triggers))
+
+    def receive_wait_seconds(self) -> int:
+        """Shorten the long poll so the next trigger is not held back by it"""
+        return self.coalescer.poll_wait(super().receive_wait_seconds())
+
+    def trigger_workflow(self, reason: str = "quiet") -> bool:
+        """
+        Trigger GitHub workflow via repository dispatch
+
+        Args:
+            reason: Flush trigger reported to the coalescer
+        """
+        # Take the pending set so messages processed meanwhile queue up for the next trigger
+        with self.pending_lock:
+            triggered, self.pending_triggers = self.pending_triggers, set()
 
-    def trigger_workflow(self) -> bool:
-        """Trigger GitHub workflow via repository dispatch"""
         try:
-            # Fetch ALL active domains from database (not just pending)
-            with self.db_connection.cursor() as cur:
-                cur.execute(
-                    "SELECT full_url FROM domains WHERE active_status = 'Y' ORDER BY full_url"
-                )
-                rows = cur.fetchall()
-                all_active_domains = [row["full_url"] for row in rows]
+            # ALL active domains (not just pending), including writes committed just now
+            self.active_domains.wait_for_latest()
+            _, domains = self.active_domains.snapshot()
+            all_active_domains = sorted(domains)
 
             if not all_active_domains:
                 logger.info("ℹ️ [GH] No active domains, skipping workflow trigger")
+                self.coalescer.flushed(reason, len(triggered))
                 return True
 
-            logger.info(f"🔄 [GH] Triggering workflow for {len(all_active_domains)} active domains")
-
-            headers = {
-                "Authorization": f"token {self.github_token}",
-                "Accept": "application/vnd.github.v3+json",
-            }
-
-            # Trigger workflow via repository dispatch
-            url = f"https://api.github.com/repos/{self.repo}/dispatches"
-            payload = {
-                "event_type": "domain-update",
-                "client_payload": {
-                    "environment": self.environment,
-                    "domain_count": len(all_active_domains),
-                    "triggered_at": time.time(),
-                    "skip_tests": True,
-                },
-            }
+            # Let Route53 changes made in this process go INSYNC before the workflow reads DNS
+            # (before taking the lock, so other tasks are not held up by the wait)
+            if not get_change_batcher(self.region_name).wait_for_insync():
+                logger.warning("⚠️ [GH] Triggering workflow before all Route53 changes are INSYNC")
+
+            # Other tasks wait here and then see this dispatch as already recorded
+            with self.dispatch_state.lock() as cur:
+                plan = self.dispatch_state.plan(cur, all_active_domains)
+                if plan is None:
+                    self.stats["dispatches_skipped"] += 1
+                    self.coalescer.flushed(reason, len(triggered))
+                    return True
+
+                logger.info(
+                    f"🔄 [GH] Triggering workflow for {len(all_active_domains)} active domains "
+                    f"(+{len(plan.added)} -{len(plan.removed)})"
+                )
 
-            r = requests.post(url, headers=headers, json=payload)
-            r.raise_for_status()
+                # Trigger workflow via repository dispatch (pooled session, timeouts, retries)
+                self.github.dispatch(
+                    self.repo,
+                    "domain-update",
+                    plan.client_payload(
+                        environment=self.environment,
+                        triggered_at=time.time(),
+                        skip_tests=True,
+                    ),
+                )
+                self.dispatch_state.record(cur, plan)
 
             self.stats["workflows_triggered"] += 1
-            self.last_trigger_time = time.time()
-            self.pending_triggers.clear()
+            self.coalescer.flushed(reason, len(triggered))
 
             logger.info(f"✅ [GH] Triggered workflow for {len(all_active_domains)} domains")
             return True
 
         except Exception as e:
             logger.error(f"❌ [GH] Failed to trigger workflow: {e}")
+            with self.pending_lock:
+                self.pending_triggers |= triggered
+            self.coalescer.failed()
             return False
 
-    def run(self):
-        """Main worker loop"""
-        logger.info("🔄 [GH] Starting GitHub worker thread...")
-
-        while self.running:
-            try:
-                response = self.sqs_client.receive_message(
-                    QueueUrl=self.queue_url,
-                    MaxNumberOfMessages=10,
-                    WaitTimeSeconds=20,
-                    VisibilityTimeout=180,
-                )
-
-                messages = response.get("Messages", [])
-
-                if messages:
-                    logger.info(f"📬 [GH] Received {len(messages)} messages")
-
-                    for message in messages:
-                        if self.process_message(message):
-                            # Delete message from queue
-                            self.sqs_client.delete_message(
-                                QueueUrl=self.queue_url,
-                                ReceiptHandle=message["ReceiptHandle"],
-                            )
-                            self.stats["messages_processed"] += 1
-                        else:
-                            logger.warning(f"⚠️ [GH] Message processing failed, will retry")
-
-                # Check if we should trigger workflow (batching)
-                if self.should_trigger_workflow():
-                    self.trigger_workflow()
-
-                # Log stats periodically
-                if (
-                    self.stats["messages_processed"] % 10 == 0
-                    and self.stats["messages_processed"] > 0
-                ):
-                    logger.info(f"📊 [GH] Stats: {self.stats}")
-
-            except Exception as e:
-                logger.error(f"❌ [GH] Error in worker loop: {e}")
-                time.sleep(5)
-
-        logger.info("👋 [GH] GitHub worker stopped")
-
-    def stop(self):
-        """Stop the worker gracefully"""
-        self.running = False
+    def on_poll(self):
+        """Check if we should trigger workflow (batching)"""
+        reason = self.should_trigger_workflow()
+        if reason:
+            self.trigger_workflow(reason)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Idempotency - Skip domain events that were already applied
+
+Responsibilities:
+- Derive an event identity (domain, status, publisher version or dedupe ID)
+- Remember the last applied identity per domain in Valkey, shared by all replicas
+- Answer repeat lookups from an in-process LRU without a network round-trip
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+
+from cache_client import get_valkey_client
+from metrics import register_stats
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Attributes receive_message must request for event_identity
+IDEMPOTENCY_ATTRIBUTES = ["MessageDeduplicationId"]
+
+DEFAULT_TTL = 86400  # seconds an applied identity is remembered
+DEFAULT_LOCAL_SIZE = 10000
+
+
+def event_identity(message: dict) -> Optional[Tuple[str, str, str]]:
+    """
+    Identify the domain event a message carries
+
+    The event ID is the publisher-supplied version/event_id when present, else the
+    SQS MessageDeduplicationId, which a redelivery of the same message keeps. There
+    is no payload hash fallback: identical bodies can be a legitimate repeat of a
+    change (e.g. Y → N → Y) and must not be dropped.
+
+    Returns:
+        tuple: (full_url, active_status, event_id), or None if the message carries no event ID
+    """
+    try:
+        body = json.loads(message.get("Body", "{}"))
+        if "Message" in body:
+            body = json.loads(body["Message"])
+        full_url = body["full_url"]
+    except (ValueError, TypeError, KeyError):
+        return None
+
+    status = body.get("active_status", "Y")
+    event_id = body.get("version") or body.get("event_id")
+    if event_id is None:
+        event_id = message.get("Attributes", {}).get("MessageDeduplicationId")
+    if event_id is None:
+        return None
+    return full_url, status, str(event_id)
+
+
+class IdempotencyStore:
+    """Last applied event per domain, in Valkey with an in-process LRU in front"""
+
+    def __init__(
+        self,
+        namespace: str,
+        client=None,
+        ttl: int = DEFAULT_TTL,
+        local_size: int = DEFAULT_LOCAL_SIZE,
+    ):
+        """
+        Initialize idempotency store
+
+        Args:
+            namespace: Key prefix, e.g. "dev:Route53Worker" (each queue applies events separately)
+            client: Valkey client (None keeps state in-process only)
+            ttl: Seconds an applied identity is remembered
+            local_size: Entries kept in the in-process LRU
+        """
+        self.namespace = namespace
+        self.client = client
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=local_size, ttl=ttl)
+
+        # Stats
+        self.stats = {
+            "duplicates": 0,
+            "local_hits": 0,
+            "remote_hits": 0,
+            "remote_errors": 0,
+            "marked": 0,
+        }
+
+    def _key(self, full_url: str) -> str:
+        return f"idem:{self.namespace}:{full_url}"
+
+    def is_duplicate(self, message: dict) -> bool:
+        """
+        Check whether a message repeats the last event applied for its domain
+
+        A flip (Y → N → Y) is never a duplicate because only the latest identity
+        per domain is remembered. Cache errors count as "not seen".
+        """
+        identity = event_identity(message)
+        if identity is None:
+            return False
+        full_url, status, event_id = identity
+        value = f"{status}|{event_id}"
+
+        key = self._key(full_url)
+        if self.local.get(key) == value:
+            self.stats["local_hits"] += 1
+            self.stats["duplicates"] += 1
+            return True
+
+        if self.client is None:
+            return False
+        try:
+            remote = self.client.get(key)
+        except Exception as e:
+            self.stats["remote_errors"] += 1
+            logger.debug(f"Idempotency lookup failed for {full_url}: {e}")
+            return False
+
+        if remote is not None:
+            self.local.set(key, remote)
+        if remote == value:
+            self.stats["remote_hits"] += 1
+            self.stats["duplicates"] += 1
+            return True
+        return False
+
+    def mark(self, message: dict):
+        """Record a message's event as applied"""
+        identity = event_identity(message)
+        if identity is None:
+            return
+        full_url, status, event_id = identity
+        key, value = self._key(full_url), f"{status}|{event_id}"
+
+        self.local.set(key, value)
+        self.stats["marked"] += 1
+        if self.client is None:
+            return
+        try:
+            self.client.set(key, value, ex=self.ttl)
+        except Exception as e:
+            self.stats["remote_errors"] += 1
+            logger.debug(f"Idempotency write failed for {full_url}: {e}")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_idempotency_store(namespace: str) -> IdempotencyStore:
+    """Return the process-wide store for a namespace (backed by Valkey when configured)"""
+    with _stores_lock:
+        if namespace not in _stores:
+            store = IdempotencyStore(
+                namespace,
+                client=get_valkey_client(),
+                ttl=int(os.environ.get("IDEMPOTENCY_TTL", DEFAULT_TTL)),
+            )
+            _stores[namespace] = store
+            register_stats(f"idempotency.{namespace}", lambda: store.stats)
+        return _stores[namespace]
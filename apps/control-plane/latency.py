@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Latency Tracking - Time from SNS publish to an applied domain change
+
+Responsibilities:
+- Read SentTimestamp / ApproximateFirstReceiveTimestamp from SQS messages
+- Split each change into queue wait, processing time and end-to-end time
+- Keep rolling percentiles per action for stats/logs and feed Prometheus histograms
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from metrics import EVENT_LATENCY_SECONDS
+
+# Attributes every receive_message call asks for
+TIMESTAMP_ATTRIBUTES = ["SentTimestamp", "ApproximateFirstReceiveTimestamp"]
+
+STAGES = ("queue_wait", "processing", "end_to_end")
+PERCENTILES = (50, 90, 99)
+DEFAULT_WINDOW = 1000  # samples kept per action and stage
+
+
+def message_action(message: dict) -> str:
+    """
+    Classify a domain change message as activate or deactivate
+
+    Handles raw messages and SNS envelopes; anything unparseable is "unknown".
+    """
+    try:
+        body = json.loads(message.get("Body", "{}"))
+        if "Message" in body:
+            body = json.loads(body["Message"])
+        active_status = body.get("active_status", "Y")
+    except (ValueError, TypeError, AttributeError):
+        return "unknown"
+    return "activate" if active_status == "Y" else "deactivate"
+
+
+def message_timestamps(message: dict):
+    """
+    Get the publish and first-receive times of a message
+
+    Returns:
+        tuple: (sent_at, first_received_at) in epoch seconds; either may be None
+    """
+    attributes = message.get("Attributes", {})
+    sent = attributes.get("SentTimestamp")
+    first_received = attributes.get("ApproximateFirstReceiveTimestamp")
+    return (
+        int(sent) / 1000 if sent else None,
+        int(first_received) / 1000 if first_received else None,
+    )
+
+
+def _percentile(ordered: list, percentile: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    rank = max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class LatencyTracker:
+    """Rolling queue-wait / processing / end-to-end latency per action"""
+
+    def __init__(self, worker: str, window: int = DEFAULT_WINDOW):
+        """
+        Initialize latency tracker
+
+        Args:
+            worker: Worker name used in metric labels
+            window: Samples kept per action and stage for percentiles
+        """
+        self.worker = worker
+        self.window = window
+        self._samples = {}  # (action, stage) -> deque of seconds
+        self._lock = threading.Lock()
+
+    def record(self, message: dict, action: str = None, applied_at: float = None):
+        """
+        Record a message whose change has been applied
+
+        Args:
+            message: SQS message received with TIMESTAMP_ATTRIBUTES
+            action: "activate"/"deactivate" (parsed from the message if omitted)
+            applied_at: Epoch seconds the change was applied (defaults to now)
+        """
+        sent_at, first_received_at = message_timestamps(message)
+        if sent_at is None:
+            return
+
+        action = action or message_action(message)
+        applied_at = applied_at or time.time()
+
+        durations = {"end_to_end": applied_at - sent_at}
+        if first_received_at is not None:
+            durations["queue_wait"] = first_received_at - sent_at
+            durations["processing"] = applied_at - first_received_at
+
+        with self._lock:
+            for stage, seconds in durations.items():
+                seconds = max(0.0, seconds)
+                samples = self._samples.setdefault((action, stage), deque(maxlen=self.window))
+                samples.append(seconds)
+                EVENT_LATENCY_SECONDS.labels(self.worker, action, stage).observe(seconds)
+
+    def percentiles(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Current percentiles
+
+        Returns:
+            dict: {action: {stage: {"p50": s, "p90": s, "p99": s, "count": n}}}
+        """
+        with self._lock:
+            snapshot = {key: sorted(samples) for key, samples in self._samples.items()}
+
+        result = {}
+        for (action, stage), ordered in snapshot.items():
+            if not ordered:
+                continue
+            summary = {f"p{p}": round(_percentile(ordered, p), 3) for p in PERCENTILES}
+            summary["count"] = len(ordered)
+            result.setdefault(action, {})[stage] = summary
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Flat percentiles, e.g. {"activate_end_to_end_p99": 41.2}, for stats and metrics"""
+        flat = {}
+        for action, stages in self.percentiles().items():
+            for stage, summary in stages.items():
+                for key, value in summary.items():
+                    if key != "count":
+                        flat[f"{action}_{stage}_{key}"] = value
+        return flat
+
+    def format(self) -> Optional[str]:
+        """One-line summary for logs, or None before the first sample"""
+        parts = []
+        for action, stages in sorted(self.percentiles().items()):
+            for stage in STAGES:
+                if stage in stages:
+                    summary = stages[stage]
+                    parts.append(
+                        f"{action}/{stage} p50={summary['p50']:.1f}s "
+                        f"p90={summary['p90']:.1f}s p99={summary['p99']:.1f}s"
+                    )
+        return ", ".join(parts) or None
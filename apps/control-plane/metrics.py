@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Metrics - Prometheus/OpenMetrics endpoint for the control plane
+
+Responsibilities:
+- Serve metrics over HTTP on the container port (8080 by default)
+- Count and time SQS receives, message handling and DB/Route53/GitHub calls
+- Expose pending batch sizes and the workers' existing stats dicts as gauges
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_PORT = 8080
+
+# Seconds; SQS long polls run up to 20s and Route53/GitHub calls can back off for longer
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+MESSAGES_RECEIVED = Counter(
+    "control_plane_messages_received_total", "SQS messages received", ["worker"]
+)
+MESSAGES_HANDLED = Counter(
+    "control_plane_messages_handled_total", "SQS messages handled", ["worker", "result"]
+)
+RECEIVE_SECONDS = Histogram(
+    "control_plane_receive_seconds", "SQS receive call latency", ["worker"], buckets=LATENCY_BUCKETS
+)
+HANDLE_SECONDS = Histogram(
+    "control_plane_handle_seconds",
+    "Time to handle one received batch",
+    ["worker"],
+    buckets=LATENCY_BUCKETS,
+)
+CALL_SECONDS = Histogram(
+    "control_plane_call_seconds",
+    "Downstream call latency",
+    ["target", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+CALL_ERRORS = Counter(
+    "control_plane_call_errors_total", "Downstream calls that raised", ["target", "operation"]
+)
+# Seconds; end-to-end includes batching windows and workflow debounce
+EVENT_LATENCY_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+EVENT_LATENCY_SECONDS = Histogram(
+    "control_plane_event_latency_seconds",
+    "Domain change latency from SNS publish (queue_wait, processing, end_to_end)",
+    ["worker", "action", "stage"],
+    buckets=EVENT_LATENCY_BUCKETS,
+)
+COALESCER_FLUSHES = Counter(
+    "control_plane_coalescer_flushes_total",
+    "Batch flushes by trigger (quiet, max_wait, size)",
+    ["worker", "reason"],
+)
+COALESCED_BATCH_SIZE = Histogram(
+    "control_plane_coalesced_batch_size",
+    "Items per flushed batch",
+    ["worker"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+PENDING_ITEMS = Gauge(
+    "control_plane_pending_items", "Items waiting in an in-memory batch", ["worker", "batch"]
+)
+
+
+class StatsCollector:
+    """Expose registered stats dicts as control_plane_worker_stat gauges"""
+
+    def __init__(self):
+        self._sources = {}  # component name -> callable returning a stats dict
+        self._lock = threading.Lock()
+
+    def register(self, component: str, source: Callable[[], Dict]):
+        with self._lock:
+            self._sources[component] = source
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            "control_plane_worker_stat", "Worker stats counters", labels=["component", "stat"]
+        )
+        with self._lock:
+            sources = list(self._sources.items())
+        for component, source in sources:
+            try:
+                stats = source()
+            except Exception:
+                continue
+            for stat, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    family.add_metric([component, stat], value)
+        yield family
+
+
+_collector = StatsCollector()
+REGISTRY.register(_collector)
+
+_server_lock = threading.Lock()
+_server_started = False
+
+
+def start_metrics_server(port: int = None):
+    """
+    Start the metrics HTTP server once per process
+
+    Args:
+        port: Listen port (defaults to METRICS_PORT or 8080)
+    """
+    global _server_started
+    port = port or int(os.environ.get("METRICS_PORT", DEFAULT_METRICS_PORT))
+    with _server_lock:
+        if _server_started:
+            return
+        start_http_server(port)
+        _server_started = True
+    logger.info(f"📊 Metrics endpoint listening on :{port}/metrics")
+
+
+def register_stats(component: str, source: Callable[[], Dict]):
+    """
+    Publish a component's stats dict
+
+    Args:
+        component: Label value, e.g. "DatabaseWorker" or "route53_executor"
+        source: Callable returning the current stats dict
+    """
+    _collector.register(component, source)
+
+
+def track_pending(worker: str, batch: str, size: Callable[[], int]):
+    """
+    Publish the size of an in-memory batch as a gauge
+
+    Args:
+        worker: Worker name
+        batch: Batch name, e.g. "pending_domains"
+        size: Callable returning the current number of items
+    """
+    PENDING_ITEMS.labels(worker, batch).set_function(size)
+
+
+@contextmanager
+def observe_call(target: str, operation: str):
+    """
+    Time a downstream call and count it as an error if it raises
+
+    Args:
+        target: "db", "route53" or "github"
+        operation: API or query name
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        CALL_ERRORS.labels(target, operation).inc()
+        raise
+    finally:
+        CALL_SECONDS.labels(target, operation).observe(time.perf_counter() - start)
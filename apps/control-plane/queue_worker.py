@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Queue Worker - Shared SQS polling loop for control plane workers
+
+Responsibilities:
+- Resolve the worker's queue URL from the cached SSM config
+- Receive, process and acknowledge messages on a backlog-sized pool of receivers
+- Expose the receive/process/ack steps so other runtimes can drive them
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from threading import Event, Lock, Thread
+from typing import List
+
+import boto3
+from config_loader import get_config
+from consumer_scaling import (
+    DEFAULT_MAX_RECEIVERS,
+    DEFAULT_MIN_RECEIVERS,
+    desired_receivers,
+    queue_backlog,
+)
+from idempotency import IDEMPOTENCY_ATTRIBUTES, get_idempotency_store
+from latency import TIMESTAMP_ATTRIBUTES, LatencyTracker
+from metrics import (
+    HANDLE_SECONDS,
+    MESSAGES_HANDLED,
+    MESSAGES_RECEIVED,
+    RECEIVE_SECONDS,
+    register_stats,
+    track_pending,
+)
+from sqs_batch import AckBuffer, VisibilityHeartbeat
+
+logger = logging.getLogger(__name__)
+
+
+def group_messages(messages: List[dict]) -> List[List[int]]:
+    """
+    Split a receive into FIFO message groups, keeping arrival order within each
+
+    Messages in different groups may be processed concurrently; messages in the
+    same group must be processed one after another.
+
+    Returns:
+        list: Lists of message indexes, one list per message group
+    """
+    groups = OrderedDict()
+    for index, message in enumerate(messages):
+        group_id = message.get("Attributes", {}).get("MessageGroupId", f"_ungrouped-{index}")
+        groups.setdefault(group_id, []).append(index)
+    return list(groups.values())
+
+
+class QueueWorker(Thread):
+    """Base worker thread that drains one SQS queue"""
+
+    # Overridden by subclasses
+    log_prefix = "[Q]"
+    queue_parameter = None  # SSM parameter suffix under /storefront-{env}/
+    visibility_timeout = 30  # seconds per receive; the heartbeat extends in-flight work
+    track_latency = True  # record publish-to-applied latency when messages complete
+    idempotent = True  # acknowledge repeats of the last applied event per domain unprocessed
+    scalable = True  # several receivers may drain the queue concurrently
+
+    def __init__(self, name: str):
+        """
+        Initialize queue worker
+
+        Args:
+            name: Thread name, also used in logs
+        """
+        super().__init__(daemon=True, name=name)
+
+        self.region_name = os.environ.get("AWS_REGION", "us-east-1")
+        self.environment = os.environ.get("ENVIRONMENT", "dev")
+
+        # Get queue URL from the shared SSM config cache
+        self.config = get_config(self.environment, self.region_name)
+        self.queue_url = self.config.get(self.queue_parameter)
+
+        self.sqs_client = boto3.client("sqs", region_name=self.region_name)
+        # Deletes are grouped into delete_message_batch calls
+        self.acks = AckBuffer(self.sqs_client, self.queue_url, log_prefix=self.log_prefix)
+        # In-flight messages stay invisible while handlers run; failures are released at once
+        self.heartbeat = VisibilityHeartbeat(
+            self.sqs_client,
+            self.queue_url,
+            self.visibility_timeout,
+            log_prefix=self.log_prefix,
+        )
+        self.retry_visibility_timeout = int(os.environ.get("SQS_RETRY_VISIBILITY_TIMEOUT", "0"))
+        # Applied events shared across replicas via Valkey, keyed per worker queue
+        self.idempotency = (
+            get_idempotency_store(f"{self.environment}:{name}") if self.idempotent else None
+        )
+
+        self.running = True
+        self._wakeup = Event()
+
+        # Backlog-driven receiver pool; workers that batch across receives stay at one
+        self.max_receivers = (
+            max(1, int(os.environ.get("CONSUMER_MAX_RECEIVERS", DEFAULT_MAX_RECEIVERS)))
+            if self.scalable
+            else 1
+        )
+        self.min_receivers = max(
+            1,
+            min(
+                self.max_receivers,
+                int(os.environ.get("CONSUMER_MIN_RECEIVERS", DEFAULT_MIN_RECEIVERS)),
+            ),
+        )
+        self.scale_interval = float(os.environ.get("CONSUMER_SCALE_INTERVAL", "30"))
+        self._receivers = []  # (thread, stop event)
+        self._stats_lock = Lock()  # receivers complete batches concurrently
+
+        # Read by the supervisor to detect dead or stuck workers
+        self.last_heartbeat = time.monotonic()
+        self.last_error = None
+
+        # Publish stats on the metrics endpoint (subclasses set self.stats after this)
+        register_stats(name, lambda: self.stats)
+        register_stats(f"{name}.acks", lambda: self.acks.stats)
+        # Publish-to-applied latency percentiles per action
+        self.latency = LatencyTracker(name)
+        register_stats(f"{name}.latency", self.latency.stats)
+        track_pending(name, "acks", lambda: self.acks.pending_count)
+
+    def receive_messages(self, wait_time_seconds: int = 20) -> List[dict]:
+        """
+        Long-poll the queue for up to 10 messages
+
+        Args:
+            wait_time_seconds: Long polling wait time (0-20 seconds)
+
+        Returns:
+            list: Messages received from SQS
+        """
+        with RECEIVE_SECONDS.labels(self.name).time():
+            response = self.sqs_client.receive_message(
+                QueueUrl=self.queue_url,
+                MaxNumberOfMessages=10,
+                WaitTimeSeconds=wait_time_seconds,
+                VisibilityTimeout=self.visibility_timeout,
+                AttributeNames=["MessageGroupId"] + TIMESTAMP_ATTRIBUTES + IDEMPOTENCY_ATTRIBUTES,
+            )
+        messages = response.get("Messages", [])
+        MESSAGES_RECEIVED.labels(self.name).inc(len(messages))
+        self.heartbeat.track([message["ReceiptHandle"] for message in messages])
+        return messages
+
+    def process_message(self, message: dict) -> bool:
+        """
+        Process a single message
+
+        Args:
+            message: SQS message
+
+        Returns:
+            bool: True if processed successfully and the message can be deleted
+        """
+        raise NotImplementedError
+
+    def process_messages(self, messages: List[dict]) -> List[bool]:
+        """
+        Process a received batch, one result per message in the same order
+
+        Args:
+            messages: SQS messages from one receive call
+
+        Returns:
+            list: True for each message that can be deleted
+        """
+        return [self.process_message(message) for message in messages]
+
+    def ack_message(self, message: dict):
+        """Queue a processed message for batched deletion"""
+        self.heartbeat.untrack([message["ReceiptHandle"]])
+        self.acks.add(message["ReceiptHandle"])
+
+    def release_messages(self, messages: List[dict]):
+        """Make failed messages visible again so they are retried right away"""
+        if messages:
+            self.heartbeat.release(
+                [message["ReceiptHandle"] for message in messages], self.retry_visibility_timeout
+            )
+
+    def skip_duplicates(self, messages: List[dict]) -> List[dict]:
+        """
+        Acknowledge messages whose event was already applied
+
+        Returns:
+            list: Messages that still need processing
+        """
+        if not self.idempotency:
+            return messages
+
+        fresh = []
+        for message in messages:
+            if self.idempotency.is_duplicate(message):
+                MESSAGES_HANDLED.labels(self.name, "duplicate").inc()
+                self.ack_message(message)
+            else:
+                fresh.append(message)
+
+        if len(fresh) < len(messages):
+            logger.info(
+                f"⏭️ {self.log_prefix} Skipped {len(messages) - len(fresh)} already applied events"
+            )
+        return fresh
+
+    def complete_messages(self, messages: List[dict], results: List[bool]):
+        """Acknowledge successful messages and leave failed ones for redelivery"""
+        applied_at = time.time()
+        failed = []
+        for message, ok in zip(messages, results):
+            MESSAGES_HANDLED.labels(self.name, "success" if ok else "failure").inc()
+            if ok:
+                if self.track_latency:
+                    self.latency.record(message, applied_at=applied_at)
+                if self.idempotency:
+                    self.idempotency.mark(message)
+                self.ack_message(message)
+                with self._stats_lock:
+                    self.stats["messages_processed"] += 1
+            else:
+                logger.warning(f"⚠️ {self.log_prefix} Message processing failed, will retry")
+                failed.append(message)
+        self.release_messages(failed)
+
+    def on_poll(self):
+        """Hook called after every receive, even when no messages arrived"""
+
+    def receive_wait_seconds(self) -> int:
+        """Long-poll duration for the next receive (subclasses shorten it to flush on time)"""
+        return 20
+
+    def log_stats(self):
+        """Log stats periodically"""
+        if self.stats["messages_processed"] % 10 == 0 and self.stats["messages_processed"] > 0:
+            logger.info(f"📊 {self.log_prefix} Stats: {self.stats}")
+            latency = self.latency.format()
+            if latency:
+                logger.info(f"⏱️ {self.log_prefix} Latency: {latency}")
+
+    def _receive_loop(self, stop: Event):
+        """One receiver: receive, process and acknowledge until stopped"""
+        while self.running and not stop.is_set():
+            self.last_heartbeat = time.monotonic()
+            try:
+                messages = self.skip_duplicates(self.receive_messages(self.receive_wait_seconds()))
+
+                if messages:
+                    logger.info(f"📬 {self.log_prefix} Received {len(messages)} messages")
+                    try:
+                        with HANDLE_SECONDS.labels(self.name).time():
+                            results = self.process_messages(messages)
+                    except Exception:
+                        self.release_messages(messages)
+                        raise
+                    self.complete_messages(messages, results)
+
+                self.on_poll()
+                self.log_stats()
+
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"❌ {self.log_prefix} Error in worker loop: {e}")
+                time.sleep(5)
+
+    def scale_receivers(self):
+        """Match the number of receiver threads to the queue backlog"""
+        self._receivers = [(thread, stop) for thread, stop in self._receivers if thread.is_alive()]
+
+        target = self.min_receivers
+        if self.max_receivers > self.min_receivers:
+            try:
+                backlog = queue_backlog(self.sqs_client, self.queue_url)
+                target = desired_receivers(backlog, self.min_receivers, self.max_receivers)
+            except Exception as e:
+                logger.warning(f"⚠️ {self.log_prefix} Could not read queue backlog: {e}")
+                target = max(self.min_receivers, len(self._receivers))
+
+        if target == len(self._receivers):
+            return
+
+        logger.info(f"⚖️ {self.log_prefix} Scaling receivers {len(self._receivers)} → {target}")
+        while len(self._receivers) < target:
+            stop = Event()
+            thread = Thread(
+                target=self._receive_loop,
+                args=(stop,),
+                daemon=True,
+                name=f"{self.name}-receiver-{len(self._receivers)}",
+            )
+            thread.start()
+            self._receivers.append((thread, stop))
+        while len(self._receivers) > target:
+            # Finishes its current receive and batch before exiting
+            self._receivers.pop()[1].set()
+
+    def run(self):
+        """Main worker loop: keep a backlog-sized pool of receivers running"""
+        logger.info(f"🔄 {self.log_prefix} Starting {self.name} thread...")
+
+        while self.running:
+            self.scale_receivers()
+            self._wakeup.wait(self.scale_interval)
+
+        self._join_receivers()
+        self.heartbeat.close()
+        self.acks.close()
+        logger.info(f"👋 {self.log_prefix} {self.name} stopped")
+
+    def _join_receivers(self, timeout: float = 30):
+        """Stop every receiver and wait for it to acknowledge its current batch"""
+        receivers = list(self._receivers)
+        for _, stop in receivers:
+            stop.set()
+        for thread, _ in receivers:
+            thread.join(timeout=timeout)
+
+    def stop(self):
+        """Stop the worker gracefully and flush pending acknowledgements"""
+        self.running = False
+        self._wakeup.set()
+        # Receivers still ack and extend visibility for their current batch
+        self._join_receivers()
+        self.heartbeat.close()
+        self.acks.close()
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Route53 Changes - Batched record changes with asynchronous INSYNC tracking
+
+Responsibilities:
+- Accumulate record changes per hosted zone up to Route53's batch limits
+- Submit each zone's changes in one change_resource_record_sets call
+- Poll get_change in the background and resolve futures once changes are INSYNC
+- Stream a zone's record sets page by page for teardown in bounded batches
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from typing import Callable, Iterable, Iterator, List
+
+from metrics import register_stats
+from route53_executor import get_route53_client, get_route53_executor
+
+logger = logging.getLogger(__name__)
+
+# Route53 change batch limits (UPSERT counts twice towards both)
+MAX_RECORDS_PER_BATCH = 1000
+MAX_VALUE_CHARS_PER_BATCH = 32000
+
+DEFAULT_MAX_DELAY = 0.5  # seconds changes wait for others to the same zone
+DEFAULT_POLL_INTERVAL = 5.0  # seconds between get_change polls
+DEFAULT_SYNC_TIMEOUT = 600.0  # give up waiting for INSYNC after this long
+DEFAULT_INSYNC_WAIT = 120.0  # how long downstream steps wait before going ahead anyway
+DEFAULT_SUBMIT_TIMEOUT = 120.0  # how long a caller waits for its batch to be accepted
+
+
+def change_size(change: dict):
+    """
+    Size of one change against the batch limits
+
+    Returns:
+        tuple: (record elements, value characters)
+    """
+    record_set = change["ResourceRecordSet"]
+    values = [record["Value"] for record in record_set.get("ResourceRecords", [])]
+    records = len(values) or 1  # alias records count as one element
+    chars = sum(len(value) for value in values)
+    if change["Action"] == "UPSERT":
+        records, chars = records * 2, chars * 2
+    return records, chars
+
+
+def change_key(change: dict) -> tuple:
+    """Identity of the record set a change touches"""
+    record_set = change["ResourceRecordSet"]
+    return (
+        record_set["Name"].rstrip(".").lower(),
+        record_set["Type"],
+        record_set.get("SetIdentifier"),
+    )
+
+
+def iter_record_sets(route53_client, zone_id: str, call: Callable = None) -> Iterator[dict]:
+    """
+    Yield every record set in a zone, one list_resource_record_sets page at a time
+
+    Args:
+        route53_client: boto3 Route53 client
+        zone_id: Hosted zone ID
+        call: Wrapper for the API call (e.g. Route53Executor.call); called directly if omitted
+
+    Yields:
+        dict: ResourceRecordSet
+    """
+    call = call or (lambda fn, **kwargs: fn(**kwargs))
+    params = {"HostedZoneId": zone_id}
+    while True:
+        page = call(route53_client.list_resource_record_sets, **params)
+        yield from page["ResourceRecordSets"]
+        if not page.get("IsTruncated"):
+            return
+
+        params["StartRecordName"] = page["NextRecordName"]
+        params.pop("StartRecordType", None)
+        params.pop("StartRecordIdentifier", None)
+        if page.get("NextRecordType"):
+            params["StartRecordType"] = page["NextRecordType"]
+        if page.get("NextRecordIdentifier"):
+            params["StartRecordIdentifier"] = page["NextRecordIdentifier"]
+
+
+def chunk_changes(changes: Iterable[dict]) -> Iterator[List[dict]]:
+    """
+    Group changes into lists that each fit in one change batch
+
+    Yields:
+        list: Changes within Route53's record and value-size limits
+    """
+    batch = _PendingBatch()
+    for change in changes:
+        if batch.changes and not batch.fits(change):
+            yield batch.changes
+            batch = _PendingBatch()
+        batch.add(change, None)
+    if batch.changes:
+        yield batch.changes
+
+
+class ChangeFuture(Future):
+    """Resolves with the Route53 change ID once the change is INSYNC"""
+
+    def __init__(self):
+        super().__init__()
+        self.change_id = None
+        self._submitted = threading.Event()
+
+    def mark_submitted(self, change_id: str):
+        """Record the change ID once Route53 accepted the batch"""
+        self.change_id = change_id
+        self._submitted.set()
+
+    def resolve(self, change_id: str):
+        """Complete successfully (ignored if already completed)"""
+        try:
+            self.set_result(change_id)
+        except InvalidStateError:
+            pass
+
+    def fail(self, error: Exception):
+        """Complete with an error and wake anyone waiting on the submission"""
+        try:
+            self.set_exception(error)
+        except InvalidStateError:
+            pass
+        self._submitted.set()
+
+    def wait_submitted(self, timeout: float = DEFAULT_SUBMIT_TIMEOUT) -> str:
+        """
+        Block until Route53 accepted the batch holding this change
+
+        Args:
+            timeout: Seconds to wait, so a dead submitter cannot hang the caller
+
+        Returns:
+            str: Change ID
+
+        Raises:
+            TimeoutError: If the batch was not submitted within the timeout
+            Exception: The error Route53 returned if the batch was rejected
+        """
+        if not self._submitted.wait(timeout):
+            raise FutureTimeoutError("Route53 change batch was not submitted in time")
+        if self.done() and self.exception():
+            raise self.exception()
+        return self.change_id
+
+
+class _PendingBatch:
+    """Changes waiting to be submitted to one zone"""
+
+    def __init__(self):
+        self.changes = []
+        self.futures = []
+        self.keys = set()
+        self.records = 0
+        self.chars = 0
+        self.created_at = time.monotonic()
+
+    def fits(self, change: dict) -> bool:
+        records, chars = change_size(change)
+        return (
+            change_key(change) not in self.keys
+            and self.records + records <= MAX_RECORDS_PER_BATCH
+            and self.chars + chars <= MAX_VALUE_CHARS_PER_BATCH
+        )
+
+    def add(self, change: dict, future: ChangeFuture = None):
+        records, chars = change_size(change)
+        self.changes.append(change)
+        self.keys.add(change_key(change))
+        self.records += records
+        self.chars += chars
+        if future is not None and future not in self.futures:
+            self.futures.append(future)
+
+
+class ChangeBatcher:
+    """Per-zone change accumulator with a background INSYNC poller"""
+
+    def __init__(
+        self,
+        route53_client,
+        executor,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        sync_timeout: float = DEFAULT_SYNC_TIMEOUT,
+    ):
+        """
+        Initialize change batcher
+
+        Args:
+            route53_client: boto3 Route53 client
+            executor: Route53Executor whose rate limiter every call goes through
+            max_delay: Seconds a zone's changes wait before they are submitted
+            poll_interval: Seconds between get_change polls for a pending change
+            sync_timeout: Seconds after which a change that is not INSYNC fails its futures
+        """
+        self.route53_client = route53_client
+        self.executor = executor
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.sync_timeout = sync_timeout
+
+        self._pending = {}  # zone_id -> _PendingBatch
+        self._inflight = {}  # change_id -> (futures, submitted_at, next_poll)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+        # Stats
+        self.stats = {
+            "changes_queued": 0,
+            "batches_submitted": 0,
+            "changes_insync": 0,
+            "get_change_calls": 0,
+            "failures": 0,
+        }
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name="Route53Changes")
+        self._thread.start()
+
+    def submit(self, zone_id: str, changes: List[dict]) -> ChangeFuture:
+        """
+        Queue record changes for a zone
+
+        Changes to the same record set are never combined into one batch, so
+        ordering between them is preserved.
+
+        Args:
+            zone_id: Hosted zone ID
+            changes: change_resource_record_sets Change entries
+
+        Returns:
+            ChangeFuture: Resolves once every batch holding these changes is INSYNC
+        """
+        future = ChangeFuture()
+        if not changes:
+            future.mark_submitted(None)
+            future.resolve(None)
+            return future
+
+        full = []
+        with self._lock:
+            for change in changes:
+                batch = self._pending.get(zone_id)
+                if batch and not batch.fits(change):
+                    full.append((zone_id, self._pending.pop(zone_id)))
+                    batch = None
+                if batch is None:
+                    batch = self._pending[zone_id] = _PendingBatch()
+                batch.add(change, future)
+            self.stats["changes_queued"] += len(changes)
+
+        # Full batches go out now; a future spanning several batches resolves with the last
+        for zone, batch in full:
+            self._submit(zone, batch)
+
+        self._wakeup.set()
+        return future
+
+    def track(self, change_info: dict) -> ChangeFuture:
+        """
+        Track a change returned by another Route53 call (e.g. create_hosted_zone)
+
+        Args:
+            change_info: ChangeInfo from the Route53 response
+
+        Returns:
+            ChangeFuture: Resolves once the change is INSYNC
+        """
+        future = ChangeFuture()
+        self._register(change_info, [future])
+        return future
+
+    def _register(self, change_info: dict, futures: List[ChangeFuture]):
+        """Record a submitted change and resolve it right away if already INSYNC"""
+        change_id = change_info["Id"].split("/")[-1]
+        for future in futures:
+            future.mark_submitted(change_id)
+
+        if change_info.get("Status") == "INSYNC":
+            self._resolve(futures, change_id)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._inflight[change_id] = (futures, now, now + self.poll_interval)
+
+    def _resolve(self, futures: List[ChangeFuture], change_id: str):
+        """Resolve futures whose last outstanding change went INSYNC"""
+        self.stats["changes_insync"] += 1
+        with self._lock:
+            outstanding = {
+                id(future) for entry in self._inflight.values() for future in entry[0]
+            } | {id(future) for batch in self._pending.values() for future in batch.futures}
+        for future in futures:
+            if id(future) not in outstanding:
+                future.resolve(change_id)
+
+    def _fail(self, futures: List[ChangeFuture], error: Exception):
+        """Fail futures and wake anyone waiting on their submission"""
+        self.stats["failures"] += 1
+        for future in futures:
+            future.fail(error)
+
+    def _submit(self, zone_id: str, batch: _PendingBatch):
+        """Send one batch to Route53"""
+        try:
+            response = self.executor.call(
+                self.route53_client.change_resource_record_sets,
+                HostedZoneId=zone_id,
+                ChangeBatch={"Changes": batch.changes},
+            )
+        except Exception as e:
+            logger.error(f"❌ [R53] Change batch for zone {zone_id} failed: {e}")
+            self._fail(batch.futures, e)
+            return
+
+        self.stats["batches_submitted"] += 1
+        logger.info(f"📦 [R53] Submitted {len(batch.changes)} changes to zone {zone_id}")
+        self._register(response["ChangeInfo"], batch.futures)
+
+    def delete_records(self, zone_id: str, should_delete: Callable[[dict], bool]) -> int:
+        """
+        Delete matching record sets from a zone, streaming it page by page
+
+        Only one page and one change batch are held at a time, and each batch is
+        accepted by Route53 before the next is built, so any zone size is torn down
+        in one pass with bounded memory.
+
+        Args:
+            zone_id: Hosted zone ID
+            should_delete: Predicate on a ResourceRecordSet
+
+        Returns:
+            int: Number of record sets deleted
+
+        Raises:
+            Exception: The Route53 error if a batch was rejected
+        """
+        deletes = (
+            {"Action": "DELETE", "ResourceRecordSet": record_set}
+            for record_set in iter_record_sets(self.route53_client, zone_id, self.executor.call)
+            if should_delete(record_set)
+        )
+
+        deleted = 0
+        for changes in chunk_changes(deletes):
+            future = self.submit(zone_id, changes)
+            self.flush(zone_id)
+            future.wait_submitted()
+            deleted += len(changes)
+        return deleted
+
+    def flush(self, zone_id: str = None):
+        """Submit pending changes now (one zone, or all zones)"""
+        with self._lock:
+            zones = [zone_id] if zone_id else list(self._pending)
+            batches = [(zone, self._pending.pop(zone)) for zone in zones if zone in self._pending]
+        for zone, batch in batches:
+            self._submit(zone, batch)
+
+    def _flush_due(self):
+        """Submit batches that have waited max_delay"""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                zone
+                for zone, batch in self._pending.items()
+                if now - batch.created_at >= self.max_delay
+            ]
+            batches = [(zone, self._pending.pop(zone)) for zone in due]
+        for zone, batch in batches:
+            self._submit(zone, batch)
+
+    def _poll_due(self):
+        """Call get_change for in-flight changes whose poll time has come"""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                (change_id, entry) for change_id, entry in self._inflight.items() if entry[2] <= now
+            ]
+
+        for change_id, (futures, submitted_at, _) in due:
+            try:
+                response = self.executor.call(self.route53_client.get_change, Id=change_id)
+                self.stats["get_change_calls"] += 1
+                status = response["ChangeInfo"]["Status"]
+            except Exception as e:
+                logger.warning(f"⚠️ [R53] get_change failed for {change_id}: {e}")
+                status = None
+
+            if status == "INSYNC":
+                with self._lock:
+                    self._inflight.pop(change_id, None)
+                elapsed = time.monotonic() - submitted_at
+                logger.info(f"✅ [R53] Change {change_id} INSYNC after {elapsed:.1f}s")
+                self._resolve(futures, change_id)
+            elif time.monotonic() - submitted_at > self.sync_timeout:
+                with self._lock:
+                    self._inflight.pop(change_id, None)
+                self._fail(
+                    futures,
+                    FutureTimeoutError(f"Change {change_id} not INSYNC after {self.sync_timeout}s"),
+                )
+            else:
+                with self._lock:
+                    if change_id in self._inflight:
+                        self._inflight[change_id] = (
+                            futures,
+                            submitted_at,
+                            time.monotonic() + self.poll_interval,
+                        )
+
+    def _run(self):
+        """Background thread: submit due batches and poll in-flight changes"""
+        while not self._stop.is_set():
+            self._wakeup.wait(self.max_delay)
+            self._wakeup.clear()
+            try:
+                self._flush_due()
+                self._poll_due()
+            except Exception as e:
+                logger.error(f"❌ [R53] Change batcher error: {e}")
+
+    def outstanding(self) -> List[ChangeFuture]:
+        """Futures for every change that is queued or not yet INSYNC"""
+        with self._lock:
+            futures = [future for batch in self._pending.values() for future in batch.futures]
+            futures += [future for entry in self._inflight.values() for future in entry[0]]
+        return list({id(future): future for future in futures}.values())
+
+    def wait_for_insync(self, timeout: float = DEFAULT_INSYNC_WAIT) -> bool:
+        """
+        Flush and wait until every change known right now is INSYNC
+
+        Args:
+            timeout: Seconds to wait (None waits up to the sync timeout of each change)
+
+        Returns:
+            bool: True if all of them completed successfully in time
+        """
+        self.flush()
+        futures = self.outstanding()
+        if not futures:
+            return True
+
+        logger.info(f"⏳ [R53] Waiting for {len(futures)} Route53 changes to be INSYNC...")
+        done, not_done = wait(futures, timeout=timeout)
+        failed = [future for future in done if future.exception()]
+        if not_done or failed:
+            logger.warning(f"⚠️ [R53] {len(not_done)} changes still pending, {len(failed)} failed")
+            return False
+        return True
+
+    def stop(self):
+        """Submit anything pending and stop the background thread"""
+        self.flush()
+        self._stop.set()
+        self._wakeup.set()
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_change_batcher(region_name: str = "us-east-1") -> ChangeBatcher:
+    """Return the process-wide change batcher"""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = ChangeBatcher(
+                get_route53_client(region_name),
+                get_route53_executor(),
+                max_delay=float(os.environ.get("ROUTE53_BATCH_DELAY", DEFAULT_MAX_DELAY)),
+            )
+            register_stats("route53_changes", lambda: _batcher.stats)
+        return _batcher
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Route53 Executor - Concurrent, rate-limited Route53 API calls
+
+Responsibilities:
+- Share one long-lived Route53 client and one token bucket across the process
+- Run Route53 work on a bounded worker pool
+- Back off with jitter on Throttling/PriorRequestNotComplete and adapt the call rate
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from metrics import observe_call, register_stats
+
+logger = logging.getLogger(__name__)
+
+# Route53 allows 5 API requests per second per AWS account
+ROUTE53_RATE_LIMIT = 5.0
+THROTTLE_ERROR_CODES = {"Throttling", "ThrottlingException", "PriorRequestNotComplete"}
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate can be lowered under throttling"""
+
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = 0.5):
+        """
+        Initialize token bucket
+
+        Args:
+            rate: Target tokens per second
+            capacity: Burst size (defaults to one second of tokens)
+            min_rate: Floor for the adaptive rate
+        """
+        self.target_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def slow_down(self):
+        """Halve the rate after a throttling error"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self):
+        """Creep back towards the target rate after a successful call"""
+        with self._lock:
+            self.rate = min(self.target_rate, self.rate + 0.1)
+
+
+class Route53Executor:
+    """Bounded worker pool for Route53 work with a shared rate limiter"""
+
+    def __init__(
+        self,
+        limiter: TokenBucket,
+        max_workers: int = 4,
+        max_retries: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+    ):
+        """
+        Initialize Route53 executor
+
+        Args:
+            limiter: Token bucket shared by every Route53 caller in the process
+            max_workers: Concurrent Route53 tasks
+            max_retries: Retries per call on throttling errors
+            base_delay: First backoff delay in seconds
+            max_delay: Backoff cap in seconds
+        """
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route53")
+        self._lock = threading.Lock()
+
+        # Stats
+        self.stats = {
+            "queue_depth": 0,
+            "calls": 0,
+            "throttle_events": 0,
+            "throttled_seconds": 0.0,
+            "rate_limit_wait_seconds": 0.0,
+            "failures": 0,
+        }
+
+    def _add_stat(self, key: str, value):
+        with self._lock:
+            self.stats[key] += value
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Make one rate-limited Route53 API call in the calling thread
+
+        Throttling errors are retried with exponential backoff and full jitter;
+        any other error is raised to the caller unchanged.
+
+        Args:
+            fn: Bound boto3 client method, e.g. client.create_hosted_zone
+        """
+        attempt = 0
+        while True:
+            self._add_stat("rate_limit_wait_seconds", self.limiter.acquire())
+            self._add_stat("calls", 1)
+            try:
+                with observe_call("route53", getattr(fn, "__name__", "call")):
+                    result = fn(*args, **kwargs)
+                self.limiter.speed_up()
+                return result
+
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code not in THROTTLE_ERROR_CODES or attempt >= self.max_retries:
+                    self._add_stat("failures", 1)
+                    raise
+
+                self.limiter.slow_down()
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+                attempt += 1
+                self._add_stat("throttle_events", 1)
+                self._add_stat("throttled_seconds", delay)
+                logger.warning(
+                    f"⚠️ [R53] {code} on {getattr(fn, '__name__', 'call')}, "
+                    f"retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Run Route53 work on the worker pool
+
+        The task itself should make its API calls through call() so they share the limiter.
+
+        Returns:
+            Future: Resolves to fn's return value
+        """
+        self._add_stat("queue_depth", 1)
+
+        def run():
+            self._add_stat("queue_depth", -1)
+            return fn(*args, **kwargs)
+
+        return self._pool.submit(run)
+
+    def map(self, fn, items) -> list:
+        """
+        Run fn over items concurrently and wait for all of them
+
+        Returns:
+            list: (item, result, exception) tuples in input order
+        """
+        futures = [(item, self.submit(fn, item)) for item in items]
+        results = []
+        for item, future in futures:
+            try:
+                results.append((item, future.result(), None))
+            except Exception as e:
+                results.append((item, None, e))
+        return results
+
+
+_client = None
+_executor = None
+_singleton_lock = threading.Lock()
+
+
+def get_route53_client(region_name: str = "us-east-1"):
+    """Return the process-wide Route53 client (retries are handled by the executor)"""
+    global _client
+    with _singleton_lock:
+        if _client is None:
+            _client = boto3.client(
+                "route53",
+                region_name=region_name,
+                config=Config(retries={"max_attempts": 1, "mode": "standard"}),
+            )
+        return _client
+
+
+def get_route53_executor() -> Route53Executor:
+    """Return the process-wide Route53 executor"""
+    global _executor
+    with _singleton_lock:
+        if _executor is None:
+            rate = float(os.environ.get("ROUTE53_RATE_LIMIT", ROUTE53_RATE_LIMIT))
+            _executor = Route53Executor(
+                TokenBucket(rate),
+                max_workers=int(os.environ.get("ROUTE53_MAX_WORKERS", "4")),
+            )
+            register_stats("route53_executor", lambda: _executor.stats)
+        return _executor
@@ -10,33 +10,34 @@ Responsibilities:
 
 import json
 import logging
-import os
-import time
-from threading import Thread
+from typing import List
 
-import boto3
+from queue_worker import QueueWorker, group_messages
+from route53_changes import get_change_batcher
+from route53_executor import get_route53_client, get_route53_executor
+from zone_index import get_zone_index
 
 logger = logging.getLogger(__name__)
 
 
-class Route53Worker(Thread):
+class Route53Worker(QueueWorker):
     """Worker thread to handle Route53 DNS operations"""
 
+    log_prefix = "[R53]"
+    queue_parameter = "sqs/route53-operations-queue-url"
+    visibility_timeout = 60  # extended by the heartbeat while slow DNS changes run
+
     def __init__(self):
         """Initialize Route53 worker"""
-        super().__init__(daemon=True, name="Route53Worker")
-
-        self.region_name = os.environ.get("AWS_REGION", "us-east-1")
-        self.environment = os.environ.get("ENVIRONMENT", "dev")
+        super().__init__(name="Route53Worker")
 
-        # Get queue URL from SSM
-        ssm_client = boto3.client("ssm", region_name=self.region_name)
-        self.queue_url = ssm_client.get_parameter(
-            Name=f"/storefront-{self.environment}/sqs/route53-operations-queue-url"
-        )["Parameter"]["Value"]
-
-        self.sqs_client = boto3.client("sqs", region_name=self.region_name)
-        self.route53_client = boto3.client("route53", region_name=self.region_name)
+        # Shared client, rate limiter and worker pool for every Route53 call in the process
+        self.route53_client = get_route53_client(self.region_name)
+        self.r53 = get_route53_executor()
+        # Record changes are batched per zone and tracked until INSYNC in the background
+        self.changes = get_change_batcher(self.region_name)
+        # Shared domain -> zone index; only misses cost an API call
+        self.zone_index = get_zone_index(self.region_name)
 
         # Stats
         self.stats = {
@@ -47,7 +48,6 @@ class Route53Worker(Thread):
             "errors": 0,
         }
 
-        self.running = True
         logger.info("✅ Route53 worker initialized")
 
     def process_message(self, message: dict) -> bool:
@@ -82,31 +82,46 @@ class Route53Worker(Thread):
             self.stats["errors"] += 1
             return False
 
+    def process_messages(self, messages: List[dict]) -> List[bool]:
+        """
+        Process a received batch concurrently on the Route53 executor
+
+        Message groups run in parallel; messages within a group keep FIFO order.
+
+        Args:
+            messages: SQS messages from one receive call
+
+        Returns:
+            list: True for each message that can be deleted
+        """
+        results = [False] * len(messages)
+
+        def run_group(indexes):
+            for index in indexes:
+                results[index] = self.process_message(messages[index])
+
+        for _, _, error in self.r53.map(run_group, group_messages(messages)):
+            if error:
+                logger.error(f"❌ [R53] Error processing message group: {error}")
+
+        return results
+
     def _create_hosted_zone(self, domain: str) -> bool:
         """Create Route53 hosted zone for domain"""
         try:
             # Check if zone already exists
-            try:
-                zones = self.route53_client.list_hosted_zones_by_name(DNSName=domain)
-                for zone in zones.get("HostedZones", []):
-                    if zone["Name"].rstrip(".") == domain:
-                        logger.info(f"ℹ️ [R53] Hosted zone already exists for {domain}")
-                        return True
-            except Exception:
-                pass
-
-            # Create new hosted zone
-            response = self.route53_client.create_hosted_zone(
-                Name=domain,
-                CallerReference=f"{domain}-{int(time.time())}",
-                HostedZoneConfig={
-                    "Comment": f"Managed by storefront-{self.environment}",
-                    "PrivateZone": False,
-                },
+            if self.zone_index.exists(domain):
+                logger.info(f"ℹ️ [R53] Hosted zone already exists for {domain}")
+                return True
+
+            # Create new hosted zone (recorded in the zone index)
+            response = self.zone_index.create_zone(
+                domain, f"Managed by storefront-{self.environment}"
             )
 
             zone_id = response["HostedZone"]["Id"]
             nameservers = response["DelegationSet"]["NameServers"]
+            self.changes.track(response["ChangeInfo"])
 
             self.stats["zones_created"] += 1
             logger.info(f"✅ [R53] Created hosted zone {zone_id} for {domain}")
@@ -124,39 +139,41 @@ class Route53Worker(Thread):
     def _add_default_records(self, zone_id: str, domain: str):
         """Add default DNS records to hosted zone"""
         try:
-            # Get ALB DNS name from SSM (if exists)
-            ssm_client = boto3.client("ssm", region_name=self.region_name)
+            # Get ALB DNS name from the cached SSM config (if exists)
             try:
-                alb_dns = ssm_client.get_parameter(
-                    Name=f"/storefront-{self.environment}/alb/{domain}/dns-name"
-                )["Parameter"]["Value"]
-
-                # Add A record pointing to ALB
-                self.route53_client.change_resource_record_sets(
-                    HostedZoneId=zone_id,
-                    ChangeBatch={
-                        "Changes": [
-                            {
-                                "Action": "UPSERT",
-                                "ResourceRecordSet": {
-                                    "Name": domain,
-                                    "Type": "A",
-                                    "AliasTarget": {
-                                        "HostedZoneId": "Z35SXDOTRQ7X7K",  # ALB hosted zone for us-east-1
-                                        "DNSName": alb_dns,
-                                        "EvaluateTargetHealth": False,
-                                    },
-                                },
-                            }
-                        ]
-                    },
-                )
+                alb_dns = self.config.get(f"alb/{domain}/dns-name")
+            except KeyError:
+                logger.info(f"ℹ️ [R53] No ALB found for {domain}, skipping A record")
+                return
+
+            # Add A record pointing to ALB; queued with other changes to the zone
+            future = self.changes.submit(
+                zone_id,
+                [
+                    {
+                        "Action": "UPSERT",
+                        "ResourceRecordSet": {
+                            "Name": domain,
+                            "Type": "A",
+                            "AliasTarget": {
+                                "HostedZoneId": "Z35SXDOTRQ7X7K",  # ALB hosted zone for us-east-1
+                                "DNSName": alb_dns,
+                                "EvaluateTargetHealth": False,
+                            },
+                        },
+                    }
+                ],
+            )
 
+            def on_done(done):
+                error = done.exception()
+                if error:
+                    logger.warning(f"⚠️ [R53] Failed to add A record for {domain}: {error}")
+                    return
                 self.stats["records_added"] += 1
                 logger.info(f"✅ [R53] Added A record for {domain} → {alb_dns}")
 
-            except Exception:
-                logger.info(f"ℹ️ [R53] No ALB found for {domain}, skipping A record")
+            future.add_done_callback(on_done)
 
         except Exception as e:
             logger.warning(f"⚠️ [R53] Failed to add default records: {e}")
@@ -165,36 +182,24 @@ class Route53Worker(Thread):
         """Delete Route53 hosted zone and all records"""
         try:
             # Find hosted zone
-            zones = self.route53_client.list_hosted_zones_by_name(DNSName=domain)
-            zone_id = None
-
-            for zone in zones.get("HostedZones", []):
-                if zone["Name"].rstrip(".") == domain:
-                    zone_id = zone["Id"]
-                    break
+            zone_id = self.zone_index.get_zone_id(domain)
 
             if not zone_id:
                 logger.info(f"ℹ️ [R53] No hosted zone found for {domain}")
                 return True
 
-            # Delete all records except NS and SOA
-            records = self.route53_client.list_resource_record_sets(HostedZoneId=zone_id)
-            changes = []
-
-            for record in records.get("ResourceRecordSets", []):
-                if record["Type"] not in ["NS", "SOA"]:
-                    changes.append({"Action": "DELETE", "ResourceRecordSet": record})
-
-            if changes:
-                self.route53_client.change_resource_record_sets(
-                    HostedZoneId=zone_id,
-                    ChangeBatch={"Changes": changes},
-                )
-                logger.info(f"✅ [R53] Deleted {len(changes)} records from {domain}")
+            # Delete all records except NS and SOA, streaming every page of the zone;
+            # accepted is enough here, INSYNC is awaited by whoever depends on it
+            deleted = self.changes.delete_records(
+                zone_id, lambda record: record["Type"] not in ["NS", "SOA"]
+            )
+            if deleted:
+                logger.info(f"✅ [R53] Deleted {deleted} records from {domain}")
 
             # Note: Not deleting the hosted zone itself to preserve history
             # Uncomment below to actually delete the zone:
             # self.route53_client.delete_hosted_zone(Id=zone_id)
+            # self.zone_index.remove(domain)
             # self.stats["zones_deleted"] += 1
 
             logger.info(f"⚠️ [R53] Skipped hosted zone deletion for {domain} (keeping zone)")
@@ -203,51 +208,3 @@ class Route53Worker(Thread):
         except Exception as e:
             logger.error(f"❌ [R53] Failed to delete hosted zone for {domain}: {e}")
             return False
-
-    def run(self):
-        """Main worker loop"""
-        logger.info("🔄 [R53] Starting Route53 worker thread...")
-
-        while self.running:
-            try:
-                response = self.sqs_client.receive_message(
-                    QueueUrl=self.queue_url,
-                    MaxNumberOfMessages=10,
-                    WaitTimeSeconds=20,
-                    VisibilityTimeout=300,  # 5 minutes for DNS operations
-                )
-
-                messages = response.get("Messages", [])
-
-                if not messages:
-                    continue
-
-                logger.info(f"📬 [R53] Received {len(messages)} messages")
-
-                for message in messages:
-                    if self.process_message(message):
-                        # Delete message from queue
-                        self.sqs_client.delete_message(
-                            QueueUrl=self.queue_url,
-                            ReceiptHandle=message["ReceiptHandle"],
-                        )
-                        self.stats["messages_processed"] += 1
-                    else:
-                        logger.warning(f"⚠️ [R53] Message processing failed, will retry")
-
-                # Log stats periodically
-                if (
-                    self.stats["messages_processed"] % 10 == 0
-                    and self.stats["messages_processed"] > 0
-                ):
-                    logger.info(f"📊 [R53] Stats: {self.stats}")
-
-            except Exception as e:
-                logger.error(f"❌ [R53] Error in worker loop: {e}")
-                time.sleep(5)
-
-        logger.info("👋 [R53] Route53 worker stopped")
-
-    def stop(self):
-        """Stop the worker gracefully"""
-        self.running = False
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+SQS Batch Helpers - Batched message acknowledgements and visibility heartbeats
+
+Responsibilities:
+- Group receipt handles into delete_message_batch calls of up to 10 entries
+- Flush on size, on a deadline, and on shutdown
+- Report partial failures per entry
+- Extend visibility of in-flight messages and release failed ones immediately
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+# SQS batch APIs accept at most 10 entries per request
+SQS_MAX_BATCH_SIZE = 10
+
+
+class AckBuffer:
+    """Buffer receipt handles and delete them from SQS in batches"""
+
+    def __init__(
+        self,
+        sqs_client,
+        queue_url: str,
+        max_batch: int = SQS_MAX_BATCH_SIZE,
+        max_delay: float = 1.0,
+        on_failure: Callable[[str, dict], None] = None,
+        log_prefix: str = "[SQS]",
+    ):
+        """
+        Initialize acknowledgement buffer
+
+        Args:
+            sqs_client: boto3 SQS client
+            queue_url: Queue the receipt handles belong to
+            max_batch: Flush as soon as this many handles are buffered (1-10)
+            max_delay: Flush handles that have waited this many seconds
+            on_failure: Called with (receipt_handle, failed_entry) for each failed delete
+            log_prefix: Prefix for log lines, e.g. "[DB]"
+        """
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.max_batch = max(1, min(max_batch, SQS_MAX_BATCH_SIZE))
+        self.max_delay = max_delay
+        self.on_failure = on_failure
+        self.log_prefix = log_prefix
+
+        self._pending = []  # (receipt_handle, buffered_at) in arrival order
+        self._retried = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+
+        # Stats
+        self.stats = {
+            "acks_buffered": 0,
+            "acks_deleted": 0,
+            "acks_failed": 0,
+            "batch_calls": 0,
+        }
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop, daemon=True, name=f"AckBuffer{log_prefix}"
+        )
+        self._flusher.start()
+
+    def add(self, receipt_handle: str):
+        """
+        Buffer a receipt handle for deletion
+
+        Args:
+            receipt_handle: SQS message receipt handle
+        """
+        with self._lock:
+            self._pending.append((receipt_handle, time.monotonic()))
+            self.stats["acks_buffered"] += 1
+            full = len(self._pending) >= self.max_batch
+            self._wakeup.notify()
+
+        # Size-triggered flushes run inline so a full batch never waits on the timer
+        if full or self._closed:
+            self.flush()
+
+    @property
+    def pending_count(self) -> int:
+        """Number of handles waiting to be deleted"""
+        return len(self._pending)
+
+    def _take(self, limit: int = None) -> List[str]:
+        """Remove up to limit handles from the buffer (caller holds the lock)"""
+        limit = len(self._pending) if limit is None else limit
+        taken, self._pending = self._pending[:limit], self._pending[limit:]
+        return [handle for handle, _ in taken]
+
+    def _age(self) -> float:
+        """Seconds the oldest buffered handle has waited (caller holds the lock)"""
+        return time.monotonic() - self._pending[0][1]
+
+    def flush(self) -> List[dict]:
+        """
+        Delete every buffered handle now
+
+        Returns:
+            list: Failed entries as returned by SQS (Id, Code, Message, SenderFault)
+        """
+        failures = []
+        while True:
+            # Loop so handles re-queued for a retry are flushed in the same call
+            with self._lock:
+                handles = self._take(SQS_MAX_BATCH_SIZE)
+            if not handles:
+                return failures
+            failures.extend(self._delete_batch(handles))
+
+    def _delete_batch(self, handles: List[str]) -> List[dict]:
+        """Issue one delete_message_batch call and report per-entry failures"""
+        if not handles:
+            return []
+
+        entries = [
+            {"Id": str(index), "ReceiptHandle": handle} for index, handle in enumerate(handles)
+        ]
+        self.stats["batch_calls"] += 1
+
+        try:
+            response = self.sqs_client.delete_message_batch(
+                QueueUrl=self.queue_url, Entries=entries
+            )
+        except Exception as e:
+            logger.error(f"❌ {self.log_prefix} delete_message_batch failed: {e}")
+            response = {
+                "Failed": [
+                    {
+                        "Id": entry["Id"],
+                        "Code": "RequestFailed",
+                        "Message": str(e),
+                        "SenderFault": False,
+                    }
+                    for entry in entries
+                ]
+            }
+
+        failed = response.get("Failed", [])
+        self.stats["acks_deleted"] += len(handles) - len(failed)
+
+        retry = []
+        given_up = []
+        # _retried is shared by the flush thread and callers of flush()
+        with self._lock:
+            if self._retried:
+                failed_ids = {entry["Id"] for entry in failed}
+                for entry in entries:
+                    if entry["Id"] not in failed_ids:
+                        self._retried.discard(entry["ReceiptHandle"])
+
+            for entry in failed:
+                handle = handles[int(entry["Id"])]
+                # Server-side failures are retried once; the message is redelivered otherwise
+                if not entry.get("SenderFault") and handle not in self._retried:
+                    self._retried.add(handle)
+                    retry.append(handle)
+                else:
+                    self._retried.discard(handle)
+                    given_up.append((handle, entry))
+
+            if retry:
+                now = time.monotonic()
+                self._pending.extend((handle, now) for handle in retry)
+
+        for entry in failed:
+            logger.warning(
+                f"⚠️ {self.log_prefix} Failed to delete message: "
+                f"{entry.get('Code')} - {entry.get('Message')}"
+            )
+        for handle, entry in given_up:
+            self.stats["acks_failed"] += 1
+            if self.on_failure:
+                self.on_failure(handle, entry)
+
+        return [entry for entry in failed if handles[int(entry["Id"])] not in retry]
+
+    def _flush_loop(self):
+        """Background thread that enforces the flush deadline"""
+        while True:
+            with self._lock:
+                while not self._closed and (not self._pending or self._age() < self.max_delay):
+                    timeout = self.max_delay - self._age() if self._pending else None
+                    self._wakeup.wait(timeout)
+
+                if self._closed:
+                    return
+                handles = self._take(SQS_MAX_BATCH_SIZE)
+
+            self._delete_batch(handles)
+
+    def close(self):
+        """Stop the deadline thread and flush whatever is left"""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+
+class VisibilityHeartbeat:
+    """Keep in-flight messages invisible while their handlers run"""
+
+    def __init__(
+        self,
+        sqs_client,
+        queue_url: str,
+        visibility_timeout: int,
+        interval: float = None,
+        max_hold: float = 1800.0,
+        log_prefix: str = "[SQS]",
+    ):
+        """
+        Initialize visibility heartbeat
+
+        Args:
+            sqs_client: boto3 SQS client
+            queue_url: Queue the receipt handles belong to
+            visibility_timeout: Seconds each extension keeps a message invisible
+            interval: Seconds between extensions (defaults to a third of the timeout)
+            max_hold: Stop extending a message after this many seconds so a hung
+                handler cannot hide it forever
+            log_prefix: Prefix for log lines, e.g. "[R53]"
+        """
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.interval = interval or max(1.0, visibility_timeout / 3)
+        self.max_hold = max_hold
+        self.log_prefix = log_prefix
+
+        self._inflight = {}  # receipt_handle -> monotonic time it was received
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Stats
+        self.stats = {
+            "extensions": 0,
+            "releases": 0,
+            "batch_calls": 0,
+            "failures": 0,
+            "expired": 0,
+        }
+
+        self._thread = threading.Thread(
+            target=self._heartbeat_loop, daemon=True, name=f"Heartbeat{log_prefix}"
+        )
+        self._thread.start()
+
+    def track(self, receipt_handles: List[str]):
+        """Start extending visibility for freshly received messages"""
+        now = time.monotonic()
+        with self._lock:
+            for handle in receipt_handles:
+                self._inflight[handle] = now
+
+    def untrack(self, receipt_handles: List[str]):
+        """Stop extending visibility (message done or acknowledged)"""
+        with self._lock:
+            for handle in receipt_handles:
+                self._inflight.pop(handle, None)
+
+    def release(self, receipt_handles: List[str], visibility_timeout: int = 0):
+        """
+        Stop extending and make messages visible again for a quick retry
+
+        Args:
+            receipt_handles: Handles of messages whose processing failed
+            visibility_timeout: Seconds until redelivery (0 = immediately)
+        """
+        self.untrack(receipt_handles)
+        failed = self._change_visibility(receipt_handles, visibility_timeout)
+        self.stats["releases"] += len(receipt_handles) - len(failed)
+
+    def _change_visibility(self, receipt_handles: List[str], visibility_timeout: int) -> List[str]:
+        """Issue change_message_visibility_batch calls; returns handles that failed"""
+        failed_handles = []
+        for start in range(0, len(receipt_handles), SQS_MAX_BATCH_SIZE):
+            handles = receipt_handles[start : start + SQS_MAX_BATCH_SIZE]
+            entries = [
+                {
+                    "Id": str(index),
+                    "ReceiptHandle": handle,
+                    "VisibilityTimeout": visibility_timeout,
+                }
+                for index, handle in enumerate(handles)
+            ]
+            self.stats["batch_calls"] += 1
+
+            try:
+                response = self.sqs_client.change_message_visibility_batch(
+                    QueueUrl=self.queue_url, Entries=entries
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ {self.log_prefix} change_message_visibility_batch failed: {e}")
+                self.stats["failures"] += len(handles)
+                failed_handles.extend(handles)
+                continue
+
+            for entry in response.get("Failed", []):
+                # Usually the message was already deleted or its receipt expired
+                logger.debug(
+                    f"{self.log_prefix} Visibility change failed: "
+                    f"{entry.get('Code')} - {entry.get('Message')}"
+                )
+                self.stats["failures"] += 1
+                failed_handles.append(handles[int(entry["Id"])])
+
+        return failed_handles
+
+    def _heartbeat_loop(self):
+        """Background thread that extends every in-flight message"""
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                expired = [
+                    handle
+                    for handle, received_at in self._inflight.items()
+                    if now - received_at > self.max_hold
+                ]
+                for handle in expired:
+                    del self._inflight[handle]
+                handles = list(self._inflight)
+
+            if expired:
+                self.stats["expired"] += len(expired)
+                logger.warning(
+                    f"⚠️ {self.log_prefix} Stopped extending {len(expired)} messages "
+                    f"held longer than {self.max_hold:.0f}s"
+                )
+            if not handles:
+                continue
+
+            failed = self._change_visibility(handles, self.visibility_timeout)
+            self.stats["extensions"] += len(handles) - len(failed)
+            if failed:
+                # Extending a deleted or expired handle will never succeed
+                self.untrack(failed)
+
+    def close(self):
+        """Stop the heartbeat thread"""
+        self._stop.set()
+        self._thread.join(timeout=5)
@@ -16,15 +16,38 @@ import logging
 import os
 import time
 from collections import defaultdict
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import boto3
-import psycopg2
-import requests
+from active_domains import get_active_domains
 from botocore.exceptions import ClientError, NoCredentialsError
-
-# Import domain helper functions
-from domain_helpers import get_tenant_for_domain
+from coalescer import AdaptiveCoalescer
+from db_pool import DatabasePool
+from dispatch_state import DispatchState
+from domain_helpers import (
+    bulk_activate_domains,
+    bulk_deactivate_domains,
+    ensure_hosted_zones_and_store,
+    get_tenants_for_domains,
+    is_deletable_record,
+)
+from github_client import get_github_client
+from idempotency import IDEMPOTENCY_ATTRIBUTES, get_idempotency_store
+from latency import TIMESTAMP_ATTRIBUTES, LatencyTracker
+from metrics import (
+    HANDLE_SECONDS,
+    MESSAGES_HANDLED,
+    MESSAGES_RECEIVED,
+    RECEIVE_SECONDS,
+    register_stats,
+    start_metrics_server,
+    track_pending,
+)
+from route53_changes import get_change_batcher
+from route53_executor import get_route53_client, get_route53_executor
+from sqs_batch import AckBuffer, VisibilityHeartbeat
+from tenant_cache import get_tenant_cache
+from zone_index import get_zone_index
 
 # Configure logging
 logging.basicConfig(
@@ -48,7 +71,7 @@ class SQSDNSWorker:
         environment: str = None,
         max_messages: int = 10,
         wait_time_seconds: int = 20,
-        batch_timeout: int = 30,
+        coalescer: AdaptiveCoalescer = None,
     ):
         """
         Initialize SQS DNS worker.
@@ -60,7 +83,7 @@ class SQSDNSWorker:
             repo: GitHub repository (e.g., "AITeeToolkit/aws-fargate-cdk")
             max_messages: Maximum messages to receive per poll (1-10)
             wait_time_seconds: Long polling wait time (0-20 seconds)
-            batch_timeout: Seconds to wait before processing incomplete batch
+            coalescer: Decides when the pending batch is processed (configured from env if omitted)
         """
         self.queue_url = queue_url or os.environ.get("SQS_DNS_OPERATIONS_QUEUE_URL")
         self.region_name = region_name or os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
@@ -73,7 +96,10 @@ class SQSDNSWorker:
 
         self.max_messages = min(max_messages, 10)  # SQS limit is 10
         self.wait_time_seconds = min(wait_time_seconds, 20)  # SQS limit is 20
-        self.batch_timeout = batch_timeout
+        # Messages stay invisible while their batch is open; the heartbeat keeps extending them
+        self.visibility_timeout = 60
+        self.retry_visibility_timeout = int(os.environ.get("SQS_RETRY_VISIBILITY_TIMEOUT", "0"))
+        self.coalescer = coalescer or AdaptiveCoalescer.from_env("SQSDNSWorker")
 
         if not self.queue_url:
             raise ValueError("SQS_DNS_OPERATIONS_QUEUE_URL must be configured")
@@ -82,14 +108,25 @@ class SQSDNSWorker:
 
         self.sqs_client = None
         self.route53_client = None
-        self.db_connection = None
+        self.r53 = None
+        self.changes = None
+        self.db_pool = None
+        self.zone_index = None
+        self.dispatch_state = None
+        self.active_domains = None
+        self.tenant_cache = None
+        self.acks = None
+        self.heartbeat = None
         self.running = False
 
         # Batch processing state
         self.pending_domains = set()
         self.pending_deactivations = set()
         self.domain_info_map = {}  # Store full domain info from SNS messages
-        self.last_batch_time = time.time()
+        self.pending_events = []  # (domain, action, message) awaiting the batch, for latency
+        # Receipt handles per pending domain; deleted only after the batch commits
+        self.pending_receipts = defaultdict(list)
+        self.batch_results = {}  # domain -> (zone ok, outcome) for the last processed batch
 
         # Statistics
         self.stats = {
@@ -99,9 +136,21 @@ class SQSDNSWorker:
             "hosted_zones_created": 0,
             "hosted_zones_deleted": 0,
             "github_triggers": 0,
+            "dispatches_skipped": 0,
             "start_time": None,
         }
 
+        # Metrics endpoint gauges
+        register_stats("SQSDNSWorker", lambda: self.stats)
+        self.latency = LatencyTracker("SQSDNSWorker")
+        # Applied events shared across replicas via Valkey
+        self.idempotency = get_idempotency_store(f"{self.environment}:SQSDNSWorker")
+        register_stats("SQSDNSWorker.latency", self.latency.stats)
+        track_pending("SQSDNSWorker", "pending_domains", lambda: len(self.pending_domains))
+        track_pending(
+            "SQSDNSWorker", "pending_deactivations", lambda: len(self.pending_deactivations)
+        )
+
     def connect(self) -> bool:
         """
         Connect to AWS services and database.
@@ -122,24 +171,35 @@ class SQSDNSWorker:
                 )
 
             self.sqs_client = boto3.client("sqs", **session_kwargs)
-            self.route53_client = boto3.client("route53", **session_kwargs)
+            # Route53 goes through the shared client, rate limiter and worker pool
+            self.route53_client = get_route53_client(self.region_name)
+            self.r53 = get_route53_executor()
+            self.changes = get_change_batcher(self.region_name)
+            self.acks = AckBuffer(self.sqs_client, self.queue_url)
+            self.heartbeat = VisibilityHeartbeat(
+                self.sqs_client, self.queue_url, self.visibility_timeout, log_prefix="[DNS]"
+            )
+            register_stats("SQSDNSWorker.heartbeat", lambda: self.heartbeat.stats)
 
             logger.info(f"Connected to AWS services in region {self.region_name}")
 
-            # Connect to database
+            # Connect to database (pooled, validated and reconnected on checkout)
             try:
-                self.db_connection = psycopg2.connect(
-                    host=os.environ["PGHOST"],
-                    user=os.environ["PGUSER"],
-                    password=os.environ["PGPASSWORD"],
-                    dbname=os.environ["PGDATABASE"],
-                    port=os.environ.get("PGPORT", "5432"),
-                )
+                self.db_pool = DatabasePool.from_env()
                 logger.info("✅ Database connection established")
             except Exception as e:
                 logger.error(f"❌ Failed to connect to database: {e}")
                 return False
 
+            # Shared hosted zone index, seeded from hosted_zone_ids
+            self.zone_index = get_zone_index(self.region_name, db_pool=self.db_pool)
+            # Last dispatched domain set, so unchanged sets are not dispatched again
+            self.dispatch_state = DispatchState(self.db_pool, self.environment)
+            # Active domains maintained from the domains change feed
+            self.active_domains = get_active_domains(self.db_pool)
+            # Committed changes are written through to the storefront tenant cache
+            self.tenant_cache = get_tenant_cache(self.environment)
+
             return True
 
         except NoCredentialsError:
@@ -158,14 +218,20 @@ class SQSDNSWorker:
             list: List of messages received from SQS
         """
         try:
-            response = self.sqs_client.receive_message(
-                QueueUrl=self.queue_url,
-                MaxNumberOfMessages=self.max_messages,
-                WaitTimeSeconds=self.wait_time_seconds,
-                MessageAttributeNames=["All"],
-            )
+            with RECEIVE_SECONDS.labels("SQSDNSWorker").time():
+                response = self.sqs_client.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=self.max_messages,
+                    # Wake up in time for the next batch flush
+                    WaitTimeSeconds=self.coalescer.poll_wait(self.wait_time_seconds),
+                    VisibilityTimeout=self.visibility_timeout,
+                    MessageAttributeNames=["All"],
+                    AttributeNames=TIMESTAMP_ATTRIBUTES + IDEMPOTENCY_ATTRIBUTES,
+                )
 
             messages = response.get("Messages", [])
+            MESSAGES_RECEIVED.labels("SQSDNSWorker").inc(len(messages))
+            self.heartbeat.track([message["ReceiptHandle"] for message in messages])
             if messages:
                 logger.debug(f"Received {len(messages)} messages from SQS")
 
@@ -194,8 +260,12 @@ class SQSDNSWorker:
         Args:
             message: SQS message dict (containing SNS notification)
 
+        Valid messages are held with the pending batch (their receipt handle is
+        tracked per domain) until the batch commits. Invalid messages are deleted
+        right away and messages that hit an unexpected error are released.
+
         Returns:
-            bool: True if message should be deleted from queue, False to retry
+            bool: True if the message joined the pending batch, False otherwise
         """
         try:
             # Parse SQS message body
@@ -223,6 +293,7 @@ class SQSDNSWorker:
                     f"❌ Invalid SNS message - missing required fields: {missing_fields}. "
                     f"Message: {domain_data}"
                 )
+                self.delete_message(message["ReceiptHandle"])
                 return False  # Delete invalid message, don't retry
 
             # Extract domain data
@@ -233,6 +304,7 @@ class SQSDNSWorker:
 
             if active not in ("Y", "N"):
                 logger.error(f"❌ Invalid active_status: {active}. Must be 'Y' or 'N'")
+                self.delete_message(message["ReceiptHandle"])
                 return False  # Delete invalid message
 
             logger.info(
@@ -264,61 +336,152 @@ class SQSDNSWorker:
                 if hasattr(self, "domain_info_map"):
                     self.domain_info_map.pop(domain_name, None)
 
+            self.pending_events.append(
+                (domain_name, "activate" if active == "Y" else "deactivate", message)
+            )
+            self.pending_receipts[domain_name].append(message["ReceiptHandle"])
             self.stats["messages_processed"] += 1
+            self.coalescer.add()
 
-            # Message processed successfully, can be deleted from queue
+            # Message buffered; deleted from the queue once its batch commits
             return True
 
         except json.JSONDecodeError as e:
             logger.error(f"❌ Failed to parse message JSON: {e}")
+            self.delete_message(message["ReceiptHandle"])
             return False  # Invalid JSON, don't retry
 
         except Exception as e:
             logger.error(f"❌ Error processing message: {e}")
-            return True  # Retry on unexpected errors
+            # Retry on unexpected errors
+            self.release_receipts([message["ReceiptHandle"]])
+            return False
 
     def delete_message(self, receipt_handle: str) -> bool:
         """
-        Delete a message from SQS queue.
+        Queue a message for deletion from SQS.
+
+        Deletes are grouped into delete_message_batch calls and flushed on size,
+        after a short deadline, and on shutdown; per-entry failures are logged.
 
         Args:
             receipt_handle: SQS message receipt handle
 
         Returns:
-            bool: True if message deleted successfully, False otherwise
+            bool: True if message was queued for deletion, False otherwise
         """
         try:
-            self.sqs_client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt_handle)
-            logger.debug("Message deleted from SQS queue")
+            self.heartbeat.untrack([receipt_handle])
+            self.acks.add(receipt_handle)
             return True
 
-        except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            logger.error(f"Error deleting SQS message: {error_code} - {e}")
-            return False
-
         except Exception as e:
             logger.error(f"Unexpected error deleting message: {e}")
             return False
 
+    def release_receipts(self, receipt_handles: List[str]):
+        """Make messages visible again so their domain change is retried"""
+        if receipt_handles:
+            self.heartbeat.release(receipt_handles, self.retry_visibility_timeout)
+
+    def settle_receipts(self, applied_domains: Set[str]):
+        """
+        Finish the messages of a closed batch
+
+        Messages for domains whose change was fully applied are deleted; the rest
+        are released for redelivery (and reach the DLQ after repeated failures).
+
+        Args:
+            applied_domains: Domains whose database update and zone change succeeded
+        """
+        retry = []
+        for domain, receipt_handles in self.pending_receipts.items():
+            if domain in applied_domains:
+                for receipt_handle in receipt_handles:
+                    self.delete_message(receipt_handle)
+                MESSAGES_HANDLED.labels("SQSDNSWorker", "success").inc(len(receipt_handles))
+            else:
+                retry.extend(receipt_handles)
+
+        if retry:
+            logger.warning(f"⚠️ Releasing {len(retry)} messages for retry")
+            MESSAGES_HANDLED.labels("SQSDNSWorker", "failure").inc(len(retry))
+            self.release_receipts(retry)
+        self.pending_receipts.clear()
+
     def fetch_active_domains_from_db(self) -> List[str]:
         """
         Fetch active domains from database.
 
+        Served from the change-feed backed set; waits until this batch's own
+        writes have been applied to it.
+
         Returns:
             list: List of active domain names
         """
         try:
-            cur = self.db_connection.cursor()
-            cur.execute("SELECT DISTINCT full_url FROM domains WHERE active_status = 'Y';")
-            result = [row[0] for row in cur.fetchall()]
-            cur.close()
-            logger.info(f"🌐 Fetched {len(result)} active domains from database")
+            self.active_domains.wait_for_latest()
+            version, domains = self.active_domains.snapshot()
+            result = sorted(domains)
+            logger.info(f"🌐 Fetched {len(result)} active domains (version {version})")
             return result
         except Exception as e:
             logger.error(f"❌ Failed to fetch active domains from database: {e}")
             return []
 
+    def apply_batch_to_db(self) -> Tuple[List[str], List[str]]:
+        """
+        Stage 1: write every pending activation and deactivation in one transaction
+
+        Falls back to per-domain updates if the set-based write fails, so one bad
+        row does not fail the whole batch.
+
+        Returns:
+            tuple: (deactivated domains, activated domains) committed to the database
+        """
+        deactivations = sorted(self.pending_deactivations)
+        activations = []
+        for domain in sorted(self.pending_domains):
+            domain_info = self.domain_info_map.get(domain)
+            if domain_info:
+                activations.append((domain, domain_info["tenant_id"]))
+            else:
+                logger.error(f"❌ No domain info found for {domain} in SNS message data")
+
+        # Events published without a tenant are resolved from purchased_domains in one query
+        unresolved = [domain for domain, tenant_id in activations if tenant_id is None]
+        if unresolved:
+            try:
+                tenants = get_tenants_for_domains(self.db_pool, unresolved)
+            except Exception as e:
+                logger.error(f"❌ Failed to resolve tenants for {len(unresolved)} domains: {e}")
+                tenants = {}
+            activations = [
+                (domain, tenant_id if tenant_id is not None else tenants.get(domain))
+                for domain, tenant_id in activations
+            ]
+            for domain, tenant_id in activations:
+                if tenant_id is not None and domain in self.domain_info_map:
+                    self.domain_info_map[domain]["tenant_id"] = tenant_id
+
+        try:
+            with self.db_pool.connection() as conn, conn.cursor() as cur:
+                bulk_deactivate_domains(cur, deactivations)
+                bulk_activate_domains(cur, activations)
+                conn.commit()
+
+        except Exception as e:
+            logger.error(f"❌ Batch database write failed, retrying domains individually: {e}")
+            deactivated = [d for d in deactivations if self.update_domain_deactivation(d)]
+            activated = [d for d, _ in activations if self.update_domain_activation(d)]
+            return deactivated, activated
+
+        logger.info(
+            f"✅ Database updated: {len(activations)} activations, "
+            f"{len(deactivations)} deactivations in one transaction"
+        )
+        return deactivations, [domain for domain, _ in activations]
+
     def update_domain_activation(self, domain_name: str) -> bool:
         """
         Update domains table to mark domain as active with tenant information from SNS message.
@@ -341,7 +504,7 @@ class SQSDNSWorker:
             hosted_zone_id = domain_info.get("hosted_zone_id")
 
             # Update domains table to mark as active (hosted_zone_id will be NULL initially)
-            with self.db_connection.cursor() as cur:
+            with self.db_pool.connection() as conn, conn.cursor() as cur:
                 cur.execute(
                     """
                     INSERT INTO domains (full_url, tenant_id, active_status, activation_date)
@@ -353,14 +516,13 @@ class SQSDNSWorker:
                     """,
                     (domain_name, tenant_id),
                 )
-                self.db_connection.commit()
+                conn.commit()
 
             logger.info(f"✅ Domain {domain_name} marked as active for tenant {tenant_id}")
             return True
 
         except Exception as e:
             logger.error(f"❌ Failed to update domain activation for {domain_name}: {e}")
-            self.db_connection.rollback()
             return False
 
     def update_domain_deactivation(self, domain_name: str) -> bool:
@@ -374,186 +536,143 @@ class SQSDNSWorker:
             bool: True if updated successfully
         """
         try:
-            # Test connection and reconnect if needed
-            try:
-                with self.db_connection.cursor() as test_cur:
-                    test_cur.execute("SELECT 1")
-                    test_cur.fetchone()
-            except Exception:
-                logger.warning("⚠️ Database connection lost, reconnecting...")
-                self.db_connection = psycopg2.connect(
-                    host=os.environ["PGHOST"],
-                    user=os.environ["PGUSER"],
-                    password=os.environ["PGPASSWORD"],
-                    dbname=os.environ["PGDATABASE"],
-                    port=os.environ.get("PGPORT", "5432"),
-                )
-                logger.info("✅ Database connection restored")
-
-            # Update domains table to mark as inactive with inactivation date
-            with self.db_connection.cursor() as cur:
+            # Pool checkout validates the connection and reconnects if it was lost
+            with self.db_pool.connection() as conn, conn.cursor() as cur:
                 cur.execute(
                     "UPDATE domains SET active_status = 'N', inactivation_date = CURRENT_DATE WHERE full_url = %s",
                     (domain_name,),
                 )
-                self.db_connection.commit()
+                conn.commit()
 
             logger.info(f"✅ Domain {domain_name} marked as inactive in database")
             return True
 
         except Exception as e:
             logger.error(f"❌ Failed to update domain deactivation for {domain_name}: {e}")
-            try:
-                self.db_connection.rollback()
-            except:
-                pass  # Connection might be dead
             return False
 
-    def ensure_hosted_zones(self, domains: List[str]) -> List[str]:
+    def sync_hosted_zones(
+        self, deactivated: List[str], activated: List[str]
+    ) -> Dict[str, Tuple[bool, str]]:
         """
-        Ensure hosted zones exist for all domains.
+        Stage 2: delete and ensure hosted zones for every domain in the batch at once
 
-        Args:
-            domains: List of domain names
-
-        Returns:
-            list: List of domains for which zones were created
-        """
-        created_zones = []
-
-        for domain in domains:
-            try:
-                # Check if hosted zone exists
-                response = self.route53_client.list_hosted_zones_by_name(DNSName=domain)
-                hosted_zones = response.get("HostedZones", [])
-
-                # Check if zone exists for this exact domain
-                existing_zone = next(
-                    (zone for zone in hosted_zones if zone["Name"] == f"{domain}."),
-                    None,
-                )
-
-                if existing_zone:
-                    logger.info(
-                        f"🔍 Hosted zone already exists for {domain}: {existing_zone['Id']}"
-                    )
-                    continue
-
-                # Create hosted zone if it doesn't exist
-                caller_reference = f"{domain}-{int(time.time())}"
-                response = self.route53_client.create_hosted_zone(
-                    Name=domain,
-                    CallerReference=caller_reference,
-                    HostedZoneConfig={
-                        "Comment": f"Auto-created by SQS DNS worker for {domain}",
-                        "PrivateZone": False,
-                    },
-                )
-
-                zone_id = response["HostedZone"]["Id"]
-                created_zones.append(domain)
-                self.stats["hosted_zones_created"] += 1
-                logger.info(f"✅ Created hosted zone for {domain}: {zone_id}")
-
-            except Exception as e:
-                logger.error(f"❌ Failed to create hosted zone for {domain}: {e}")
-
-        return created_zones
-
-    def delete_hosted_zones(self, domains: List[str]) -> List[str]:
-        """
-        Delete hosted zones for deactivated domains.
+        Zone operations run concurrently on the shared Route53 executor, which
+        keeps the whole process under Route53's per-account rate limit. Activated
+        domains are ensured in one call that also stores their hosted_zone_ids rows.
 
         Args:
-            domains: List of domain names to delete hosted zones for
+            deactivated: Domains deactivated in the database
+            activated: Domains activated in the database
 
         Returns:
-            list: List of domains for which zones were deleted
+            dict: domain -> (zone operation succeeded, outcome description)
         """
-        deleted_zones = []
+        outcomes = {}
+        for domain, deleted, error in self.r53.map(self._delete_hosted_zone, deactivated):
+            if error:
+                outcomes[domain] = (False, f"deactivated, zone deletion failed: {error}")
+            else:
+                outcomes[domain] = (True, f"deactivated, zone {'deleted' if deleted else 'kept'}")
 
-        for domain in domains:
-            try:
-                # Find the hosted zone
-                response = self.route53_client.list_hosted_zones_by_name(DNSName=domain)
-                hosted_zones = response.get("HostedZones", [])
-                zone = next((z for z in hosted_zones if z["Name"] == f"{domain}."), None)
+        if not activated:
+            return outcomes
 
-                if not zone:
-                    logger.warning(f"⚠️ No hosted zone found for {domain}, nothing to delete")
-                    continue
+        created = set()
 
-                zone_id = zone["Id"].split("/")[-1]  # Clean zone ID
-
-                # Get all record sets
-                record_sets = self.route53_client.list_resource_record_sets(HostedZoneId=zone_id)
-
-                changes = []
-                for record in record_sets["ResourceRecordSets"]:
-                    record_type = record["Type"]
-                    record_name = record["Name"]
-
-                    if record_type in ["A", "MX", "TXT", "CNAME"]:
-                        logger.info(f"🗑️ Scheduling deletion for {record_type} record {record_name}")
-                        changes.append({"Action": "DELETE", "ResourceRecordSet": record})
-
-                # Batch delete records (skip SOA/NS, they are required for the zone)
-                if changes:
-                    self.route53_client.change_resource_record_sets(
-                        HostedZoneId=zone_id, ChangeBatch={"Changes": changes}
-                    )
-                    logger.info(f"✅ Deleted {len(changes)} records from zone {zone_id} ({domain})")
-
-                # Delete the hosted zone itself
-                # TODO: Temporarily disabled - keeping hosted zones but deleting records
-                # self.route53_client.delete_hosted_zone(Id=zone_id)
-                # deleted_zones.append(domain)
-                # self.stats['hosted_zones_deleted'] += 1
-                # logger.info(f"✅ Deleted hosted zone {zone_id} for {domain}")
-                logger.info(
-                    f"⚠️ Skipped hosted zone deletion for {domain} (zone_id: {zone_id}) - only deleted records"
+        def on_created(domain, response):
+            # The workflow dispatch waits for these to go INSYNC
+            self.changes.track(response["ChangeInfo"])
+            self.stats["hosted_zones_created"] += 1
+            created.add(domain)
+
+        zones = ensure_hosted_zones_and_store(
+            self.db_pool,
+            activated,
+            self.region_name,
+            created_by="SQS DNS worker",
+            on_created=on_created,
+        )
+        for domain in activated:
+            hosted_zone_id, zone_id = zones[domain]
+            if zone_id is None:
+                outcomes[domain] = (False, "activated, zone lookup or creation failed")
+            elif hosted_zone_id is None:
+                outcomes[domain] = (False, f"activated, zone {zone_id} not stored")
+            else:
+                outcomes[domain] = (
+                    True,
+                    f"activated, zone {'created' if domain in created else 'exists'}",
                 )
+        return outcomes
 
-            except Exception as e:
-                logger.error(f"❌ Failed to delete hosted zone for {domain}: {e}")
+    def _delete_hosted_zone(self, domain: str) -> bool:
+        """Delete the records (and eventually the zone) for one domain; True if zone deleted"""
+        # Find the hosted zone (clean zone ID from the index)
+        zone_id = self.zone_index.get_zone_id(domain)
 
-        return deleted_zones
+        if not zone_id:
+            logger.warning(f"⚠️ No hosted zone found for {domain}, nothing to delete")
+            return False
+
+        # Delete records page by page in chunked batches (skip SOA/NS, they are required)
+        deleted = self.changes.delete_records(zone_id, is_deletable_record)
+        if deleted:
+            logger.info(f"✅ Deleted {deleted} records from zone {zone_id} ({domain})")
+
+        # Delete the hosted zone itself
+        # TODO: Temporarily disabled - keeping hosted zones but deleting records
+        # self.r53.call(self.route53_client.delete_hosted_zone, Id=zone_id)
+        # self.zone_index.remove(domain)
+        # self.stats['hosted_zones_deleted'] += 1
+        # logger.info(f"✅ Deleted hosted zone {zone_id} for {domain}")
+        # return True
+        logger.info(
+            f"⚠️ Skipped hosted zone deletion for {domain} (zone_id: {zone_id}) - only deleted records"
+        )
+        return False
 
     def trigger_github_workflow(self, domains: List[str]) -> bool:
         """
         Trigger GitHub workflow via repository dispatch API.
-        Infrastructure will read active domains directly from database.
+        Infrastructure will read active domains directly from database; the
+        dispatch carries the domain set hash and the delta since the last one.
 
         Args:
-            domains: List of active domains (for logging only)
+            domains: List of active domains
 
         Returns:
-            bool: True if triggered successfully
+            bool: True if triggered successfully (or the set was already dispatched)
         """
         try:
-            headers = {
-                "Authorization": f"token {self.github_token}",
-                "Accept": "application/vnd.github.v3+json",
-            }
-
-            # Trigger workflow via repository dispatch
-            url = f"https://api.github.com/repos/{self.repo}/dispatches"
-            payload = {
-                "event_type": "domain-update",
-                "client_payload": {
-                    "environment": self.environment,
-                    "domain_count": len(domains),
-                    "triggered_at": time.time(),
-                    "skip_tests": True,  # Domain updates don't need tests
-                },
-            }
-
-            r = requests.post(url, headers=headers, json=payload)
-            r.raise_for_status()
+            # The workflow reads DNS state, so let this batch's zone changes go INSYNC first
+            # (before taking the lock, so other tasks are not held up by the wait)
+            if not self.changes.wait_for_insync():
+                logger.warning("⚠️ Triggering workflow before all Route53 changes are INSYNC")
+
+            # Other tasks wait here and then see this dispatch as already recorded
+            with self.dispatch_state.lock() as cur:
+                plan = self.dispatch_state.plan(cur, domains)
+                if plan is None:
+                    self.stats["dispatches_skipped"] += 1
+                    return True
+
+                # Trigger workflow via repository dispatch (pooled session, timeouts, retries)
+                get_github_client(self.github_token).dispatch(
+                    self.repo,
+                    "domain-update",
+                    plan.client_payload(
+                        environment=self.environment,
+                        triggered_at=time.time(),
+                        skip_tests=True,  # Domain updates don't need tests
+                    ),
+                )
+                self.dispatch_state.record(cur, plan)
 
             self.stats["github_triggers"] += 1
             logger.info(
                 f"✅ Triggered GitHub workflow for {self.environment} environment with {len(domains)} domains"
+                f" (+{len(plan.added)} -{len(plan.removed)})"
             )
             return True
 
@@ -564,7 +683,10 @@ class SQSDNSWorker:
     def process_batch(self) -> bool:
         """
         Process the current batch of pending domains.
-        Handles both activations and deactivations, then fetches ALL active domains.
+
+        Stages: one database transaction for the whole batch, concurrent zone
+        deletes/creates for every committed domain, then one fetch of ALL active
+        domains and one workflow dispatch. Outcomes are logged per domain.
 
         Returns:
             bool: True if batch processed successfully
@@ -579,50 +701,34 @@ class SQSDNSWorker:
         )
 
         try:
-            successful_operations = False
-
-            # Step 1: Process deactivations first
-            if self.pending_deactivations:
-                for domain in self.pending_deactivations:
-                    # Update database first
-                    db_success = self.update_domain_deactivation(domain)
-                    if db_success:
-                        successful_operations = True
-                        # Only delete hosted zone if database update succeeded
-                        deleted_zones = self.delete_hosted_zones([domain])
-                        if deleted_zones:
-                            logger.info(f"✅ Atomically deactivated domain: {domain}")
-                        else:
-                            logger.warning(
-                                f"⚠️ Database updated but hosted zone deletion failed for: {domain}"
-                            )
-                    else:
-                        logger.error(f"❌ Failed to deactivate domain in database: {domain}")
-
-            # Step 2: Process activations
-            if self.pending_domains:
-                for domain in self.pending_domains:
-                    # Update database first
-                    db_success = self.update_domain_activation(domain)
-                    if db_success:
-                        successful_operations = True
-                        # Only create hosted zone if database update succeeded
-                        created_zones = self.ensure_hosted_zones([domain])
-                        if created_zones:
-                            logger.info(f"✅ Atomically activated domain: {domain}")
-                        else:
-                            logger.warning(
-                                f"⚠️ Database updated but hosted zone creation failed for: {domain}"
-                            )
-                    else:
-                        logger.error(f"❌ Failed to activate domain in database: {domain}")
+            # Step 1: One set-based transaction for the whole batch
+            deactivated, activated = self.apply_batch_to_db()
+            self.publish_tenant_changes(deactivated, activated)
+
+            # Step 2: Zone deletes and creates for all committed domains, concurrently;
+            # only domains whose database update succeeded get zone changes
+            outcomes = self.sync_hosted_zones(deactivated, activated)
+            for domain in sorted(self.pending_domains | self.pending_deactivations):
+                ok, outcome = outcomes.get(domain, (False, "database update failed"))
+                if ok:
+                    logger.info(f"✅ {domain}: {outcome}")
+                else:
+                    logger.warning(f"⚠️ {domain}: {outcome}")
+            self.batch_results = outcomes
+            # A domain is applied once both its DB row and its zone are updated; the
+            # rest are redelivered and their (idempotent) DB update and zone step retried
+            applied = {domain for domain, (ok, _) in outcomes.items() if ok}
+
+            successful_operations = bool(deactivated or activated)
 
             # Step 3: Only trigger workflow if there were successful database operations
             if not successful_operations:
                 logger.warning("⚠️ No successful operations in batch - skipping workflow trigger")
-                # Clear pending domains even on failure to avoid retry loops
+                # Clear pending domains; their messages are redelivered (then dead-lettered)
+                self.settle_receipts(set())
                 self.pending_domains.clear()
                 self.pending_deactivations.clear()
+                self.pending_events.clear()
                 return False
 
             # Step 4: Fetch ALL active domains from database (reflects current state)
@@ -637,32 +743,96 @@ class SQSDNSWorker:
                 logger.info(
                     f"✅ Successfully processed batch: {len(all_active_domains)} total active domains"
                 )
+                latency = self.latency.format()
+                if latency:
+                    logger.info(f"⏱️ Latency: {latency}")
 
-                # Clear pending domains (batch complete)
+                # Changes are live: mark and delete applied messages (batch complete)
+                self.record_applied(applied)
+                self.settle_receipts(applied)
                 self.pending_domains.clear()
                 self.pending_deactivations.clear()
-                self.last_batch_time = time.time()
+                self.pending_events.clear()
                 return True
             else:
                 logger.error(f"❌ Failed to process batch of {len(all_active_domains)} domains")
+                # Release the whole batch; redelivery re-applies it and retries the dispatch
+                self.settle_receipts(set())
+                self.pending_domains.clear()
+                self.pending_deactivations.clear()
+                self.pending_events.clear()
                 return False
         except Exception as e:
             logger.error(f"❌ Error processing batch: {e}")
             return False
 
-    def should_process_batch(self) -> bool:
+    def publish_tenant_changes(self, deactivated: List[str], activated: List[str]):
+        """
+        Write committed domain changes through to the tenant cache
+
+        Args:
+            deactivated: Domains committed as inactive
+            activated: Domains committed as active
+        """
+
+        def tenant_of(domain):
+            return self.domain_info_map.get(domain, {}).get("tenant_id")
+
+        self.tenant_cache.publish_changes(
+            activations=[(domain, tenant_of(domain)) for domain in activated],
+            deactivations=[(domain, tenant_of(domain)) for domain in deactivated],
+        )
+
+    def record_applied(self, applied_domains: Set[str]):
+        """
+        Record latency and idempotency for buffered messages whose change was applied
+
+        Args:
+            applied_domains: Domains whose database update and zone change succeeded
+        """
+        applied_at = time.time()
+        remaining = []
+        for domain, action, message in self.pending_events:
+            if domain in applied_domains:
+                self.latency.record(message, action, applied_at)
+                self.idempotency.mark(message)
+            else:
+                remaining.append((domain, action, message))
+        self.pending_events = remaining
+
+    def pending_count(self) -> int:
+        """Number of domains waiting in the current batch"""
+        return len(self.pending_domains) + len(self.pending_deactivations)
+
+    def should_process_batch(self) -> Optional[str]:
         """
         Determine if we should process the current batch.
 
         Returns:
-            bool: True if batch should be processed now
+            str: Flush trigger ("quiet", "max_wait" or "size"), or None to keep batching
         """
-        if not self.pending_domains and not self.pending_deactivations:
-            return False
+        return self.coalescer.flush_reason(self.pending_count())
 
-        # Process if we have pending changes and timeout has elapsed
-        time_since_last_batch = time.time() - self.last_batch_time
-        return time_since_last_batch >= self.batch_timeout
+    def flush_batch(self, reason: str) -> bool:
+        """
+        Process the pending batch and report the outcome to the coalescer
+
+        Args:
+            reason: Flush trigger from should_process_batch
+
+        Returns:
+            bool: True if batch processed successfully
+        """
+        size = self.pending_count()
+        with HANDLE_SECONDS.labels("SQSDNSWorker").time():
+            processed = self.process_batch()
+
+        if processed or not self.pending_count():
+            self.coalescer.flushed(reason, size)
+        else:
+            # Retry once the batch has been quiet again rather than on every poll
+            self.coalescer.failed()
+        return processed
 
     def run(self):
         """
@@ -685,15 +855,21 @@ class SQSDNSWorker:
 
                     # Process each message (add to batch)
                     for message in messages:
+                        if self.idempotency.is_duplicate(message):
+                            MESSAGES_HANDLED.labels("SQSDNSWorker", "duplicate").inc()
+                            self.delete_message(message["ReceiptHandle"])
+                            continue
                         try:
                             self.process_message(message)
                         except Exception as e:
                             logger.error(f"Error processing individual message: {e}")
+                            self.release_receipts([message["ReceiptHandle"]])
                             continue
 
                     # Check if we should process the batch
-                    if self.should_process_batch():
-                        self.process_batch()
+                    reason = self.should_process_batch()
+                    if reason:
+                        self.flush_batch(reason)
 
                 except KeyboardInterrupt:
                     logger.info("Received interrupt signal. Processing final batch...")
@@ -716,13 +892,21 @@ class SQSDNSWorker:
         self.running = False
         logger.info("Stop signal sent to SQS DNS worker")
 
-        # Close database connection
-        if self.db_connection:
-            try:
-                self.db_connection.close()
-                logger.info("Database connection closed")
-            except Exception as e:
-                logger.error(f"Error closing database connection: {e}")
+        # Hand messages of the unfinished batch back to the queue
+        if self.heartbeat:
+            self.release_receipts(
+                [handle for handles in self.pending_receipts.values() for handle in handles]
+            )
+            self.pending_receipts.clear()
+            self.heartbeat.close()
+
+        # Flush buffered acknowledgements
+        if self.acks:
+            self.acks.close()
+
+        # Close database connections
+        if self.db_pool:
+            self.db_pool.close()
 
     def print_stats(self):
         """Print worker statistics."""
@@ -736,6 +920,9 @@ class SQSDNSWorker:
         logger.info(f"GitHub triggers: {stats['github_triggers']}")
         if stats.get("uptime_seconds"):
             logger.info(f"Uptime: {stats['uptime_seconds']:.1f} seconds")
+        latency = self.latency.format()
+        if latency:
+            logger.info(f"Latency: {latency}")
         logger.info("================================")
 
     def get_stats(self) -> Dict[str, Any]:
@@ -743,12 +930,14 @@ class SQSDNSWorker:
         stats = self.stats.copy()
         if stats["start_time"]:
             stats["uptime_seconds"] = time.time() - stats["start_time"]
+        stats["latency"] = self.latency.percentiles()
         return stats
 
 
 def main():
     """Main entry point for SQS DNS worker."""
     worker = SQSDNSWorker()
+    start_metrics_server()
 
     try:
         worker.run()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Worker Supervisor - Keeps control plane workers running
+
+Responsibilities:
+- Build workers from factories and replace ones that die or stop heartbeating
+- Back off exponentially between restarts and enforce a restart budget
+- Optionally isolate each worker in its own process, serving its metrics on its own port
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict
+
+from metrics import DEFAULT_METRICS_PORT, register_stats, start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+
+class RestartBudgetExceeded(RuntimeError):
+    """A worker failed more often than the restart budget allows"""
+
+
+def _run_worker_process(factory: Callable, heartbeat, metrics_port: int = None):
+    """Child process entry point: serve metrics, build the worker here and run its loop inline"""
+    if metrics_port:
+        try:
+            start_metrics_server(metrics_port)
+        except OSError as e:
+            # A replaced child may still be releasing the port; the worker runs regardless
+            logger.warning(f"⚠️ Metrics port {metrics_port} unavailable: {e}")
+    worker = factory()
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+
+    def publish_heartbeat():
+        while True:
+            heartbeat.value = worker.last_heartbeat
+            time.sleep(1)
+
+    threading.Thread(target=publish_heartbeat, daemon=True, name="Heartbeat").start()
+    worker.run()
+
+
+class WorkerProcess:
+    """
+    Thread-like handle for a worker running in a child process
+
+    Children are spawned, not forked: the parent already runs background
+    threads, and a forked child can deadlock on a lock one of them held at
+    fork time.
+    """
+
+    def __init__(self, name: str, factory: Callable, metrics_port: int = None):
+        """
+        Initialize worker process handle
+
+        Args:
+            name: Worker name, also used as the process name
+            factory: Builds the worker inside the child process (must be picklable)
+            metrics_port: Port the child serves its own metrics on (None to skip)
+        """
+        self.name = name
+        context = multiprocessing.get_context("spawn")
+        self._heartbeat = context.Value("d", time.monotonic(), lock=False)
+        self._process = context.Process(
+            target=_run_worker_process,
+            args=(factory, self._heartbeat, metrics_port),
+            name=name,
+            daemon=True,
+        )
+
+    @property
+    def last_heartbeat(self) -> float:
+        """Monotonic time of the child's last loop iteration"""
+        return self._heartbeat.value
+
+    @property
+    def last_error(self) -> str:
+        """Exit reason once the child has died"""
+        exitcode = self._process.exitcode
+        return None if exitcode in (None, 0) else f"process exited with code {exitcode}"
+
+    def start(self):
+        self._process.start()
+
+    def is_alive(self) -> bool:
+        return self._process.is_alive()
+
+    def stop(self):
+        """Ask the child to stop gracefully (SIGTERM)"""
+        if self._process.is_alive():
+            self._process.terminate()
+
+    def join(self, timeout: float = None):
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.kill()
+
+
+class WorkerSupervisor:
+    """Start workers and rebuild them with exponential backoff when they fail"""
+
+    def __init__(
+        self,
+        factories: Dict[str, Callable],
+        isolation: str = "thread",
+        check_interval: float = 5.0,
+        stall_timeout: float = 600.0,
+        base_backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        stable_after: float = 300.0,
+        restart_budget: int = 5,
+        budget_window: float = 900.0,
+        metrics_port: int = None,
+    ):
+        """
+        Initialize worker supervisor
+
+        Args:
+            factories: Worker name -> callable returning a new, unstarted worker
+            isolation: "thread" runs workers in this process, "process" spawns one per worker
+            check_interval: Seconds between health checks
+            stall_timeout: Seconds without a loop heartbeat before a worker counts as stuck
+            base_backoff: Delay before the first restart
+            max_backoff: Cap for the restart delay
+            stable_after: Uptime after which a worker's backoff resets
+            restart_budget: Restarts allowed per worker within budget_window
+            budget_window: Sliding window for the restart budget in seconds
+            metrics_port: First metrics port for worker processes (one per worker, in
+                factory order); process metrics are not in the parent's registry
+        """
+        if isolation not in ("thread", "process"):
+            raise ValueError(f"Unknown worker isolation mode: {isolation}")
+
+        self.factories = factories
+        self.isolation = isolation
+        self.check_interval = check_interval
+        self.stall_timeout = stall_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.restart_budget = restart_budget
+        self.budget_window = budget_window
+        self.metrics_port = metrics_port
+
+        self.workers = {}  # name -> running worker (thread or WorkerProcess)
+        self._started_at = {}
+        self._failures = {}  # name -> consecutive failures
+        self._restart_at = {}  # name -> monotonic time of the scheduled restart
+        self._restart_times = {name: deque() for name in factories}
+        self._stop = threading.Event()
+
+        # Restart counts and last failure reasons per worker
+        self.status = {
+            name: {"restarts": 0, "last_failure": None, "last_failure_at": None}
+            for name in factories
+        }
+        register_stats(
+            "supervisor",
+            lambda: {
+                f"{name}_restarts": status["restarts"] for name, status in self.status.items()
+            },
+        )
+
+    def _build(self, name: str):
+        """Create and start a fresh worker"""
+        if self.isolation == "process":
+            worker = WorkerProcess(name, self.factories[name], self._metrics_port(name))
+        else:
+            worker = self.factories[name]()
+        worker.start()
+        self.workers[name] = worker
+        self._started_at[name] = time.monotonic()
+        return worker
+
+    def _metrics_port(self, name: str) -> int:
+        """Metrics port of a worker process (stable across restarts)"""
+        if not self.metrics_port:
+            return None
+        return self.metrics_port + list(self.factories).index(name)
+
+    def start(self):
+        """Start every worker"""
+        for name in self.factories:
+            self._build(name)
+            if self.isolation == "process" and self.metrics_port:
+                logger.info(f"🔄 Started {name} (process, metrics on :{self._metrics_port(name)})")
+            else:
+                logger.info(f"🔄 Started {name} ({self.isolation})")
+
+    def _failure_reason(self, worker) -> str:
+        """Describe why a worker is being replaced, or None if it is healthy"""
+        if not worker.is_alive():
+            return getattr(worker, "last_error", None) or "worker exited"
+
+        heartbeat_age = time.monotonic() - worker.last_heartbeat
+        if heartbeat_age > self.stall_timeout:
+            return f"no heartbeat for {heartbeat_age:.0f}s"
+        return None
+
+    def _record_failure(self, name: str, reason: str):
+        """Record a failure and schedule the restart with exponential backoff"""
+        now = time.monotonic()
+
+        # A worker that stayed up long enough starts its backoff over
+        if now - self._started_at.get(name, now) >= self.stable_after:
+            self._failures[name] = 0
+        self._failures[name] = self._failures.get(name, 0) + 1
+
+        restarts = self._restart_times[name]
+        while restarts and now - restarts[0] > self.budget_window:
+            restarts.popleft()
+        if len(restarts) >= self.restart_budget:
+            raise RestartBudgetExceeded(
+                f"{name} failed {len(restarts) + 1} times in {self.budget_window:.0f}s: {reason}"
+            )
+
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (self._failures[name] - 1))
+        self._restart_at[name] = now + delay
+        self.status[name]["last_failure"] = reason
+        self.status[name]["last_failure_at"] = time.time()
+        logger.error(f"❌ Worker {name} failed ({reason}), restarting in {delay:.0f}s")
+
+    def check(self):
+        """Detect failed workers and restart the ones whose backoff has elapsed"""
+        now = time.monotonic()
+        for name in self.factories:
+            if name in self._restart_at:
+                if now < self._restart_at[name]:
+                    continue
+                del self._restart_at[name]
+                self._restart_times[name].append(now)
+                self.status[name]["restarts"] += 1
+                try:
+                    self._build(name)
+                except Exception as e:
+                    self._record_failure(name, f"restart failed: {e}")
+                    continue
+                logger.info(f"🔄 Restarted {name} (restart #{self.status[name]['restarts']})")
+                continue
+
+            worker = self.workers[name]
+            reason = self._failure_reason(worker)
+            if reason:
+                # A stuck thread cannot be killed; ask it to stop and stop tracking it
+                worker.stop()
+                del self.workers[name]
+                self._record_failure(name, reason)
+
+    def run(self):
+        """
+        Supervise until stop() is called
+
+        Raises:
+            RestartBudgetExceeded: When a worker keeps failing, so the task itself is replaced
+        """
+        while not self._stop.wait(self.check_interval):
+            self.check()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop supervising and shut every worker down"""
+        self._stop.set()
+        workers = list(self.workers.values())
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            if worker.is_alive():
+                worker.join(timeout=timeout)
+
+    @classmethod
+    def from_env(cls, factories: Dict[str, Callable]) -> "WorkerSupervisor":
+        """Create a supervisor configured from WORKER_* environment variables"""
+        return cls(
+            factories,
+            isolation=os.environ.get("WORKER_ISOLATION", "thread"),
+            stall_timeout=float(os.environ.get("WORKER_STALL_TIMEOUT", "600")),
+            max_backoff=float(os.environ.get("WORKER_MAX_BACKOFF", "300")),
+            restart_budget=int(os.environ.get("WORKER_RESTART_BUDGET", "5")),
+            budget_window=float(os.environ.get("WORKER_RESTART_WINDOW", "900")),
+            # Worker processes serve metrics on the ports after the main endpoint
+            metrics_port=int(
+                os.environ.get(
+                    "WORKER_METRICS_PORT",
+                    int(os.environ.get("METRICS_PORT", DEFAULT_METRICS_PORT)) + 1,
+                )
+            ),
+        )
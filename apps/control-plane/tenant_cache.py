@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Tenant Cache - Write-through domain → tenant map in Valkey for storefront tenant resolution
+
+Responsibilities:
+- Publish every committed activation/deactivation into one Valkey hash per environment
+- Version each entry so an older write (or a slow rebuild) never overwrites a newer one
+- Rebuild the hash from the domains table by streaming it with a server-side cursor
+
+Layout (read by the web service with a single HGET):
+    tenant:{env}:domains  field full_url  →  "{version}|{active_status}|{tenant_id}"
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+from cache_client import get_valkey_client
+from db_pool import DatabasePool
+from metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+# Applies (field, value, version) triples, skipping fields that already hold a newer version
+PUBLISH_SCRIPT = """
+local applied = 0
+for i = 1, #ARGV, 3 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    local version = current and tonumber(string.match(current, '^(%d+)|')) or -1
+    if tonumber(ARGV[i + 2]) >= version then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+        applied = applied + 1
+    end
+end
+return applied
+"""
+
+DEFAULT_REBUILD_BATCH = 1000  # rows fetched per round-trip and entries per publish
+
+
+def cache_key(environment: str) -> str:
+    """Valkey hash holding the environment's domain → tenant map"""
+    return f"tenant:{environment}:domains"
+
+
+def current_version() -> int:
+    """Version for a write committed now (milliseconds since the epoch)"""
+    return time.time_ns() // 1_000_000
+
+
+def encode_entry(version: int, active_status: str, tenant_id) -> str:
+    return f"{version}|{active_status}|{'' if tenant_id is None else tenant_id}"
+
+
+def decode_entry(value: str) -> Tuple[int, str, Optional[str]]:
+    """
+    Split a hash value into its parts
+
+    Returns:
+        tuple: (version, active_status, tenant_id or None)
+    """
+    version, active_status, tenant_id = value.split("|", 2)
+    return int(version), active_status, tenant_id or None
+
+
+class TenantCache:
+    """Versioned domain → (tenant_id, status) hash kept current by the control plane"""
+
+    def __init__(self, client, environment: str):
+        """
+        Initialize tenant cache
+
+        Args:
+            client: Valkey client (None disables publishing)
+            environment: Environment the hash belongs to
+        """
+        self.client = client
+        self.environment = environment
+        self.key = cache_key(environment)
+        self._publish = client.register_script(PUBLISH_SCRIPT) if client is not None else None
+
+        # Stats
+        self.stats = {
+            "published": 0,
+            "stale_skipped": 0,
+            "errors": 0,
+            "rebuilds": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    def publish(self, entries: Iterable[Tuple[str, object, str]], version: int = None) -> int:
+        """
+        Write committed domain states into the hash
+
+        Cache errors are logged and swallowed: the database stays the source of
+        truth and the next write or rebuild repairs the entry.
+
+        Args:
+            entries: (full_url, tenant_id, active_status) tuples
+            version: Version of the writes (defaults to now)
+
+        Returns:
+            int: Entries written (stale and failed entries are not counted)
+        """
+        if not self.enabled:
+            return 0
+        version = current_version() if version is None else version
+
+        args = []
+        for full_url, tenant_id, active_status in entries:
+            args.extend((full_url, encode_entry(version, active_status, tenant_id), version))
+        if not args:
+            return 0
+
+        try:
+            applied = int(self._publish(keys=[self.key], args=args))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ Failed to publish {len(args) // 3} domains to tenant cache: {e}")
+            return 0
+
+        self.stats["published"] += applied
+        self.stats["stale_skipped"] += len(args) // 3 - applied
+        return applied
+
+    def publish_changes(self, activations=(), deactivations=()) -> int:
+        """
+        Publish a committed batch of activations and deactivations
+
+        Args:
+            activations: (full_url, tenant_id) tuples that are now active
+            deactivations: full_urls, or (full_url, tenant_id) tuples, that are now inactive
+
+        Returns:
+            int: Entries written
+        """
+        entries = [(full_url, tenant_id, "Y") for full_url, tenant_id in activations]
+        for deactivation in deactivations:
+            full_url, tenant_id = (
+                deactivation if isinstance(deactivation, tuple) else (deactivation, None)
+            )
+            entries.append((full_url, tenant_id, "N"))
+        return self.publish(entries)
+
+    def lookup(self, full_url: str) -> Optional[Tuple[str, str]]:
+        """
+        Resolve a domain the way the web service does
+
+        Returns:
+            tuple: (tenant_id, active_status), or None if the domain is not cached
+        """
+        value = self.client.hget(self.key, full_url)
+        if value is None:
+            return None
+        _, active_status, tenant_id = decode_entry(value)
+        return tenant_id, active_status
+
+    def is_empty(self) -> bool:
+        return not self.client.exists(self.key)
+
+    def rebuild(self, db_pool, batch_size: int = DEFAULT_REBUILD_BATCH) -> int:
+        """
+        Reload the hash from the domains table
+
+        Rows are streamed through a named (server-side) cursor so memory stays
+        flat however large the table is. Entries are written at the version the
+        scan started, so changes published while it runs are kept. Afterwards,
+        fields for domains no longer in the table are removed.
+
+        Args:
+            db_pool: DatabasePool to stream the table from
+            batch_size: Rows per fetch and entries per publish
+
+        Returns:
+            int: Domains loaded from the table
+        """
+        version = current_version()
+        seen = set()
+        loaded = 0
+
+        with db_pool.connection() as conn:
+            with conn.cursor(name="tenant_cache_rebuild") as cur:
+                cur.itersize = batch_size
+                cur.execute("SELECT full_url, tenant_id, COALESCE(active_status, 'N') FROM domains")
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    self.publish(rows, version=version)
+                    seen.update(row[0] for row in rows)
+                    loaded += len(rows)
+            conn.rollback()
+
+        removed = 0
+        for field, value in self.client.hscan_iter(self.key, count=batch_size):
+            if field not in seen and decode_entry(value)[0] < version:
+                removed += self.client.hdel(self.key, field)
+
+        self.stats["rebuilds"] += 1
+        logger.info(
+            f"✅ Tenant cache rebuilt: {loaded} domains loaded, {removed} stale entries removed"
+        )
+        return loaded
+
+    def warm_up_in_background(self, db_pool):
+        """Rebuild in a daemon thread if the hash does not exist yet (e.g. a new cache)"""
+        if not self.enabled:
+            return
+
+        def warm_up():
+            try:
+                if self.is_empty():
+                    logger.info("🔥 Tenant cache is empty, warming up from the domains table...")
+                    self.rebuild(db_pool)
+            except Exception as e:
+                logger.warning(f"⚠️ Tenant cache warm-up failed: {e}")
+
+        threading.Thread(target=warm_up, daemon=True, name="TenantCacheWarmUp").start()
+
+
+_tenant_cache = None
+_tenant_cache_lock = threading.Lock()
+
+
+def get_tenant_cache(environment: str = None) -> TenantCache:
+    """Return the process-wide tenant cache (publishing is a no-op without a Valkey endpoint)"""
+    global _tenant_cache
+    with _tenant_cache_lock:
+        if _tenant_cache is None:
+            _tenant_cache = TenantCache(
+                get_valkey_client(), environment or os.environ.get("ENVIRONMENT", "dev")
+            )
+            register_stats("tenant_cache", lambda: _tenant_cache.stats)
+        return _tenant_cache
+
+
+def main():
+    """Rebuild the tenant cache from the domains table (run inside a control plane task)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_REBUILD_BATCH)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    cache = get_tenant_cache()
+    if not cache.enabled:
+        raise SystemExit("❌ No Valkey endpoint configured")
+
+    db_pool = DatabasePool.from_env(max_connections=1)
+    try:
+        cache.rebuild(db_pool, batch_size=args.batch_size)
+    finally:
+        db_pool.close()
+
+
+if __name__ == "__main__":
+    main()
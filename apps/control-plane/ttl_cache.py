@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+TTL Cache - Bounded in-process LRU cache with per-entry expiry
+
+Responsibilities:
+- Keep at most maxsize entries, evicting the least recently used
+- Expire entries after their TTL (negative entries can use a shorter one)
+- Count hits, misses and evictions for the metrics endpoint
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by get() when a key is absent or expired (None is a valid cached value)
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        """
+        Initialize TTL cache
+
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Default seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        # Stats
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key, default=MISSING):
+        """
+        Look up a key
+
+        Returns:
+            The cached value, or default if the key is absent or expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to cache (may be None, e.g. for negative caching)
+            ttl: Seconds the entry stays valid (defaults to the cache TTL)
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key):
+        """Drop a key if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
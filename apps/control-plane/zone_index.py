@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Hosted Zone Index - In-memory domain → hosted zone map shared by the Route53 paths
+
+Responsibilities:
+- Seed the index from the hosted_zone_ids table so cold starts need no full scan
+- Keep it current with write-through updates and a paginated background refresh
+- Answer hits without calling the Route53 API; misses are verified against Route53
+- Create new zones on the shared reusable delegation set
+"""
+
+import logging
+import threading
+import time
+
+from botocore.exceptions import ClientError
+from delegation_set import get_delegation_set
+from metrics import register_stats
+from route53_executor import get_route53_client, get_route53_executor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 300  # seconds between background refresh steps
+DEFAULT_PAGES_PER_REFRESH = 5  # list_hosted_zones pages (100 zones each) per step
+
+# The shared set cannot be used for this zone; it is created with its own nameservers instead.
+# TooManyHostedZones is what a set at its zone limit (100 by default) answers with; if the
+# account itself is at its limit, the retry without the set fails the same way and raises.
+DELEGATION_SET_ERRORS = {
+    "DelegationSetNotAvailable",
+    "DelegationSetNotReusable",
+    "NoSuchDelegationSet",
+    "TooManyHostedZones",
+}
+
+
+def normalize_domain(domain: str) -> str:
+    """Lower-case a domain and strip the trailing dot Route53 returns"""
+    return domain.strip().rstrip(".").lower()
+
+
+def normalize_zone_id(zone_id: str) -> str:
+    """Strip the /hostedzone/ prefix from a zone ID"""
+    return zone_id.split("/")[-1]
+
+
+class HostedZoneIndex:
+    """Thread-safe domain → hosted zone ID index"""
+
+    def __init__(
+        self,
+        route53_client,
+        executor=None,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        pages_per_refresh: int = DEFAULT_PAGES_PER_REFRESH,
+        delegation_set=None,
+    ):
+        """
+        Initialize hosted zone index
+
+        Args:
+            route53_client: boto3 Route53 client
+            executor: Route53Executor whose rate limiter API calls go through
+            refresh_interval: Seconds between background refresh steps (0 disables the thread)
+            pages_per_refresh: Listing pages fetched per refresh step
+            delegation_set: ReusableDelegationSet new zones are created on (None for random NS)
+        """
+        self.route53_client = route53_client
+        self.executor = executor
+        self.refresh_interval = refresh_interval
+        self.pages_per_refresh = pages_per_refresh
+        self.delegation_set = delegation_set
+
+        self._zones = {}  # domain -> zone ID
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # one listing walk at a time
+
+        # Refresh cycle state: the listing is walked a few pages at a time
+        self._marker = None
+        self._cycle_seen = set()
+        self._cycle_started = None
+        self._written = {}  # domain -> time of last write-through update
+
+        # Stats
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "verify_calls": 0,
+            "list_calls": 0,
+            "zones_indexed": 0,
+            "delegation_set_fallbacks": 0,
+        }
+
+        self._stop = threading.Event()
+        if refresh_interval:
+            threading.Thread(target=self._refresh_loop, daemon=True, name="ZoneIndex").start()
+
+    def _call(self, fn, **kwargs):
+        """Make a Route53 call, rate-limited when an executor is attached"""
+        if self.executor:
+            return self.executor.call(fn, **kwargs)
+        return fn(**kwargs)
+
+    def seed_from_db(self, db_pool) -> int:
+        """
+        Load known zones from the hosted_zone_ids table
+
+        Args:
+            db_pool: DatabasePool to borrow a connection from
+
+        Returns:
+            int: Number of zones loaded
+        """
+        try:
+            with db_pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT domain_name, aws_hosted_zone_id FROM hosted_zone_ids")
+                rows = cur.fetchall()
+        except Exception as e:
+            logger.warning(f"⚠️ [ZONES] Could not seed zone index from database: {e}")
+            return 0
+
+        with self._lock:
+            for domain, zone_id in rows:
+                if domain and zone_id:
+                    self._zones.setdefault(normalize_domain(domain), normalize_zone_id(zone_id))
+            self.stats["zones_indexed"] = len(self._zones)
+
+        logger.info(f"✅ [ZONES] Seeded zone index with {len(rows)} zones from database")
+        return len(rows)
+
+    def full_scan(self):
+        """Walk the whole list_hosted_zones listing and reconcile the index"""
+        with self._refresh_lock:
+            self._marker = None
+        self.refresh(pages=None)
+
+    def refresh(self, pages: int = None) -> bool:
+        """
+        Walk the next few pages of list_hosted_zones
+
+        Args:
+            pages: Pages to fetch in this step (None = until the listing ends)
+
+        Returns:
+            bool: True when this step finished a full pass over the listing
+        """
+        with self._refresh_lock:
+            return self._walk(pages)
+
+    def _walk(self, pages: int = None) -> bool:
+        """Fetch listing pages from the saved marker (caller holds the refresh lock)"""
+        if self._marker is None:
+            self._cycle_seen = set()
+            self._cycle_started = time.time()
+
+        fetched = 0
+        while pages is None or fetched < pages:
+            kwargs = {"MaxItems": "100"}
+            if self._marker:
+                kwargs["Marker"] = self._marker
+
+            response = self._call(self.route53_client.list_hosted_zones, **kwargs)
+            self.stats["list_calls"] += 1
+            fetched += 1
+
+            with self._lock:
+                for zone in response.get("HostedZones", []):
+                    if zone.get("Config", {}).get("PrivateZone"):
+                        continue
+                    domain = normalize_domain(zone["Name"])
+                    if domain not in self._cycle_seen:
+                        self._zones[domain] = normalize_zone_id(zone["Id"])
+                        self._cycle_seen.add(domain)
+
+            if not response.get("IsTruncated"):
+                self._marker = None
+                self._finish_cycle()
+                return True
+
+            self._marker = response["NextMarker"]
+
+        return False
+
+    def _finish_cycle(self):
+        """Drop zones that disappeared, keeping ones written during the pass"""
+        with self._lock:
+            for domain in list(self._zones):
+                if domain in self._cycle_seen:
+                    continue
+                if self._written.get(domain, 0) >= self._cycle_started:
+                    continue
+                del self._zones[domain]
+
+            self._written = {
+                domain: written_at
+                for domain, written_at in self._written.items()
+                if written_at >= self._cycle_started
+            }
+            self.stats["zones_indexed"] = len(self._zones)
+
+        logger.info(f"🔄 [ZONES] Zone index reconciled: {len(self._zones)} public zones")
+
+    def _refresh_loop(self):
+        """Background thread that keeps the index current"""
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh(pages=self.pages_per_refresh)
+            except Exception as e:
+                logger.warning(f"⚠️ [ZONES] Zone index refresh failed: {e}")
+
+    def get_zone_id(self, domain: str):
+        """
+        Look up the hosted zone for a domain
+
+        Every miss is verified with one list_hosted_zones_by_name call: zones
+        created by another task are only picked up by the paged refresh, and a
+        trusted miss would let a redelivered activation create a duplicate zone.
+
+        Args:
+            domain: Domain name (any case, with or without trailing dot)
+
+        Returns:
+            str: Zone ID without the /hostedzone/ prefix, or None
+        """
+        domain = normalize_domain(domain)
+        self.stats["lookups"] += 1
+
+        with self._lock:
+            zone_id = self._zones.get(domain)
+        if zone_id:
+            self.stats["hits"] += 1
+            return zone_id
+
+        self.stats["verify_calls"] += 1
+        response = self._call(
+            self.route53_client.list_hosted_zones_by_name, DNSName=domain, MaxItems="1"
+        )
+        for zone in response.get("HostedZones", []):
+            if normalize_domain(zone["Name"]) == domain:
+                zone_id = normalize_zone_id(zone["Id"])
+                self.add(domain, zone_id)
+                return zone_id
+        return None
+
+    def exists(self, domain: str) -> bool:
+        """Check whether a hosted zone exists for a domain"""
+        return self.get_zone_id(domain) is not None
+
+    def add(self, domain: str, zone_id: str):
+        """Record a zone (write-through after create)"""
+        domain = normalize_domain(domain)
+        with self._lock:
+            self._zones[domain] = normalize_zone_id(zone_id)
+            self._written[domain] = time.time()
+            self.stats["zones_indexed"] = len(self._zones)
+
+    def remove(self, domain: str):
+        """Forget a zone (write-through after delete)"""
+        domain = normalize_domain(domain)
+        with self._lock:
+            self._zones.pop(domain, None)
+            self._written.pop(domain, None)
+            self._cycle_seen.discard(domain)
+            self.stats["zones_indexed"] = len(self._zones)
+
+    def create_zone(self, domain: str, comment: str) -> dict:
+        """
+        Create a public hosted zone and record it in the index
+
+        Args:
+            domain: Domain name
+            comment: Hosted zone comment
+
+        Returns:
+            dict: create_hosted_zone response
+        """
+        kwargs = {
+            "Name": domain,
+            "CallerReference": f"{domain}-{int(time.time())}",
+            "HostedZoneConfig": {"Comment": comment, "PrivateZone": False},
+        }
+        # Shared nameservers, so the registrar delegation is set up once for all zones
+        delegation_set_id = self.delegation_set.resolve() if self.delegation_set else None
+        if delegation_set_id:
+            kwargs["DelegationSetId"] = delegation_set_id
+
+        try:
+            response = self._call(self.route53_client.create_hosted_zone, **kwargs)
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if not delegation_set_id or code not in DELEGATION_SET_ERRORS:
+                raise
+            logger.warning(f"⚠️ [ZONES] {code} for {domain}, using its own nameservers")
+            self.stats["delegation_set_fallbacks"] += 1
+            del kwargs["DelegationSetId"]
+            kwargs["CallerReference"] += "-own-ns"
+            response = self._call(self.route53_client.create_hosted_zone, **kwargs)
+
+        self.add(domain, response["HostedZone"]["Id"])
+        return response
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_zone_index(region_name: str = "us-east-1", db_pool=None) -> HostedZoneIndex:
+    """
+    Return the process-wide zone index, creating it on first use
+
+    Args:
+        region_name: AWS region for the Route53 client
+        db_pool: Optional DatabasePool used to seed the index on creation
+
+    Returns:
+        HostedZoneIndex: Shared index
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = HostedZoneIndex(
+                get_route53_client(region_name),
+                executor=get_route53_executor(),
+                delegation_set=get_delegation_set(region_name),
+            )
+            register_stats("zone_index", lambda: _index.stats)
+            seeded = _index.seed_from_db(db_pool) if db_pool is not None else 0
+            if not seeded:
+                # Nothing to start from: build the index with one paginated scan
+                try:
+                    _index.full_scan()
+                except Exception as e:
+                    logger.warning(f"⚠️ [ZONES] Initial zone scan failed, verifying misses: {e}")
+        return _index
@@ -1,4 +1,5 @@
 from aws_cdk import Duration, Stack
+from aws_cdk import aws_cloudwatch as cloudwatch
 from aws_cdk import aws_ec2 as ec2
 from aws_cdk import aws_ecs as ecs
 from aws_cdk import aws_iam as iam
@@ -23,6 +24,9 @@ class ControlPlaneServiceStack(Stack):
         db_secret,
         sqs_managed_policy: iam.IManagedPolicy = None,
         desired_count: int = 1,
+        min_capacity: int = 1,
+        max_capacity: int = 4,
+        backlog_per_task_target: int = 50,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -41,6 +45,9 @@ class ControlPlaneServiceStack(Stack):
                 self, f"/storefront-{environment}/sqs/github-workflow-queue-url"
             ),
             "AWS_DEFAULT_REGION": "us-east-1",
+            # Used to publish the BacklogPerTask scaling metric
+            "ECS_CLUSTER": cluster.cluster_name,
+            "ECS_SERVICE": service_name,
         }
 
         # Secrets for the control plane service
@@ -64,7 +71,7 @@ class ControlPlaneServiceStack(Stack):
             cluster=cluster,
             vpc=vpc,
             container_image=ecs.ContainerImage.from_registry(image_uri),
-            container_port=8080,  # Default port, won't be used since no ALB
+            container_port=8080,  # Prometheus metrics endpoint (no ALB)
             service_name=service_name,
             environment=control_plane_environment,
             secrets=control_plane_secrets,
@@ -74,3 +81,53 @@ class ControlPlaneServiceStack(Stack):
             cpu=256,
             memory_limit_mib=512,
         )
+
+        # The tasks publish queue backlog per running task (see consumer_scaling.py)
+        fargate_service = self.service.service
+        fargate_service.task_definition.task_role.add_to_policy(
+            iam.PolicyStatement(
+                actions=["cloudwatch:PutMetricData", "ecs:DescribeServices"],
+                resources=["*"],
+            )
+        )
+
+        # New hosted zones share one reusable delegation set, created on first use
+        # and stored in SSM (see delegation_set.py)
+        fargate_service.task_definition.task_role.add_to_policy(
+            iam.PolicyStatement(
+                actions=[
+                    "route53:CreateReusableDelegationSet",
+                    "route53:GetReusableDelegationSet",
+                    "route53:GetReusableDelegationSetLimit",
+                    "route53:ListReusableDelegationSets",
+                ],
+                resources=["*"],
+            )
+        )
+        fargate_service.task_definition.task_role.add_to_policy(
+            iam.PolicyStatement(
+                actions=["ssm:PutParameter"],
+                resources=[
+                    f"arn:aws:ssm:{self.region}:{self.account}:parameter"
+                    f"/storefront-{environment}/route53/delegation-set-id"
+                ],
+            )
+        )
+
+        # Scale out on onboarding bursts, back to one small task once the queues drain
+        scaling = fargate_service.auto_scale_task_count(
+            min_capacity=min_capacity, max_capacity=max_capacity
+        )
+        scaling.scale_to_track_custom_metric(
+            "BacklogPerTaskScaling",
+            metric=cloudwatch.Metric(
+                namespace="Storefront/ControlPlane",
+                metric_name="BacklogPerTask",
+                dimensions_map={"Environment": environment},
+                statistic="Average",
+                period=Duration.minutes(1),
+            ),
+            target_value=backlog_per_task_target,
+            scale_out_cooldown=Duration.minutes(1),
+            scale_in_cooldown=Duration.minutes(5),
+        )
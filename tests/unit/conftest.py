@@ -0,0 +1,13 @@
+"""
+Fixtures for control plane unit tests
+"""
+
+import os
+import sys
+
+# Control plane modules import each other by bare name, as they do inside the container
+CONTROL_PLANE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "apps", "control-plane")
+)
+if CONTROL_PLANE_DIR not in sys.path:
+    sys.path.append(CONTROL_PLANE_DIR)
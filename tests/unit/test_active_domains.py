@@ -0,0 +1,209 @@
+"""
+Unit tests for the LISTEN/NOTIFY-maintained active domain set
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import pytest
+from active_domains import CHANNEL, INSTALL_LOCK_ID, ActiveDomainSet
+
+
+class FakeCursor:
+    """Answers the handful of queries ActiveDomainSet issues"""
+
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.database.executed.append((sql, params))
+        if "FROM domains_change_version" in sql:
+            self.rows = [self.database.sequence]
+        elif "FROM domains" in sql:
+            self.rows = [
+                (domain,) for domain, status in self.database.domains.items() if status == "Y"
+            ]
+            if self.database.during_scan:
+                self.database.during_scan()
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return list(self.rows)
+
+
+class FakeConnection:
+    """psycopg2 connection stand-in; notifications are applied directly by the tests"""
+
+    def __init__(self, database):
+        self.database = database
+        self.autocommit = False
+        self.notifies = []
+        self._fds = ()
+
+    def cursor(self):
+        return FakeCursor(self.database)
+
+    def fileno(self):
+        # A pipe that never becomes readable keeps the listener thread idle in select()
+        if not self._fds:
+            self._fds = os.pipe()
+        return self._fds[0]
+
+    def poll(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        for fd in self._fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class FakeDatabase:
+    """DatabasePool stand-in holding the domains table and the version sequence"""
+
+    def __init__(self, domains=None, version=0):
+        self.domains = dict(domains or {})
+        self.sequence = (version, version > 0)
+        self.executed = []
+        self.during_scan = None  # called after a scan has read the table
+
+    def write(self, domain: str, status: str) -> int:
+        """Commit a status change and return the version its notification carries"""
+        self.domains[domain] = status
+        version = self.sequence[0] + 1
+        self.sequence = (version, True)
+        return version
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self)
+
+    def connect_dedicated(self):
+        return FakeConnection(self)
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase({"a.example.com": "Y", "b.example.com": "N"}, version=1)
+
+
+@pytest.fixture
+def domain_set(database):
+    domain_set = ActiveDomainSet(database)
+    yield domain_set
+    domain_set.close()
+
+
+class TestWarmUp:
+    """Test installation and the initial scan"""
+
+    def test_installs_feed_under_advisory_lock(self, database, domain_set):
+        """Test the trigger is installed while holding the install lock"""
+        statements = [sql for sql, _ in database.executed]
+        assert database.executed[0] == ("SELECT pg_advisory_xact_lock(%s)", (INSTALL_LOCK_ID,))
+        assert "CREATE TRIGGER domains_change_feed" in statements[1]
+        assert "pg_trigger" in statements[1]
+        assert "DROP TRIGGER" not in statements[1]
+
+    def test_listens_before_scanning(self, database, domain_set):
+        """Test LISTEN is issued before the scan so no change in between is missed"""
+        statements = [sql for sql, _ in database.executed]
+        listen = statements.index(f"LISTEN {CHANNEL}")
+        scan = next(index for index, sql in enumerate(statements) if "WHERE active_status" in sql)
+        assert listen < scan
+        assert domain_set.snapshot() == (1, frozenset({"a.example.com"}))
+
+
+class TestApply:
+    """Test applying change notifications"""
+
+    def test_activation_and_deactivation(self, domain_set):
+        """Test notifications add and remove domains and advance the version"""
+        domain_set._apply({"version": 2, "full_url": "b.example.com", "active_status": "Y"})
+        domain_set._apply({"version": 3, "full_url": "a.example.com", "active_status": "N"})
+
+        assert domain_set.snapshot() == (3, frozenset({"b.example.com"}))
+        assert domain_set.stats["notifications"] == 2
+
+    def test_version_never_goes_back(self, request):
+        """Test a notification older than the scan does not lower the version"""
+        domain_set = ActiveDomainSet(FakeDatabase(version=10))
+        request.addfinalizer(domain_set.close)
+
+        domain_set._apply({"version": 8, "full_url": "a.example.com", "active_status": "Y"})
+
+        assert domain_set.version == 10
+
+    def test_snapshot_reused_until_change(self, domain_set):
+        """Test snapshots are shared between calls and replaced after a change"""
+        _, first = domain_set.snapshot()
+        _, second = domain_set.snapshot()
+        domain_set._apply({"version": 2, "full_url": "b.example.com", "active_status": "Y"})
+        _, third = domain_set.snapshot()
+
+        assert first is second
+        assert third is not first
+        assert third == {"a.example.com", "b.example.com"}
+
+
+class TestWaitForLatest:
+    """Test read-your-writes before a dispatch"""
+
+    def test_up_to_date_without_scan(self, database, domain_set):
+        """Test no scan happens when every committed version was already applied"""
+        version = database.write("c.example.com", "Y")
+        domain_set._apply({"version": version, "full_url": "c.example.com", "active_status": "Y"})
+
+        assert domain_set.wait_for_latest(timeout=0) == version
+        assert domain_set.stats["scans"] == 1
+
+    def test_waits_for_notification(self, database, domain_set):
+        """Test a notification arriving within the timeout is waited for"""
+        version = database.write("c.example.com", "Y")
+        event = {"version": version, "full_url": "c.example.com", "active_status": "Y"}
+        threading.Timer(0.05, domain_set._apply, args=(event,)).start()
+
+        assert domain_set.wait_for_latest(timeout=5) == version
+        assert domain_set.snapshot()[1] == {"a.example.com", "c.example.com"}
+        assert domain_set.stats["scans"] == 1
+
+    def test_rescans_when_notification_missing(self, database, domain_set):
+        """Test a missing notification (e.g. a burned version) falls back to a scan"""
+        version = database.write("c.example.com", "Y")
+
+        assert domain_set.wait_for_latest(timeout=0.01) == version
+        assert domain_set.snapshot()[1] == {"a.example.com", "c.example.com"}
+        assert domain_set.stats["scans"] == 2
+
+    def test_notification_during_scan_survives(self, database, domain_set):
+        """Test a change notified while a re-scan runs is not overwritten by the scan result"""
+        version = database.write("b.example.com", "Y")
+
+        def change_committed_after_scan_read():
+            database.during_scan = None
+            late = database.write("a.example.com", "N")
+            domain_set._apply({"version": late, "full_url": "a.example.com", "active_status": "N"})
+
+        database.during_scan = change_committed_after_scan_read
+
+        assert domain_set.wait_for_latest(timeout=0.01) == version + 1
+        assert domain_set.snapshot()[1] == {"b.example.com"}
+        assert not domain_set._scan_logs
@@ -0,0 +1,208 @@
+"""
+Unit tests for the asyncio runtime: message group ordering and concurrency
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from async_engine import AsyncControlPlane
+from queue_worker import group_messages
+
+
+def message(message_id: str, group: str = None) -> dict:
+    message = {"MessageId": message_id, "ReceiptHandle": message_id, "Body": json.dumps({})}
+    if group:
+        message["Attributes"] = {"MessageGroupId": group}
+    return message
+
+
+class FakeWorker:
+    """QueueWorker stand-in serving scripted receives, then stopping"""
+
+    name = "FakeWorker"
+    log_prefix = "[FAKE]"
+    batch_processing = False
+
+    def __init__(self, receives, handler=None, max_receivers: int = 1):
+        self.receives = list(receives)
+        self.handler = handler or (lambda message: True)
+        self.max_receivers = max_receivers
+        self.running = True
+        self.events = []  # (message id, "start" | "end")
+        self.completed = []  # (message ids, results) per receive
+        self.released = []
+        self._lock = threading.Lock()
+
+    def receive_wait_seconds(self) -> int:
+        return 0
+
+    def receive_messages(self, wait_time_seconds: int = 20) -> list:
+        with self._lock:
+            if not self.receives:
+                self.running = False
+                return []
+            receive = self.receives.pop(0)
+        return receive() if callable(receive) else receive
+
+    def skip_duplicates(self, messages: list) -> list:
+        return messages
+
+    def process_message(self, message: dict) -> bool:
+        with self._lock:
+            self.events.append((message["MessageId"], "start"))
+        try:
+            return self.handler(message)
+        finally:
+            with self._lock:
+                self.events.append((message["MessageId"], "end"))
+
+    def complete_messages(self, messages: list, results: list):
+        self.completed.append(([message["MessageId"] for message in messages], results))
+
+    def release_messages(self, messages: list):
+        self.released.extend(message["MessageId"] for message in messages)
+
+    def on_poll(self):
+        pass
+
+    def log_stats(self):
+        pass
+
+    def stop(self):
+        self.running = False
+
+
+def run(workers, concurrency: int = 4) -> AsyncControlPlane:
+    engine = AsyncControlPlane(workers, concurrency=concurrency)
+    asyncio.run(asyncio.wait_for(engine.run(), timeout=10))
+    return engine
+
+
+class TestGroupMessages:
+    """Test splitting a receive into FIFO message groups"""
+
+    def test_groups_keep_arrival_order(self):
+        messages = [message("a1", "A"), message("b1", "B"), message("a2", "A"), message("x")]
+
+        assert group_messages(messages) == [[0, 2], [1], [3]]
+
+
+class TestOrdering:
+    """Test FIFO order within a message group and parallelism across groups"""
+
+    def test_group_processed_in_order(self):
+        """Test a group's second message starts only after its first one finished"""
+
+        def slow_first(message):
+            if message["MessageId"] == "a1":
+                time.sleep(0.05)
+            return True
+
+        worker = FakeWorker([[message("a1", "A"), message("a2", "A")]], slow_first)
+
+        run([worker])
+
+        assert worker.events == [("a1", "start"), ("a1", "end"), ("a2", "start"), ("a2", "end")]
+        assert worker.completed == [(["a1", "a2"], [True, True])]
+
+    def test_groups_processed_concurrently(self):
+        """Test messages of different groups run at the same time"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(message):
+            barrier.wait()
+            return True
+
+        worker = FakeWorker([[message("a1", "A"), message("b1", "B")]], meet)
+
+        run([worker])
+
+        assert worker.completed == [(["a1", "b1"], [True, True])]
+
+    def test_concurrency_limit(self):
+        """Test no more handlers run at once than the engine's concurrency"""
+        running = []
+        peak = []
+
+        def track(message):
+            running.append(message["MessageId"])
+            peak.append(len(running))
+            time.sleep(0.02)
+            running.remove(message["MessageId"])
+            return True
+
+        worker = FakeWorker([[message(f"m{index}", f"g{index}") for index in range(6)]], track)
+
+        run([worker], concurrency=2)
+
+        assert max(peak) <= 2
+        assert worker.completed[0][1] == [True] * 6
+
+
+class TestFailures:
+    """Test handler and batch failures"""
+
+    def test_handler_error_fails_only_its_message(self):
+        def fail_b(message):
+            if message["MessageId"] == "b1":
+                raise RuntimeError("boom")
+            return True
+
+        worker = FakeWorker([[message("a1", "A"), message("b1", "B")]], fail_b)
+
+        engine = run([worker])
+
+        assert worker.completed == [(["a1", "b1"], [True, False])]
+        assert engine.stats["handler_errors"] == 1
+
+    def test_batch_failure_releases_messages(self, monkeypatch):
+        """Test a worker whose batch handler raises gets the receive released"""
+        # Skip the back-off after a failed receive
+        sleep = asyncio.sleep
+        monkeypatch.setattr(asyncio, "sleep", lambda delay: sleep(0))
+        worker = FakeWorker([[message("a1"), message("a2")]])
+        worker.batch_processing = True
+
+        def process_messages(messages):
+            raise RuntimeError("db down")
+
+        worker.process_messages = process_messages
+
+        run([worker])
+
+        assert worker.released == ["a1", "a2"]
+        assert worker.completed == []
+
+
+class TestReceives:
+    """Test several receives in flight per queue"""
+
+    def test_receives_overlap(self):
+        """Test max_receivers long polls are in flight at the same time"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def receive(message_id):
+            def poll():
+                barrier.wait()
+                return [message(message_id)]
+
+            return poll
+
+        worker = FakeWorker([receive("r1"), receive("r2")], max_receivers=2)
+
+        run([worker])
+
+        assert sorted(ids for ids, _ in worker.completed) == [["r1"], ["r2"]]
+
+    @pytest.mark.parametrize("max_receivers", [1, 3])
+    def test_every_receive_acknowledged(self, max_receivers):
+        receives = [[message(f"m{index}")] for index in range(5)]
+        worker = FakeWorker(receives, max_receivers=max_receivers)
+
+        engine = run([worker])
+
+        assert sorted(ids[0] for ids, _ in worker.completed) == [f"m{index}" for index in range(5)]
+        assert engine.stats["messages_handled"] == 5
@@ -0,0 +1,153 @@
+"""
+Unit tests for the adaptive batching window
+"""
+
+import coalescer
+import pytest
+from coalescer import AdaptiveCoalescer
+
+
+class FakeClock:
+    """Replaces the coalescer's time module with a clock the test advances"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake clock for the coalescer module only (other threads keep real time)"""
+    fake = FakeClock()
+    monkeypatch.setattr(coalescer, "time", fake)
+    return fake
+
+
+def make_coalescer(**kwargs) -> AdaptiveCoalescer:
+    kwargs.setdefault("quiet_period", 3.0)
+    kwargs.setdefault("max_quiet_period", 30.0)
+    kwargs.setdefault("max_wait", 120.0)
+    kwargs.setdefault("max_batch", 500)
+    return AdaptiveCoalescer("TestWorker", **kwargs)
+
+
+class TestFlushReason:
+    """Test when a pending batch is flushed"""
+
+    def test_quiet_period(self, clock):
+        """Test a single arrival flushes once the quiet period has passed"""
+        batching = make_coalescer(burst_rate=1e9)
+        batching.add()
+
+        clock.advance(2.9)
+        assert batching.flush_reason(1) is None
+        clock.advance(0.5)
+        assert batching.flush_reason(1) == "quiet"
+
+    def test_new_arrival_restarts_quiet_period(self, clock):
+        """Test arrivals push the flush back (trailing-edge debounce)"""
+        batching = make_coalescer(burst_rate=1e9)
+        batching.add()
+        clock.advance(2.5)
+        batching.add()
+
+        clock.advance(2.5)
+        assert batching.flush_reason(2) is None
+        clock.advance(0.6)
+        assert batching.flush_reason(2) == "quiet"
+
+    def test_burst_widens_window(self, clock):
+        """Test a burst of arrivals widens the quiet period, up to max_quiet_period"""
+        batching = make_coalescer()
+        batching.add(100)
+
+        clock.advance(3.5)
+        assert batching.flush_reason(100) is None
+        clock.advance(30)
+        assert batching.flush_reason(100) == "quiet"
+
+    def test_max_wait_caps_steady_trickle(self, clock):
+        """Test a steady trickle that never goes quiet is flushed at max_wait"""
+        batching = make_coalescer(max_wait=10.0)
+        reasons = []
+        for _ in range(12):
+            batching.add()
+            clock.advance(1.0)
+            reasons.append(batching.flush_reason(1))
+
+        assert reasons.index("max_wait") == 9
+        assert "quiet" not in reasons
+
+    def test_size(self, clock):
+        """Test a batch of max_batch items flushes immediately"""
+        batching = make_coalescer(max_batch=10)
+        batching.add(10)
+
+        assert batching.flush_reason(9) is None
+        assert batching.flush_reason(10) == "size"
+
+    def test_nothing_pending(self, clock):
+        batching = make_coalescer()
+        batching.add()
+        clock.advance(60)
+
+        assert batching.flush_reason(0) is None
+
+
+class TestFlushLifecycle:
+    """Test flushed(), failed() and the long-poll duration"""
+
+    def test_flushed_starts_new_window(self, clock):
+        """Test a flush resets the window and counts the reason"""
+        batching = make_coalescer()
+        batching.add()
+        clock.advance(5)
+        batching.flushed("quiet", 1)
+
+        assert batching.stats["flushes_quiet"] == 1
+        assert batching.poll_wait(20) == 20
+
+    def test_failed_waits_a_quiet_period(self, clock):
+        """Test a failed flush is retried after a quiet period, not on the next poll"""
+        batching = make_coalescer(burst_rate=1e9)
+        batching.add()
+        clock.advance(5)
+        batching.failed()
+
+        assert batching.flush_reason(1) is None
+        clock.advance(3.1)
+        assert batching.flush_reason(1) == "quiet"
+
+    def test_leftover_items_start_a_window(self, clock):
+        """Test items pending without any add() (e.g. after a restart) still flush"""
+        batching = make_coalescer(burst_rate=1e9)
+
+        assert batching.flush_reason(3) is None
+        clock.advance(3.1)
+        assert batching.flush_reason(3) == "quiet"
+
+    def test_poll_wait_wakes_for_next_flush(self, clock):
+        """Test the long poll is shortened so the flush is not held back by it"""
+        batching = make_coalescer(burst_rate=1e9)
+        batching.add()
+        clock.advance(1.5)
+
+        assert batching.poll_wait(20) == 2
+        clock.advance(5.0)
+        assert batching.poll_wait(20) == 0
+
+    def test_from_env(self, monkeypatch):
+        """Test BATCH_* variables configure the window"""
+        monkeypatch.setenv("BATCH_QUIET_PERIOD", "1.5")
+        monkeypatch.setenv("BATCH_MAX_SIZE", "50")
+
+        batching = AdaptiveCoalescer.from_env("EnvWorker")
+
+        assert batching.quiet_period == 1.5
+        assert batching.max_batch == 50
+        assert batching.max_wait == coalescer.DEFAULT_MAX_WAIT
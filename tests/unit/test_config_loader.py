@@ -0,0 +1,110 @@
+"""
+Unit tests for the cached SSM config loader
+"""
+
+import time
+from unittest import mock
+
+import pytest
+from config_loader import ConfigLoader
+
+PREFIX = "/storefront-dev/"
+
+
+def parameters(values: dict) -> list:
+    return [{"Name": f"{PREFIX}{key}", "Value": value} for key, value in values.items()]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def ssm_client():
+    client = mock.Mock()
+    client.get_parameters_by_path.return_value = {
+        "Parameters": parameters({"database/host": "db", "database/port": "5432", "queue": "q"})
+    }
+    return client
+
+
+@pytest.fixture
+def config(ssm_client, clock):
+    return ConfigLoader("dev", ttl=300, ssm_client=ssm_client)
+
+
+class TestLoad:
+    """Test the paginated get_parameters_by_path pass"""
+
+    def test_pages_followed(self, config, ssm_client):
+        ssm_client.get_parameters_by_path.side_effect = [
+            {"Parameters": parameters({"a": "1"}), "NextToken": "t1"},
+            {"Parameters": parameters({"b/c": "2"})},
+        ]
+
+        assert config.load() == {"a": "1", "b/c": "2"}
+        assert ssm_client.get_parameters_by_path.call_args.kwargs["NextToken"] == "t1"
+        assert config.stats["api_calls"] == 2
+
+    def test_get_path(self, config):
+        assert config.get_path("/database/") == {"host": "db", "port": "5432"}
+
+
+class TestTtl:
+    """Test when the cached snapshot is served and when it is reloaded"""
+
+    def test_served_from_cache_within_ttl(self, config, ssm_client, clock):
+        assert config.get("database/host") == "db"
+        clock[0] += 299
+        assert config.get("queue") == "q"
+
+        assert ssm_client.get_parameters_by_path.call_count == 1
+
+    def test_reloaded_after_ttl(self, config, ssm_client, clock):
+        config.get("queue")
+        ssm_client.get_parameters_by_path.return_value = {"Parameters": parameters({"queue": "q2"})}
+
+        clock[0] += 300
+
+        assert config.get("queue") == "q2"
+        assert config.stats["loads"] == 2
+
+    def test_invalidate_forces_reload(self, config, ssm_client):
+        config.get("queue")
+
+        config.invalidate()
+        config.get("queue")
+
+        assert ssm_client.get_parameters_by_path.call_count == 2
+
+    def test_missing_key(self, config):
+        assert config.get("nope", None) is None
+        with pytest.raises(KeyError, match="/storefront-dev/nope"):
+            config.get("nope")
+
+
+class TestStaleOnError:
+    """Test reload failures"""
+
+    def test_stale_snapshot_served_on_reload_error(self, config, ssm_client, clock):
+        """Test a failed reload keeps serving the last values and waits a TTL to retry"""
+        config.get("queue")
+        ssm_client.get_parameters_by_path.side_effect = RuntimeError("ssm unavailable")
+        clock[0] += 300
+
+        assert config.get("queue") == "q"
+        assert config.get("database/host") == "db"
+        assert config.stats["load_errors"] == 1
+        assert ssm_client.get_parameters_by_path.call_count == 2
+
+    def test_first_load_error_raised(self, config, ssm_client):
+        ssm_client.get_parameters_by_path.side_effect = RuntimeError("ssm unavailable")
+
+        with pytest.raises(RuntimeError):
+            config.get("queue")
+
+        ssm_client.get_parameters_by_path.side_effect = None
+        assert config.get("queue") == "q"
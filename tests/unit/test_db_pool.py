@@ -0,0 +1,214 @@
+"""
+Unit tests for the control plane database pool
+"""
+
+import threading
+from unittest import mock
+
+import db_pool
+import psycopg2
+import pytest
+from db_pool import DatabasePool
+from psycopg2 import pool as pg_pool
+
+
+class FakeThreadedPool:
+    """Stands in for psycopg2's ThreadedConnectionPool, handing out mock connections"""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.kwargs = kwargs
+        self.idle = []
+        self.created = []
+        self.closed = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        conn = mock.MagicMock(name=f"conn{len(self.created)}")
+        conn.closed = 0
+        self.created.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.closed = 1
+            self.closed.append(conn)
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        pass
+
+
+DSN = ("db.example.com", "storefront", "user", "secret")
+
+
+@pytest.fixture(autouse=True)
+def fake_threaded_pool():
+    """Back every DatabasePool in these tests with FakeThreadedPool"""
+    with mock.patch.object(db_pool.pool, "ThreadedConnectionPool", FakeThreadedPool):
+        yield
+
+
+@pytest.fixture
+def database_pool():
+    return DatabasePool(*DSN)
+
+
+class TestDatabasePoolCheckout:
+    """Test checkout, return and the checkout bound"""
+
+    def test_session_settings(self):
+        """Test every connection gets keepalives and a statement_timeout"""
+        database_pool = DatabasePool(*DSN, statement_timeout_ms=5000)
+        kwargs = database_pool._pool.kwargs
+
+        assert kwargs["keepalives"] == 1
+        assert kwargs["options"] == "-c statement_timeout=5000"
+
+    def test_connection_reused_after_putconn(self, database_pool):
+        """Test a returned connection is rolled back and handed out again"""
+        conn = database_pool.getconn()
+        conn.reset_mock()
+        database_pool.putconn(conn)
+
+        conn.rollback.assert_called_once()
+        assert database_pool.getconn() is conn
+        assert database_pool.stats["checkouts"] == 2
+
+    def test_checkout_waits_then_times_out(self):
+        """Test checkouts beyond max_connections wait for a slot instead of failing at once"""
+        database_pool = DatabasePool(*DSN, max_connections=1, checkout_timeout=0.05)
+        conn = database_pool.getconn()
+
+        with pytest.raises(pg_pool.PoolError):
+            database_pool.getconn()
+        assert database_pool.stats["checkout_timeouts"] == 1
+
+        database_pool.putconn(conn)
+        assert database_pool.getconn() is conn
+
+    def test_checkout_unblocks_when_connection_returned(self):
+        """Test a waiting checkout gets the connection another thread returns"""
+        database_pool = DatabasePool(*DSN, max_connections=1, checkout_timeout=5)
+        conn = database_pool.getconn()
+        borrowed = []
+
+        waiter = threading.Thread(target=lambda: borrowed.append(database_pool.getconn()))
+        waiter.start()
+        database_pool.putconn(conn)
+        waiter.join(timeout=5)
+
+        assert borrowed == [conn]
+
+    def test_closed_pool_refuses_checkout(self, database_pool):
+        """Test checkout after close fails instead of reconnecting"""
+        database_pool.close()
+
+        with pytest.raises(psycopg2.InterfaceError):
+            database_pool.getconn()
+
+
+class TestDatabasePoolValidation:
+    """Test dead connections are detected and replaced"""
+
+    def test_closed_connection_replaced(self, database_pool):
+        """Test a connection closed while idle is discarded and a new one opened"""
+        conn = database_pool.getconn()
+        database_pool.putconn(conn)
+        conn.closed = 1
+
+        replacement = database_pool.getconn()
+
+        assert replacement is not conn
+        assert conn in database_pool._pool.closed
+        assert database_pool.stats["reconnects"] == 1
+
+    def test_idle_connection_probed(self):
+        """Test a connection idle past validate_after_idle is probed with SELECT 1"""
+        database_pool = DatabasePool(*DSN, validate_after_idle=0)
+        conn = database_pool.getconn()
+        database_pool.putconn(conn)
+        cursor = conn.cursor.return_value.__enter__.return_value
+
+        assert database_pool.getconn() is conn
+        cursor.execute.assert_called_with("SELECT 1")
+
+    def test_failed_probe_replaces_connection(self):
+        """Test a connection whose probe fails is discarded"""
+        database_pool = DatabasePool(*DSN, validate_after_idle=0)
+        conn = database_pool.getconn()
+        database_pool.putconn(conn)
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = psycopg2.OperationalError("server closed the connection")
+
+        assert database_pool.getconn() is not conn
+        assert database_pool.stats["reconnects"] == 1
+
+    def test_recently_used_connection_not_probed(self):
+        """Test connections used within validate_after_idle skip the probe"""
+        database_pool = DatabasePool(*DSN, validate_after_idle=60)
+        conn = database_pool.getconn()
+        database_pool.putconn(conn)
+        conn.reset_mock()
+
+        assert database_pool.getconn() is conn
+        conn.cursor.assert_not_called()
+
+    def test_failed_rollback_discards_connection(self, database_pool):
+        """Test a connection that cannot be rolled back is not reused"""
+        conn = database_pool.getconn()
+        conn.rollback.side_effect = psycopg2.InterfaceError("connection already closed")
+
+        database_pool.putconn(conn)
+
+        assert conn in database_pool._pool.closed
+        assert database_pool.getconn() is not conn
+
+
+class TestDatabasePoolConnection:
+    """Test the connection() context manager"""
+
+    def test_connection_error_discards(self, database_pool):
+        """Test a connection-level error inside the block discards the connection"""
+        with pytest.raises(psycopg2.OperationalError):
+            with database_pool.connection() as conn:
+                raise psycopg2.OperationalError("terminating connection")
+
+        assert conn in database_pool._pool.closed
+
+    def test_query_error_keeps_connection(self, database_pool):
+        """Test other errors roll back and keep the connection for the next borrower"""
+        with pytest.raises(psycopg2.errors.UniqueViolation):
+            with database_pool.connection() as conn:
+                raise psycopg2.errors.UniqueViolation()
+
+        conn.rollback.assert_called()
+        assert database_pool.getconn() is conn
+
+    def test_slot_released_on_error(self):
+        """Test a failing block gives its slot back"""
+        database_pool = DatabasePool(*DSN, max_connections=1, checkout_timeout=0.05)
+
+        with pytest.raises(RuntimeError):
+            with database_pool.connection():
+                raise RuntimeError("boom")
+
+        database_pool.getconn()
+
+    def test_from_env(self, monkeypatch):
+        """Test from_env reads the PG* variables"""
+        for name, value in {
+            "PGHOST": "rds.example.com",
+            "PGDATABASE": "storefront",
+            "PGUSER": "control",
+            "PGPASSWORD": "secret",
+        }.items():
+            monkeypatch.setenv(name, value)
+        monkeypatch.delenv("PGPORT", raising=False)
+
+        database_pool = DatabasePool.from_env(max_connections=2)
+
+        assert database_pool._pool.kwargs["host"] == "rds.example.com"
+        assert database_pool._pool.kwargs["port"] == "5432"
+        assert database_pool.max_connections == 2
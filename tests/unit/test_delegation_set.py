@@ -0,0 +1,138 @@
+"""
+Unit tests for zone creation on the shared reusable delegation set
+"""
+
+from unittest import mock
+
+import pytest
+from botocore.exceptions import ClientError
+from delegation_set import ReusableDelegationSet
+from zone_index import DELEGATION_SET_ERRORS, HostedZoneIndex
+
+
+def client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "CreateHostedZone")
+
+
+def zone_response(zone_id: str = "Z1") -> dict:
+    return {
+        "HostedZone": {"Id": f"/hostedzone/{zone_id}"},
+        "ChangeInfo": {"Id": "/change/C1", "Status": "PENDING"},
+        "DelegationSet": {"NameServers": ["ns-1.example.net"]},
+    }
+
+
+@pytest.fixture
+def route53_client():
+    client = mock.Mock()
+    client.create_hosted_zone.return_value = zone_response()
+    return client
+
+
+@pytest.fixture
+def zone_index(route53_client):
+    """Zone index on the shared set N1, without the background refresh thread"""
+    delegation_set = mock.Mock()
+    delegation_set.resolve.return_value = "N1"
+    return HostedZoneIndex(route53_client, refresh_interval=0, delegation_set=delegation_set)
+
+
+def create_calls(route53_client) -> list:
+    return [call.kwargs for call in route53_client.create_hosted_zone.call_args_list]
+
+
+class TestCreateZoneFallback:
+    """Test zones are created with their own nameservers when the shared set cannot be used"""
+
+    def test_created_on_shared_set(self, zone_index, route53_client):
+        zone_index.create_zone("a.example.com", "test")
+
+        assert create_calls(route53_client)[0]["DelegationSetId"] == "N1"
+        assert zone_index.get_zone_id("a.example.com") == "Z1"
+
+    @pytest.mark.parametrize("code", sorted(DELEGATION_SET_ERRORS))
+    def test_falls_back_to_own_nameservers(self, zone_index, route53_client, code):
+        """Test each delegation set error retries once without the set"""
+        route53_client.create_hosted_zone.side_effect = [client_error(code), zone_response("Z2")]
+
+        response = zone_index.create_zone("a.example.com", "test")
+
+        first, retry = create_calls(route53_client)
+        assert first["DelegationSetId"] == "N1"
+        assert "DelegationSetId" not in retry
+        assert retry["CallerReference"] == first["CallerReference"] + "-own-ns"
+        assert response["HostedZone"]["Id"] == "/hostedzone/Z2"
+        assert zone_index.stats["delegation_set_fallbacks"] == 1
+
+    def test_set_at_zone_limit_falls_back(self, zone_index, route53_client):
+        """Test a full delegation set (TooManyHostedZones) does not block zone creation"""
+        route53_client.create_hosted_zone.side_effect = [
+            client_error("TooManyHostedZones"),
+            zone_response("Z2"),
+        ]
+
+        zone_index.create_zone("a.example.com", "test")
+
+        assert zone_index.get_zone_id("a.example.com") == "Z2"
+
+    def test_account_at_zone_limit_raises(self, zone_index, route53_client):
+        """Test the retry without the set fails too when the account itself is full"""
+        route53_client.create_hosted_zone.side_effect = client_error("TooManyHostedZones")
+
+        with pytest.raises(ClientError):
+            zone_index.create_zone("a.example.com", "test")
+
+        assert route53_client.create_hosted_zone.call_count == 2
+
+    def test_other_errors_not_retried(self, zone_index, route53_client):
+        route53_client.create_hosted_zone.side_effect = client_error("InvalidDomainName")
+
+        with pytest.raises(ClientError):
+            zone_index.create_zone("a.example.com", "test")
+
+        assert route53_client.create_hosted_zone.call_count == 1
+        assert zone_index.stats["delegation_set_fallbacks"] == 0
+
+    def test_no_delegation_set(self, route53_client):
+        """Test zones get random nameservers when no shared set is configured"""
+        zone_index = HostedZoneIndex(route53_client, refresh_interval=0)
+
+        zone_index.create_zone("a.example.com", "test")
+
+        assert "DelegationSetId" not in create_calls(route53_client)[0]
+
+
+class TestReport:
+    """Test the on/off-set report and the set's zone count"""
+
+    def test_report_includes_zone_limit(self, route53_client):
+        route53_client.get_reusable_delegation_set_limit.return_value = {
+            "Limit": {"Type": "MAX_ZONES_BY_REUSABLE_DELEGATION_SET", "Value": 100},
+            "Count": 1,
+        }
+        route53_client.list_hosted_zones.side_effect = lambda **kwargs: {
+            "HostedZones": (
+                [{"Id": "/hostedzone/Z1", "Name": "a.example.com."}]
+                if "DelegationSetId" in kwargs
+                else [
+                    {"Id": "/hostedzone/Z1", "Name": "a.example.com."},
+                    {"Id": "/hostedzone/Z2", "Name": "b.example.com."},
+                    {"Id": "/hostedzone/Z3", "Name": "internal.", "Config": {"PrivateZone": True}},
+                ]
+            ),
+            "IsTruncated": False,
+        }
+        delegation_set = ReusableDelegationSet(route53_client, mock.Mock(), "test")
+        delegation_set._id = "N1"
+
+        report = delegation_set.report()
+
+        assert report == {
+            "on_set": [("a.example.com", "Z1")],
+            "off_set": [("b.example.com", "Z2")],
+            "zone_count": 1,
+            "zone_limit": 100,
+        }
+        route53_client.get_reusable_delegation_set_limit.assert_called_once_with(
+            DelegationSetId="N1", Type="MAX_ZONES_BY_REUSABLE_DELEGATION_SET"
+        )
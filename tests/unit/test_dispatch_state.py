@@ -0,0 +1,169 @@
+"""
+Unit tests for the domain set hash and workflow dispatch delta
+"""
+
+import json
+from contextlib import contextmanager
+
+import pytest
+from dispatch_state import (
+    DISPATCH_LOCK_ID,
+    MAX_DELTA_DOMAINS,
+    DispatchPlan,
+    DispatchState,
+    domain_set_hash,
+)
+
+
+class FakeCursor:
+    """Keeps workflow_dispatch_state rows in memory"""
+
+    def __init__(self, database):
+        self.database = database
+        self.row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.database.executed.append((sql, params))
+        if sql.startswith("SELECT domain_set_hash"):
+            self.row = self.database.rows.get(params[0])
+        elif "INSERT INTO workflow_dispatch_state" in sql:
+            environment, hash_, domains = params
+            self.database.pending[environment] = (hash_, json.loads(domains))
+
+    def fetchone(self):
+        return self.row
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self):
+        return FakeCursor(self.database)
+
+    def commit(self):
+        self.database.rows.update(self.database.pending)
+        self.database.pending.clear()
+
+    def rollback(self):
+        self.database.pending.clear()
+
+
+class FakeDatabase:
+    """DatabasePool stand-in counting checkouts"""
+
+    def __init__(self):
+        self.rows = {}  # environment -> (hash, domains), committed
+        self.pending = {}
+        self.executed = []
+        self.checkouts = 0
+
+    @contextmanager
+    def connection(self):
+        self.checkouts += 1
+        conn = FakeConnection(self)
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def state(database):
+    return DispatchState(database, "dev")
+
+
+class TestDomainSetHash:
+    """Test which domain sets count as identical"""
+
+    def test_order_and_duplicates_ignored(self):
+        assert domain_set_hash(["b.com", "a.com", "a.com"]) == domain_set_hash(["a.com", "b.com"])
+
+    def test_different_sets_differ(self):
+        assert domain_set_hash(["a.com"]) != domain_set_hash(["a.com", "b.com"])
+
+
+class TestDispatchPlan:
+    """Test the delta and client_payload a dispatch carries"""
+
+    def test_delta(self):
+        plan = DispatchPlan(["a.com", "c.com"], "old", {"a.com", "b.com"})
+
+        assert plan.changed
+        assert plan.added == ["c.com"]
+        assert plan.removed == ["b.com"]
+        payload = plan.client_payload(environment="dev")
+        assert payload["environment"] == "dev"
+        assert payload["previous_hash"] == "old"
+        assert payload["domain_count"] == 2
+        assert (payload["added"], payload["removed"]) == (["c.com"], ["b.com"])
+        assert not payload["delta_truncated"]
+
+    def test_unchanged(self):
+        domains = ["a.com", "b.com"]
+
+        assert not DispatchPlan(domains, domain_set_hash(domains), set(domains)).changed
+
+    def test_first_dispatch_is_full_rebuild(self):
+        """Test without a previous dispatch the payload asks for a full rebuild"""
+        payload = DispatchPlan(["a.com"], None, set()).client_payload()
+
+        assert payload["delta_truncated"]
+        assert payload["added"] == []
+
+    def test_large_delta_truncated(self):
+        """Test a delta larger than MAX_DELTA_DOMAINS is left out of the payload"""
+        domains = [f"d{index}.com" for index in range(MAX_DELTA_DOMAINS + 1)]
+
+        payload = DispatchPlan(domains, "old", set()).client_payload()
+
+        assert payload["delta_truncated"]
+        assert payload["added"] == [] and payload["domain_count"] == MAX_DELTA_DOMAINS + 1
+
+
+class TestDispatchState:
+    """Test plan → record under the dispatch lock"""
+
+    def test_one_connection_for_lock_plan_and_record(self, state, database):
+        """Test plan and record run in the lock's transaction instead of extra checkouts"""
+        with state.lock() as cur:
+            plan = state.plan(cur, ["a.com"])
+            state.record(cur, plan)
+
+        assert database.checkouts == 1
+        assert database.executed[0] == (
+            "SELECT pg_advisory_xact_lock(%s, hashtext(%s))",
+            (DISPATCH_LOCK_ID, "dev"),
+        )
+        assert database.rows["dev"] == (plan.domain_set_hash, ["a.com"])
+
+    def test_recorded_set_not_planned_again(self, state):
+        with state.lock() as cur:
+            state.record(cur, state.plan(cur, ["a.com", "b.com"]))
+
+        with state.lock() as cur:
+            assert state.plan(cur, ["b.com", "a.com"]) is None
+            plan = state.plan(cur, ["a.com", "c.com"])
+
+        assert (plan.added, plan.removed) == (["c.com"], ["b.com"])
+
+    def test_failed_dispatch_not_recorded(self, state, database):
+        """Test a dispatch that raises inside the lock leaves the previous record in place"""
+        with pytest.raises(RuntimeError):
+            with state.lock() as cur:
+                state.record(cur, state.plan(cur, ["a.com"]))
+                raise RuntimeError("dispatch failed")
+
+        assert "dev" not in database.rows
@@ -0,0 +1,299 @@
+"""
+Unit tests for the tenant lookup cache and the bulk hosted zone helpers
+"""
+
+from contextlib import contextmanager
+from unittest import mock
+
+import domain_helpers
+import pytest
+from domain_helpers import (
+    bulk_activate_domains,
+    bulk_deactivate_domains,
+    bulk_store_hosted_zone_info,
+    delete_hosted_zone_and_records,
+    ensure_hosted_zones_and_store,
+    get_tenants_for_domains,
+)
+from ttl_cache import TTLCache
+
+
+class DirectExecutor:
+    """Route53Executor stand-in that runs everything inline"""
+
+    def __init__(self):
+        self.calls = []
+
+    def call(self, fn, **kwargs):
+        self.calls.append((fn, kwargs))
+        return fn(**kwargs)
+
+    def map(self, fn, items):
+        results = []
+        for item in items:
+            try:
+                results.append((item, fn(item), None))
+            except Exception as e:
+                results.append((item, None, e))
+        return results
+
+
+class FakeZoneIndex:
+    """Domain -> zone ID index; lookups and creations can be made to fail per domain"""
+
+    def __init__(self, zones=None):
+        self.zones = dict(zones or {})
+        self.lookup_errors = set()
+        self.create_errors = set()
+        self.route53_client = mock.Mock()
+
+    def get_zone_id(self, domain):
+        if domain in self.lookup_errors:
+            raise ConnectionError("throttled")
+        return self.zones.get(domain)
+
+    def create_zone(self, domain, comment):
+        if domain in self.create_errors:
+            raise ValueError("TooManyHostedZones")
+        self.zones[domain] = f"ZNEW{len(self.zones)}"
+        return {
+            "HostedZone": {"Id": f"/hostedzone/{self.zones[domain]}"},
+            "ChangeInfo": {"Id": f"/change/{domain}", "Status": "PENDING"},
+        }
+
+    def remove(self, domain):
+        self.zones.pop(domain, None)
+
+
+class FakeCursor:
+    """Cursor that answers execute_values' mogrify/execute/fetchall for the upsert"""
+
+    def __init__(self, database):
+        self.database = database
+        self.connection = mock.Mock(encoding="UTF8")
+        self._rows = []
+        self._page = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, template, args):
+        self._page.append(args)
+        return b"(" + b",".join(str(arg).encode() for arg in args) + b")"
+
+    def execute(self, sql, params=None):
+        if self.database.fail:
+            raise self.database.fail
+        self.database.statements.append(sql)
+        self._rows = []
+        for domain_name, aws_zone_id, _ in self._page:
+            pk = self.database.pks.setdefault(domain_name, len(self.database.pks) + 1)
+            self._rows.append((domain_name, pk, aws_zone_id))
+        self._page = []
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeDatabase:
+    """DatabasePool stand-in assigning hosted_zone_ids primary keys"""
+
+    def __init__(self):
+        self.pks = {}
+        self.statements = []
+        self.fail = None
+        self.commits = 0
+
+    @contextmanager
+    def connection(self):
+        conn = mock.Mock()
+        conn.cursor.side_effect = lambda: FakeCursor(self)
+        conn.commit.side_effect = lambda: setattr(self, "commits", self.commits + 1)
+        yield conn
+
+
+@pytest.fixture
+def zone_index(monkeypatch):
+    index = FakeZoneIndex({"old.example.com": "ZOLD"})
+    monkeypatch.setattr(domain_helpers, "get_zone_index", lambda *args, **kwargs: index)
+    return index
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = DirectExecutor()
+    monkeypatch.setattr(domain_helpers, "get_route53_executor", lambda: executor)
+    return executor
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+
+class TestEnsureHostedZonesAndStore:
+    """Test the domain -> (hosted_zone_id, aws_hosted_zone_id) mapping"""
+
+    def test_existing_and_created_zones_stored(self, zone_index, executor, database):
+        """Test every requested domain maps to its stored PK and AWS zone ID"""
+        on_created = mock.Mock()
+
+        zones = ensure_hosted_zones_and_store(
+            database, ["old.example.com", "new.example.com"], on_created=on_created
+        )
+
+        assert zones == {"old.example.com": (1, "ZOLD"), "new.example.com": (2, "ZNEW1")}
+        on_created.assert_called_once()
+        assert on_created.call_args.args[0] == "new.example.com"
+        assert database.commits == 1
+
+    def test_partial_failures(self, zone_index, executor, database):
+        """Test failed lookups and creations map to (None, None) without failing the rest"""
+        zone_index.lookup_errors.add("flaky.example.com")
+        zone_index.create_errors.add("full.example.com")
+
+        zones = ensure_hosted_zones_and_store(
+            database, ["flaky.example.com", "full.example.com", "old.example.com"]
+        )
+
+        assert zones == {
+            "flaky.example.com": (None, None),
+            "full.example.com": (None, None),
+            "old.example.com": (1, "ZOLD"),
+        }
+
+    def test_store_failure_keeps_zone_ids(self, zone_index, executor, database):
+        """Test zones that exist but could not be stored still report their AWS zone ID"""
+        database.fail = RuntimeError("connection reset")
+
+        zones = ensure_hosted_zones_and_store(database, ["old.example.com", "new.example.com"])
+
+        assert zones == {"old.example.com": (None, "ZOLD"), "new.example.com": (None, "ZNEW1")}
+        assert "new.example.com" in zone_index.zones
+
+    def test_duplicates_requested_once(self, zone_index, executor, database):
+        zones = ensure_hosted_zones_and_store(database, ["old.example.com", "old.example.com"])
+
+        assert zones == {"old.example.com": (1, "ZOLD")}
+
+
+class TestBulkStoreHostedZoneInfo:
+    """Test the multi-row hosted_zone_ids upsert"""
+
+    def test_one_statement_returning_rows(self, database):
+        """Test all rows are upserted in one INSERT ... ON CONFLICT ... RETURNING"""
+        cur = FakeCursor(database)
+
+        stored = bulk_store_hosted_zone_info(
+            cur, [("a.example.com", "ZA"), ("b.example.com", "ZB"), ("a.example.com", "ZA2")]
+        )
+
+        assert stored == {"a.example.com": (1, "ZA2"), "b.example.com": (2, "ZB")}
+        (statement,) = database.statements
+        assert b"INSERT INTO hosted_zone_ids" in statement
+        assert b"ON CONFLICT (domain_name) DO UPDATE" in statement
+        assert b"RETURNING domain_name, hosted_zone_id, aws_hosted_zone_id" in statement
+        assert statement.count(b"Created by listener automation") == 2
+
+    def test_nothing_to_store(self, database):
+        assert bulk_store_hosted_zone_info(FakeCursor(database), []) == {}
+        assert database.statements == []
+
+
+class TestDeleteHostedZoneAndRecords:
+    """Test single-zone teardown"""
+
+    def test_zone_deleted_through_executor(self, zone_index, executor, database, monkeypatch):
+        """Test the zone delete goes through the shared executor (rate limit and retries)"""
+        changes = mock.Mock()
+        changes.delete_records.return_value = 3
+        monkeypatch.setattr(domain_helpers, "get_change_batcher", lambda *args: changes)
+
+        assert delete_hosted_zone_and_records(database, "old.example.com")
+
+        assert executor.calls == [(zone_index.route53_client.delete_hosted_zone, {"Id": "ZOLD"})]
+        assert "old.example.com" not in zone_index.zones
+
+
+class TenantDatabase:
+    """DatabasePool stand-in answering purchased_domains lookups and counting queries"""
+
+    def __init__(self, purchased):
+        self.purchased = dict(purchased)
+        self.queries = []
+
+    @contextmanager
+    def connection(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value = cursor
+
+        def execute(sql, params):
+            self.queries.append(list(params[0]))
+            cursor.fetchall.return_value = [
+                (name, self.purchased[name]) for name in params[0] if name in self.purchased
+            ]
+
+        cursor.execute.side_effect = execute
+        conn = mock.Mock()
+        conn.cursor.return_value = cursor
+        yield conn
+
+
+@pytest.fixture
+def tenant_lookups(monkeypatch):
+    lookups = TTLCache()
+    monkeypatch.setattr(domain_helpers, "_tenant_lookups", lookups)
+    return lookups
+
+
+class TestTenantLookups:
+    """Test batched, cached purchased_domains lookups and their invalidation"""
+
+    def test_uncached_domains_resolved_in_one_query(self, tenant_lookups):
+        database = TenantDatabase({"a.example.com": 1, "b.example.com": 2})
+
+        tenants = get_tenants_for_domains(
+            database, ["a.example.com", "b.example.com", "x.example.com", "a.example.com"]
+        )
+
+        assert tenants == {"a.example.com": 1, "b.example.com": 2, "x.example.com": None}
+        assert database.queries == [["a.example.com", "b.example.com", "x.example.com"]]
+
+    def test_hits_and_misses_served_from_cache(self, tenant_lookups):
+        """Test a second lookup, including a cached miss, makes no query"""
+        database = TenantDatabase({"a.example.com": 1})
+        get_tenants_for_domains(database, ["a.example.com", "x.example.com"])
+
+        tenants = get_tenants_for_domains(database, ["a.example.com", "x.example.com"])
+
+        assert tenants == {"a.example.com": 1, "x.example.com": None}
+        assert len(database.queries) == 1
+
+    def test_activation_drops_cached_misses_only(self, tenant_lookups):
+        """Test activating a domain re-checks a cached miss but keeps a known tenant"""
+        database = TenantDatabase({"a.example.com": 1})
+        get_tenants_for_domains(database, ["a.example.com", "x.example.com"])
+        database.purchased["x.example.com"] = 7
+
+        with mock.patch.object(domain_helpers, "execute_values"):
+            bulk_activate_domains(mock.Mock(), [("a.example.com", 1), ("x.example.com", None)])
+
+        assert get_tenants_for_domains(database, ["a.example.com", "x.example.com"]) == {
+            "a.example.com": 1,
+            "x.example.com": 7,
+        }
+        assert database.queries[-1] == ["x.example.com"]
+
+    def test_deactivation_drops_cached_tenants(self, tenant_lookups):
+        """Test a released domain is looked up again (another tenant may buy it)"""
+        database = TenantDatabase({"a.example.com": 1})
+        get_tenants_for_domains(database, ["a.example.com"])
+        database.purchased["a.example.com"] = 2
+
+        with mock.patch.object(domain_helpers, "execute_values"):
+            bulk_deactivate_domains(mock.Mock(), ["a.example.com"])
+
+        assert get_tenants_for_domains(database, ["a.example.com"]) == {"a.example.com": 2}
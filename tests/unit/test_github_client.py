@@ -0,0 +1,128 @@
+"""
+Unit tests for GitHub client retries and rate-limit handling
+"""
+
+import time
+from unittest import mock
+
+import pytest
+import requests
+from github_client import GitHubClient, GitHubRateLimited
+
+
+def response(status: int, text: str = "", **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode()
+    response.headers.update({name.replace("_", "-"): value for name, value in headers.items()})
+    return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    return sleeps
+
+
+@pytest.fixture
+def client(sleeps):
+    client = GitHubClient("token", min_write_interval=0)
+    client.session.request = mock.Mock()
+    return client
+
+
+def respond(client, *responses):
+    client.session.request.side_effect = list(responses)
+
+
+class TestRetries:
+    """Test which failures are retried and how long the client waits"""
+
+    def test_server_error_backs_off(self, client, sleeps):
+        respond(client, response(502), response(503), response(204))
+
+        assert client.request("GET", "/rate_limit").status_code == 204
+        assert sleeps == [1.0, 2.0]
+        assert client.stats["retries"] == 2
+
+    def test_connection_error_retried(self, client, sleeps):
+        respond(client, requests.ConnectionError("reset"), response(200))
+
+        assert client.request("GET", "/rate_limit").ok
+        assert sleeps == [1.0]
+
+    def test_client_error_not_retried(self, client, sleeps):
+        respond(client, response(422))
+
+        with pytest.raises(requests.HTTPError):
+            client.request("POST", "/repos/o/r/dispatches")
+        assert sleeps == []
+
+    def test_attempts_exhausted(self, client):
+        respond(client, *[response(500)] * client.max_attempts)
+
+        with pytest.raises(requests.HTTPError):
+            client.request("GET", "/rate_limit")
+        assert client.session.request.call_count == client.max_attempts
+
+
+class TestRateLimits:
+    """Test Retry-After, primary and secondary rate limits"""
+
+    def test_retry_after_honored(self, client, sleeps):
+        respond(client, response(429, Retry_After="7"), response(204))
+
+        client.request("POST", "/repos/o/r/dispatches")
+
+        assert sleeps == [7.0]
+        assert client.stats["rate_limited"] == 1
+
+    def test_secondary_rate_limit_waits_a_minute(self, client, sleeps):
+        """Test a 403 secondary limit without headers backs off for at least 60s"""
+        respond(
+            client,
+            response(403, "You have exceeded a secondary rate limit"),
+            response(204),
+        )
+
+        client.request("POST", "/repos/o/r/dispatches")
+
+        assert sleeps == [60.0]
+
+    def test_plain_forbidden_not_retried(self, client):
+        respond(client, response(403, "Resource not accessible by integration"))
+
+        with pytest.raises(requests.HTTPError):
+            client.request("POST", "/repos/o/r/dispatches")
+
+    def test_primary_limit_waits_for_reset(self, client, sleeps, monkeypatch):
+        monkeypatch.setattr(time, "time", lambda: 1000.0)
+        respond(
+            client,
+            response(403, X_RateLimit_Remaining="0", X_RateLimit_Reset="1009"),
+            response(204, X_RateLimit_Remaining="4999"),
+        )
+
+        client.request("GET", "/rate_limit")
+
+        assert sleeps[0] == pytest.approx(10.0)
+        assert client.stats["rate_limit_remaining"] == 4999
+
+    def test_wait_beyond_max_backoff_raises(self, client, sleeps):
+        """Test a limit that outlasts max_backoff fails fast instead of sleeping"""
+        respond(client, response(429, Retry_After="3600"))
+
+        with pytest.raises(GitHubRateLimited):
+            client.request("POST", "/repos/o/r/dispatches")
+        assert sleeps == []
+
+    def test_exhausted_quota_blocks_next_request(self, client, monkeypatch):
+        """Test a response reporting 0 remaining pauses later requests until the reset"""
+        monkeypatch.setattr(time, "time", lambda: 1000.0)
+        respond(client, response(200, X_RateLimit_Remaining="0", X_RateLimit_Reset="4600"))
+        client.request("GET", "/rate_limit")
+
+        with pytest.raises(GitHubRateLimited):
+            client.request("GET", "/rate_limit")
+        assert client.session.request.call_count == 1
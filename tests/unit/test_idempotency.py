@@ -0,0 +1,164 @@
+"""
+Unit tests for skipping already applied domain events
+"""
+
+import json
+
+import pytest
+from idempotency import IdempotencyStore, event_identity
+
+
+def domain_message(full_url: str, status: str = "Y", envelope: bool = False, **fields) -> dict:
+    """SQS message carrying a domain event, optionally wrapped in an SNS envelope"""
+    body = {"full_url": full_url, "active_status": status, **fields}
+    if envelope:
+        body = {"Type": "Notification", "Message": json.dumps(body)}
+    return {"MessageId": "m-1", "Body": json.dumps(body)}
+
+
+class FakeValkey:
+    """Shared Valkey stand-in (get/set only)"""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+        self.fail = False
+
+    def get(self, key):
+        if self.fail:
+            raise ConnectionError("valkey unavailable")
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        if self.fail:
+            raise ConnectionError("valkey unavailable")
+        self.values[key] = value
+        self.ttls[key] = ex
+
+
+class TestEventIdentity:
+    """Test which messages can be recognised as repeats"""
+
+    def test_version(self):
+        message = domain_message("a.example.com", "Y", version=42)
+
+        assert event_identity(message) == ("a.example.com", "Y", "42")
+
+    def test_event_id(self):
+        message = domain_message("a.example.com", "N", event_id="evt-7")
+
+        assert event_identity(message) == ("a.example.com", "N", "evt-7")
+
+    def test_sns_envelope(self):
+        """Test events delivered through SNS are unwrapped"""
+        message = domain_message("a.example.com", version=3, envelope=True)
+
+        assert event_identity(message) == ("a.example.com", "Y", "3")
+
+    def test_deduplication_id_fallback(self):
+        """Test events without a version or event_id fall back to the SQS dedupe ID"""
+        message = domain_message("a.example.com")
+        message["Attributes"] = {"MessageDeduplicationId": "dedupe-1"}
+
+        assert event_identity(message) == ("a.example.com", "Y", "dedupe-1")
+
+    def test_no_producer_id(self):
+        """Test events with neither an event ID nor a dedupe ID have no identity"""
+        assert event_identity(domain_message("a.example.com")) is None
+
+    def test_version_preferred_over_deduplication_id(self):
+        message = domain_message("a.example.com", version=9)
+        message["Attributes"] = {"MessageDeduplicationId": "dedupe-1"}
+
+        assert event_identity(message) == ("a.example.com", "Y", "9")
+
+    @pytest.mark.parametrize(
+        "body", ["not json", json.dumps({"active_status": "Y", "version": 1}), json.dumps([1])]
+    )
+    def test_not_a_domain_event(self, body):
+        assert event_identity({"Body": body}) is None
+
+
+class TestIdempotencyStore:
+    """Test remembering the last applied event per domain"""
+
+    def test_marked_event_is_duplicate(self):
+        store = IdempotencyStore("dev:Test")
+        message = domain_message("a.example.com", version=1)
+
+        assert not store.is_duplicate(message)
+        store.mark(message)
+
+        assert store.is_duplicate(message)
+        assert store.stats["local_hits"] == 1
+
+    def test_flip_is_not_duplicate(self):
+        """Test Y → N → Y is applied every time because only the latest event is kept"""
+        store = IdempotencyStore("dev:Test")
+        activate = domain_message("a.example.com", "Y", version=1)
+        deactivate = domain_message("a.example.com", "N", version=2)
+        reactivate = domain_message("a.example.com", "Y", version=3)
+
+        store.mark(activate)
+        assert not store.is_duplicate(deactivate)
+        store.mark(deactivate)
+
+        assert not store.is_duplicate(reactivate)
+        assert not store.is_duplicate(activate)
+
+    def test_redelivered_message_skipped(self):
+        """Test a redelivery of an applied message without a body version is skipped"""
+        store = IdempotencyStore("dev:Test")
+        message = domain_message("a.example.com")
+        message["Attributes"] = {"MessageDeduplicationId": "dedupe-1"}
+        store.mark(message)
+
+        redelivery = dict(message, ReceiptHandle="second-receive")
+
+        assert store.is_duplicate(redelivery)
+
+    def test_events_without_identity_never_skipped(self):
+        store = IdempotencyStore("dev:Test")
+        message = domain_message("a.example.com")
+
+        store.mark(message)
+
+        assert not store.is_duplicate(message)
+        assert store.stats["marked"] == 0
+
+    def test_shared_across_replicas(self):
+        """Test an event marked by one replica is skipped by another"""
+        valkey = FakeValkey()
+        replica_a = IdempotencyStore("dev:Test", client=valkey, ttl=60)
+        replica_b = IdempotencyStore("dev:Test", client=valkey, ttl=60)
+        message = domain_message("a.example.com", version=5)
+
+        replica_a.mark(message)
+
+        assert replica_b.is_duplicate(message)
+        assert replica_b.stats["remote_hits"] == 1
+        assert valkey.ttls == {"idem:dev:Test:a.example.com": 60}
+
+    def test_namespaces_are_separate(self):
+        """Test each worker queue applies the same event independently"""
+        valkey = FakeValkey()
+        route53 = IdempotencyStore("dev:Route53Worker", client=valkey)
+        github = IdempotencyStore("dev:GitHubWorker", client=valkey)
+        message = domain_message("a.example.com", version=5)
+
+        route53.mark(message)
+
+        assert not github.is_duplicate(message)
+
+    def test_cache_errors_count_as_not_seen(self):
+        """Test a Valkey outage lets events through instead of failing them"""
+        valkey = FakeValkey()
+        store = IdempotencyStore("dev:Test", client=valkey)
+        valkey.fail = True
+        message = domain_message("a.example.com", version=5)
+
+        store.mark(message)
+        assert not IdempotencyStore("dev:Test", client=valkey).is_duplicate(message)
+
+        assert store.stats["remote_errors"] == 1
+        assert store.is_duplicate(message)
@@ -0,0 +1,277 @@
+"""
+Unit tests for batched Route53 record changes
+"""
+
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from unittest import mock
+
+import boto3
+import pytest
+from route53_changes import (
+    MAX_RECORDS_PER_BATCH,
+    MAX_VALUE_CHARS_PER_BATCH,
+    ChangeBatcher,
+    ChangeFuture,
+    change_size,
+    chunk_changes,
+    iter_record_sets,
+)
+
+
+class DirectExecutor:
+    """Route53Executor stand-in that calls straight through"""
+
+    def call(self, fn, **kwargs):
+        return fn(**kwargs)
+
+
+def record_change(name: str, action: str = "CREATE", values=("192.0.2.1",), type_="A") -> dict:
+    return {
+        "Action": action,
+        "ResourceRecordSet": {
+            "Name": name,
+            "Type": type_,
+            "TTL": 300,
+            "ResourceRecords": [{"Value": value} for value in values],
+        },
+    }
+
+
+@pytest.fixture
+def batcher():
+    """ChangeBatcher on a mock client whose changes start PENDING"""
+    client = mock.Mock()
+    client.change_resource_record_sets.side_effect = lambda **kwargs: {
+        "ChangeInfo": {
+            "Id": f"/change/C{client.change_resource_record_sets.call_count}",
+            "Status": "PENDING",
+        }
+    }
+    client.get_change.return_value = {"ChangeInfo": {"Status": "INSYNC"}}
+    batcher = ChangeBatcher(client, DirectExecutor(), max_delay=60, poll_interval=0)
+    yield batcher
+    batcher.stop()
+
+
+class TestChangeSize:
+    """Test sizes counted against Route53's batch limits"""
+
+    def test_create_counts_records_and_value_chars(self):
+        """Test each value is one element and its characters count once"""
+        change = record_change("a.example.com", values=("1.2.3.4", "5.6.7.8"))
+        assert change_size(change) == (2, 14)
+
+    def test_upsert_counts_twice(self):
+        """Test UPSERT counts double, as Route53 does"""
+        assert change_size(record_change("a.example.com", "UPSERT", ("1.2.3.4",))) == (2, 14)
+
+    def test_alias_counts_as_one_record(self):
+        """Test alias record sets (no ResourceRecords) count as one element"""
+        change = {
+            "Action": "CREATE",
+            "ResourceRecordSet": {
+                "Name": "example.com",
+                "Type": "A",
+                "AliasTarget": {"DNSName": "alb.example.com", "HostedZoneId": "Z1"},
+            },
+        }
+        assert change_size(change) == (1, 0)
+
+
+class TestChunkChanges:
+    """Test grouping changes into batches that fit Route53's limits"""
+
+    def test_record_limit(self):
+        """Test no batch holds more than MAX_RECORDS_PER_BATCH elements"""
+        changes = [record_change(f"r{index}.example.com") for index in range(2500)]
+
+        chunks = list(chunk_changes(changes))
+
+        assert [len(chunk) for chunk in chunks] == [MAX_RECORDS_PER_BATCH] * 2 + [500]
+        assert [change for chunk in chunks for change in chunk] == changes
+
+    def test_value_size_limit(self):
+        """Test no batch holds more than MAX_VALUE_CHARS_PER_BATCH value characters"""
+        value = "v" * 255
+        changes = [
+            record_change(f"t{index}.example.com", values=(value,), type_="TXT")
+            for index in range(300)
+        ]
+
+        chunks = list(chunk_changes(changes))
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert sum(change_size(change)[1] for change in chunk) <= MAX_VALUE_CHARS_PER_BATCH
+        assert sum(len(chunk) for chunk in chunks) == 300
+
+    def test_same_record_set_split(self):
+        """Test two changes to the same record set never share a batch"""
+        changes = [
+            record_change("a.example.com", "DELETE"),
+            record_change("b.example.com"),
+            record_change("A.example.com.", "CREATE"),
+        ]
+
+        assert list(chunk_changes(changes)) == [changes[:2], changes[2:]]
+
+    def test_empty(self):
+        assert list(chunk_changes([])) == []
+
+
+class TestChangeBatcher:
+    """Test per-zone batching and INSYNC tracking"""
+
+    def test_changes_to_one_zone_share_a_batch(self, batcher):
+        """Test changes submitted separately to one zone go out in one call"""
+        first = batcher.submit("Z1", [record_change("a.example.com")])
+        second = batcher.submit("Z1", [record_change("b.example.com")])
+        other = batcher.submit("Z2", [record_change("c.example.org")])
+
+        batcher.flush()
+
+        calls = batcher.route53_client.change_resource_record_sets.call_args_list
+        assert sorted(
+            (call.kwargs["HostedZoneId"], len(call.kwargs["ChangeBatch"]["Changes"]))
+            for call in calls
+        ) == [("Z1", 2), ("Z2", 1)]
+        assert first.wait_submitted(timeout=1) == second.wait_submitted(timeout=1)
+        assert other.wait_submitted(timeout=1) != first.change_id
+
+    def test_futures_resolve_when_insync(self, batcher):
+        """Test futures resolve once get_change reports INSYNC"""
+        future = batcher.submit("Z1", [record_change("a.example.com")])
+        batcher.flush()
+        assert not future.done()
+
+        batcher._poll_due()
+
+        assert future.result(timeout=0) == future.change_id
+        assert batcher.stats["get_change_calls"] == 1
+        assert batcher.wait_for_insync(timeout=0)
+
+    def test_full_batch_submitted_immediately(self, batcher):
+        """Test a batch that would exceed the limits is sent without waiting for max_delay"""
+        changes = [record_change(f"r{index}.example.com") for index in range(1001)]
+
+        future = batcher.submit("Z1", changes)
+
+        assert batcher.route53_client.change_resource_record_sets.call_count == 1
+        batcher.flush()
+        assert batcher.route53_client.change_resource_record_sets.call_count == 2
+        assert future.wait_submitted(timeout=1)
+
+    def test_rejected_batch_fails_futures(self, batcher):
+        """Test a rejected batch fails its futures and wakes submit waiters"""
+        batcher.route53_client.change_resource_record_sets.side_effect = ValueError("InvalidInput")
+        future = batcher.submit("Z1", [record_change("a.example.com")])
+
+        batcher.flush()
+
+        with pytest.raises(ValueError):
+            future.wait_submitted(timeout=1)
+        assert batcher.stats["failures"] == 1
+
+    def test_wait_submitted_times_out(self):
+        """Test wait_submitted gives up instead of hanging on a dead submitter"""
+        with pytest.raises(FutureTimeoutError):
+            ChangeFuture().wait_submitted(timeout=0.01)
+
+    def test_empty_submit_resolves(self, batcher):
+        future = batcher.submit("Z1", [])
+
+        assert future.done()
+        batcher.route53_client.change_resource_record_sets.assert_not_called()
+
+
+class TestIterRecordSets:
+    """Test streaming a zone's record sets page by page"""
+
+    def test_follows_every_page(self):
+        """Test the next page starts at the name, type and identifier Route53 returned"""
+        client = mock.Mock()
+        client.list_resource_record_sets.side_effect = [
+            {
+                "ResourceRecordSets": [{"Name": "a."}, {"Name": "b."}],
+                "IsTruncated": True,
+                "NextRecordName": "c.",
+                "NextRecordType": "A",
+                "NextRecordIdentifier": "blue",
+            },
+            {
+                "ResourceRecordSets": [{"Name": "c."}],
+                "IsTruncated": True,
+                "NextRecordName": "d.",
+                "NextRecordType": "TXT",
+            },
+            {"ResourceRecordSets": [{"Name": "d."}], "IsTruncated": False},
+        ]
+
+        names = [record_set["Name"] for record_set in iter_record_sets(client, "Z1")]
+
+        assert names == ["a.", "b.", "c.", "d."]
+        assert [call.kwargs for call in client.list_resource_record_sets.call_args_list] == [
+            {"HostedZoneId": "Z1"},
+            {
+                "HostedZoneId": "Z1",
+                "StartRecordName": "c.",
+                "StartRecordType": "A",
+                "StartRecordIdentifier": "blue",
+            },
+            {"HostedZoneId": "Z1", "StartRecordName": "d.", "StartRecordType": "TXT"},
+        ]
+
+    def test_pages_fetched_lazily(self):
+        """Test a page is only fetched once the previous one has been consumed"""
+        client = mock.Mock()
+        client.list_resource_record_sets.return_value = {
+            "ResourceRecordSets": [{"Name": "a."}],
+            "IsTruncated": True,
+            "NextRecordName": "a.",
+        }
+
+        record_sets = iter_record_sets(client, "Z1")
+        next(record_sets)
+
+        assert client.list_resource_record_sets.call_count == 1
+
+    def test_calls_go_through_wrapper(self):
+        """Test every page request goes through the supplied call wrapper"""
+        client = mock.Mock()
+        client.list_resource_record_sets.return_value = {
+            "ResourceRecordSets": [],
+            "IsTruncated": False,
+        }
+        call = mock.Mock(side_effect=lambda fn, **kwargs: fn(**kwargs))
+
+        assert list(iter_record_sets(client, "Z1", call)) == []
+        call.assert_called_once_with(client.list_resource_record_sets, HostedZoneId="Z1")
+
+
+class TestDeleteRecords:
+    """Test zone teardown against a (moto) Route53 zone"""
+
+    def test_large_zone_torn_down(self):
+        """Test every matching record set is deleted across several pages and batches"""
+        client = boto3.client("route53", region_name="us-east-1")
+        zone_id = client.create_hosted_zone(Name="example.com", CallerReference="teardown")[
+            "HostedZone"
+        ]["Id"].split("/")[-1]
+        records = [record_change(f"r{index:04d}.example.com") for index in range(1500)]
+        for changes in chunk_changes(records):
+            client.change_resource_record_sets(
+                HostedZoneId=zone_id, ChangeBatch={"Changes": changes}
+            )
+
+        batcher = ChangeBatcher(client, DirectExecutor(), max_delay=60)
+        try:
+            deleted = batcher.delete_records(
+                zone_id, lambda record_set: record_set["Type"] not in ("SOA", "NS")
+            )
+        finally:
+            batcher.stop()
+
+        remaining = sorted(record_set["Type"] for record_set in iter_record_sets(client, zone_id))
+        assert deleted == 1500
+        assert batcher.stats["batches_submitted"] == 2
+        assert remaining == ["NS", "SOA"]
@@ -0,0 +1,139 @@
+"""
+Unit tests for the Route53 token bucket and throttling retries
+"""
+
+import time
+from unittest import mock
+
+import pytest
+import route53_executor
+from botocore.exceptions import ClientError
+from route53_executor import Route53Executor, TokenBucket
+
+
+def client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "ChangeResourceRecordSets")
+
+
+class FakeClock:
+    """Replaces time.monotonic and time.sleep; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def executor(clock, monkeypatch):
+    # Back off by the full cap so delays are predictable
+    monkeypatch.setattr(route53_executor.random, "uniform", lambda low, high: high)
+    return Route53Executor(TokenBucket(5.0), max_workers=1, max_retries=3, base_delay=0.5)
+
+
+class TestTokenBucket:
+    """Test token refill and the adaptive rate"""
+
+    def test_burst_then_wait(self, clock):
+        """Test a full bucket serves capacity calls at once and then paces at the rate"""
+        bucket = TokenBucket(5.0)
+
+        waits = [bucket.acquire() for _ in range(6)]
+
+        assert waits[:5] == [0.0] * 5
+        assert waits[5] == pytest.approx(0.2)
+
+    def test_refill_capped_at_capacity(self, clock):
+        bucket = TokenBucket(5.0, capacity=2)
+        bucket.acquire()
+        bucket.acquire()
+
+        clock.now += 60
+
+        assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+        assert bucket.acquire() == pytest.approx(0.2)
+
+    def test_slow_down_and_speed_up(self, clock):
+        """Test throttling halves the rate down to min_rate and successes creep back"""
+        bucket = TokenBucket(4.0, min_rate=1.5)
+
+        bucket.slow_down()
+        assert bucket.rate == 2.0
+        bucket.slow_down()
+        assert bucket.rate == 1.5
+
+        for _ in range(100):
+            bucket.speed_up()
+        assert bucket.rate == 4.0
+
+
+class TestRoute53Executor:
+    """Test retries, backoff and stats of rate-limited calls"""
+
+    def test_throttling_retried_with_backoff(self, executor, clock):
+        """Test throttled calls back off exponentially, slow the limiter and then succeed"""
+        fn = mock.Mock(
+            side_effect=[client_error("Throttling"), client_error("PriorRequestNotComplete"), "ok"],
+            __name__="change_resource_record_sets",
+        )
+
+        assert executor.call(fn, HostedZoneId="Z1") == "ok"
+
+        assert fn.call_count == 3
+        fn.assert_called_with(HostedZoneId="Z1")
+        assert clock.sleeps == [0.5, 1.0]
+        assert executor.stats["throttle_events"] == 2
+        assert executor.stats["throttled_seconds"] == pytest.approx(1.5)
+        assert executor.limiter.rate < executor.limiter.target_rate
+
+    def test_backoff_capped(self, executor, clock):
+        executor.max_retries = 8
+        executor.max_delay = 2.0
+        fn = mock.Mock(side_effect=[client_error("Throttling")] * 6 + ["ok"])
+
+        executor.call(fn)
+
+        assert clock.sleeps == [0.5, 1.0, 2.0, 2.0, 2.0, 2.0]
+
+    def test_retries_exhausted(self, executor, clock):
+        fn = mock.Mock(side_effect=client_error("Throttling"))
+
+        with pytest.raises(ClientError):
+            executor.call(fn)
+
+        assert fn.call_count == executor.max_retries + 1
+        assert executor.stats["failures"] == 1
+
+    def test_other_errors_not_retried(self, executor, clock):
+        fn = mock.Mock(side_effect=client_error("NoSuchHostedZone"))
+
+        with pytest.raises(ClientError):
+            executor.call(fn)
+
+        assert fn.call_count == 1
+        assert clock.sleeps == []
+
+    def test_map_collects_results_and_errors(self, executor):
+        def double(item):
+            if item == 2:
+                raise ValueError("bad item")
+            return item * 2
+
+        results = executor.map(double, [1, 2, 3])
+
+        assert [(item, result) for item, result, _ in results] == [(1, 2), (2, None), (3, 6)]
+        assert isinstance(results[1][2], ValueError)
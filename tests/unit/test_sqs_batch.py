@@ -0,0 +1,284 @@
+"""
+Unit tests for batched SQS acknowledgements
+"""
+
+import time
+from unittest import mock
+
+import boto3
+import pytest
+from sqs_batch import AckBuffer, VisibilityHeartbeat
+
+
+def batch_response(*codes):
+    """delete_message_batch response by entry position: None, "Code" or "sender:Code" """
+    response = {"Successful": [], "Failed": []}
+    for index, code in enumerate(codes):
+        if code is None:
+            response["Successful"].append({"Id": str(index)})
+            continue
+        sender, _, code = code.rpartition(":")
+        response["Failed"].append(
+            {"Id": str(index), "Code": code, "Message": code, "SenderFault": bool(sender)}
+        )
+    return response
+
+
+QUEUE_URL = "https://sqs.example/queue"
+
+
+@pytest.fixture
+def sqs_client():
+    """SQS client mock whose deletes succeed unless a test says otherwise"""
+    client = mock.Mock()
+    client.delete_message_batch.return_value = {"Successful": [], "Failed": []}
+    return client
+
+
+@pytest.fixture
+def on_failure():
+    return mock.Mock()
+
+
+@pytest.fixture
+def buffer(sqs_client, on_failure):
+    """AckBuffer whose deadline thread stays out of the way, closed afterwards"""
+    buffer = AckBuffer(sqs_client, QUEUE_URL, max_delay=60, on_failure=on_failure)
+    yield buffer
+    buffer.close()
+
+
+@pytest.fixture
+def heartbeat(sqs_client):
+    """VisibilityHeartbeat whose thread stays out of the way unless a test shortens interval"""
+    sqs_client.change_message_visibility_batch.return_value = {"Successful": [], "Failed": []}
+    heartbeat = VisibilityHeartbeat(sqs_client, QUEUE_URL, 30, interval=60)
+    yield heartbeat
+    heartbeat.close()
+
+
+def deleted_handles(sqs_client):
+    """Receipt handles passed to delete_message_batch, one list per call"""
+    return [
+        [entry["ReceiptHandle"] for entry in call.kwargs["Entries"]]
+        for call in sqs_client.delete_message_batch.call_args_list
+    ]
+
+
+class TestAckBufferFlush:
+    """Test when and how buffered handles are deleted"""
+
+    def test_full_batch_flushed_inline(self, sqs_client, request):
+        """Test reaching max_batch deletes the batch without waiting for the deadline"""
+        buffer = AckBuffer(sqs_client, QUEUE_URL, max_batch=3, max_delay=60)
+        request.addfinalizer(buffer.close)
+
+        for handle in ("a", "b", "c"):
+            buffer.add(handle)
+
+        assert deleted_handles(sqs_client) == [["a", "b", "c"]]
+        assert buffer.pending_count == 0
+        assert buffer.stats["acks_deleted"] == 3
+
+    def test_flush_splits_into_batches_of_ten(self, sqs_client, buffer):
+        """Test a flush issues one call per 10 handles"""
+        with buffer._lock:
+            buffer._pending = [(f"h{index}", time.monotonic()) for index in range(23)]
+
+        assert buffer.flush() == []
+        assert [len(handles) for handles in deleted_handles(sqs_client)] == [10, 10, 3]
+
+    def test_deadline_flush(self, sqs_client, request):
+        """Test a partial batch is deleted once it has waited max_delay"""
+        buffer = AckBuffer(sqs_client, QUEUE_URL, max_delay=0.05)
+        request.addfinalizer(buffer.close)
+        buffer.add("a")
+
+        deadline = time.monotonic() + 5
+        while buffer.pending_count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert deleted_handles(sqs_client) == [["a"]]
+
+    def test_close_flushes_remaining(self, sqs_client, buffer):
+        """Test close deletes handles still buffered"""
+        buffer.add("a")
+        buffer.add("b")
+
+        buffer.close()
+
+        assert deleted_handles(sqs_client) == [["a", "b"]]
+
+
+class TestAckBufferPartialFailures:
+    """Test per-entry failures from delete_message_batch"""
+
+    def test_server_fault_retried_once(self, sqs_client, buffer, on_failure):
+        """Test a server-side failure is retried in the same flush and then succeeds"""
+        sqs_client.delete_message_batch.side_effect = [
+            batch_response(None, "InternalError", None),
+            batch_response(None),
+        ]
+        for handle in ("a", "b", "c"):
+            buffer.add(handle)
+
+        assert buffer.flush() == []
+        assert deleted_handles(sqs_client) == [["a", "b", "c"], ["b"]]
+        assert buffer.stats["acks_deleted"] == 3
+        assert buffer.stats["acks_failed"] == 0
+        on_failure.assert_not_called()
+
+    def test_sender_fault_not_retried(self, sqs_client, buffer, on_failure):
+        """Test a sender fault (e.g. expired receipt handle) is reported without a retry"""
+        sqs_client.delete_message_batch.return_value = batch_response(
+            None, "sender:ReceiptHandleIsInvalid"
+        )
+        buffer.add("a")
+        buffer.add("b")
+
+        failures = buffer.flush()
+
+        assert [entry["Code"] for entry in failures] == ["ReceiptHandleIsInvalid"]
+        assert deleted_handles(sqs_client) == [["a", "b"]]
+        assert buffer.stats["acks_deleted"] == 1
+        assert buffer.stats["acks_failed"] == 1
+        on_failure.assert_called_once()
+        assert on_failure.call_args.args[0] == "b"
+
+    def test_repeated_server_fault_given_up(self, sqs_client, buffer, on_failure):
+        """Test a handle that fails again on its retry is given up (SQS redelivers it)"""
+        sqs_client.delete_message_batch.return_value = batch_response("InternalError")
+        buffer.add("a")
+
+        failures = buffer.flush()
+
+        assert len(failures) == 1
+        assert deleted_handles(sqs_client) == [["a"], ["a"]]
+        assert buffer.stats["acks_failed"] == 1
+        on_failure.assert_called_once()
+        assert not buffer._retried
+
+    def test_request_error_fails_every_entry(self, sqs_client, buffer):
+        """Test an exception from the call is treated as a server fault for the whole batch"""
+        sqs_client.delete_message_batch.side_effect = [
+            ConnectionError("connection reset"),
+            batch_response(None, None),
+        ]
+        buffer.add("a")
+        buffer.add("b")
+
+        assert buffer.flush() == []
+        assert deleted_handles(sqs_client) == [["a", "b"], ["a", "b"]]
+        assert buffer.stats["acks_deleted"] == 2
+
+
+def visibility_changes(sqs_client):
+    """(receipt handle, timeout) pairs per change_message_visibility_batch call"""
+    return [
+        [(entry["ReceiptHandle"], entry["VisibilityTimeout"]) for entry in call.kwargs["Entries"]]
+        for call in sqs_client.change_message_visibility_batch.call_args_list
+    ]
+
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestVisibilityHeartbeat:
+    """Test visibility extension while handlers run and release of failed messages"""
+
+    def test_inflight_messages_extended(self, sqs_client, request):
+        """Test every tracked handle is extended by the visibility timeout each interval"""
+        sqs_client.change_message_visibility_batch.return_value = {"Successful": [], "Failed": []}
+        heartbeat = VisibilityHeartbeat(sqs_client, QUEUE_URL, 30, interval=0.02)
+        request.addfinalizer(heartbeat.close)
+
+        heartbeat.track(["a", "b"])
+
+        assert wait_for(lambda: heartbeat.stats["extensions"] >= 2)
+        assert visibility_changes(sqs_client)[0] == [("a", 30), ("b", 30)]
+
+    def test_hung_handler_stops_being_extended(self, sqs_client, request):
+        """Test a message held longer than max_hold is dropped instead of extended"""
+        heartbeat = VisibilityHeartbeat(sqs_client, QUEUE_URL, 30, interval=0.02, max_hold=0)
+        request.addfinalizer(heartbeat.close)
+
+        heartbeat.track(["a"])
+
+        assert wait_for(lambda: heartbeat.stats["expired"] == 1)
+        assert visibility_changes(sqs_client) == []
+
+    def test_untracked_messages_not_extended(self, sqs_client, heartbeat):
+        heartbeat.track(["a", "b"])
+
+        heartbeat.untrack(["a"])
+
+        assert list(heartbeat._inflight) == ["b"]
+
+    def test_release_makes_messages_visible(self, sqs_client, heartbeat):
+        """Test released handles stop being extended and get the retry visibility"""
+        heartbeat.track(["a", "b"])
+
+        heartbeat.release(["a"], visibility_timeout=5)
+
+        assert visibility_changes(sqs_client) == [[("a", 5)]]
+        assert list(heartbeat._inflight) == ["b"]
+        assert heartbeat.stats["releases"] == 1
+
+    def test_release_split_into_batches_of_ten(self, sqs_client, heartbeat):
+        heartbeat.release([f"h{index}" for index in range(12)])
+
+        assert [len(entries) for entries in visibility_changes(sqs_client)] == [10, 2]
+
+    def test_failed_release_not_counted(self, sqs_client, heartbeat):
+        """Test per-entry failures (e.g. an already deleted message) are counted as failures"""
+        sqs_client.change_message_visibility_batch.return_value = {
+            "Successful": [{"Id": "0"}],
+            "Failed": [{"Id": "1", "Code": "ReceiptHandleIsInvalid", "SenderFault": True}],
+        }
+
+        heartbeat.release(["a", "b"])
+
+        assert heartbeat.stats["releases"] == 1
+        assert heartbeat.stats["failures"] == 1
+
+
+class TestAckBufferWithSQS:
+    """Test against a (moto) SQS FIFO queue"""
+
+    def test_acknowledged_messages_are_deleted(self):
+        """Test every received message is gone after the buffer is closed"""
+        sqs = boto3.client("sqs", region_name="us-east-1")
+        queue_url = sqs.create_queue(
+            QueueName="domain-changes.fifo",
+            Attributes={"FifoQueue": "true", "ContentBasedDeduplication": "true"},
+        )["QueueUrl"]
+        for index in range(12):
+            sqs.send_message(
+                QueueUrl=queue_url, MessageBody=f"change {index}", MessageGroupId=f"g{index}"
+            )
+
+        buffer = AckBuffer(sqs, queue_url, max_delay=60)
+        received = 0
+        while True:
+            messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get(
+                "Messages", []
+            )
+            if not messages:
+                break
+            for message in messages:
+                buffer.add(message["ReceiptHandle"])
+            received += len(messages)
+        buffer.close()
+
+        attributes = sqs.get_queue_attributes(
+            QueueUrl=queue_url,
+            AttributeNames=["ApproximateNumberOfMessages", "ApproximateNumberOfMessagesNotVisible"],
+        )["Attributes"]
+        assert received == 12
+        assert buffer.stats["acks_deleted"] == 12
+        assert attributes["ApproximateNumberOfMessages"] == "0"
+        assert attributes["ApproximateNumberOfMessagesNotVisible"] == "0"
@@ -0,0 +1,132 @@
+"""
+Unit tests for settling SQSDNSWorker messages after a batch
+"""
+
+import json
+from unittest import mock
+
+import pytest
+import sqs_dns_worker
+from sqs_dns_worker import SQSDNSWorker
+
+
+def dns_message(full_url: str, handle: str, status: str = "Y") -> dict:
+    body = {"full_url": full_url, "tenant_id": "t-1", "active_status": status, "hosted_zone_id": 1}
+    return {"MessageId": handle, "ReceiptHandle": handle, "Body": json.dumps(body)}
+
+
+@pytest.fixture
+def worker():
+    """SQSDNSWorker with its acknowledgement buffer and heartbeat replaced by mocks"""
+    worker = SQSDNSWorker(queue_url="https://sqs.example/dns", github_token="token")
+    worker.acks = mock.Mock()
+    worker.heartbeat = mock.Mock()
+    return worker
+
+
+def deleted(worker) -> list:
+    return [call.args[0] for call in worker.acks.add.call_args_list]
+
+
+def released(worker) -> list:
+    return [handle for call in worker.heartbeat.release.call_args_list for handle in call.args[0]]
+
+
+class TestProcessMessage:
+    """Test what happens to a message's receipt handle when it is received"""
+
+    def test_valid_message_held_for_batch(self, worker):
+        assert worker.process_message(dns_message("a.example.com", "h1"))
+
+        assert worker.pending_domains == {"a.example.com"}
+        assert worker.pending_receipts == {"a.example.com": ["h1"]}
+        assert deleted(worker) == []
+
+    @pytest.mark.parametrize(
+        "body", ["not json", json.dumps({"full_url": "a.example.com"})], ids=["json", "fields"]
+    )
+    def test_invalid_message_deleted(self, worker, body):
+        """Test a message that can never succeed is deleted instead of redelivered"""
+        message = {"MessageId": "h1", "ReceiptHandle": "h1", "Body": body}
+
+        assert not worker.process_message(message)
+
+        assert deleted(worker) == ["h1"]
+        assert released(worker) == []
+
+    def test_unexpected_error_released(self, worker):
+        """Test a message that hit an unexpected error is released, not batched or deleted"""
+        worker.coalescer = mock.Mock()
+        worker.coalescer.add.side_effect = RuntimeError("boom")
+
+        assert not worker.process_message(dns_message("a.example.com", "h1"))
+
+        assert released(worker) == ["h1"]
+        assert deleted(worker) == []
+
+
+class TestSettleReceipts:
+    """Test which messages of a closed batch are deleted and which are retried"""
+
+    def test_applied_deleted_and_rest_released(self, worker):
+        """Test only domains whose change was applied have their messages deleted"""
+        for full_url, handle in [
+            ("a.example.com", "h1"),
+            ("a.example.com", "h2"),
+            ("b.example.com", "h3"),
+        ]:
+            worker.process_message(dns_message(full_url, handle))
+
+        worker.settle_receipts({"a.example.com"})
+
+        assert deleted(worker) == ["h1", "h2"]
+        assert released(worker) == ["h3"]
+        assert worker.heartbeat.release.call_args.args[1] == worker.retry_visibility_timeout
+        assert not worker.pending_receipts
+
+    def test_nothing_applied_releases_everything(self, worker):
+        """Test a failed dispatch leaves every message of the batch to be redelivered"""
+        worker.process_message(dns_message("a.example.com", "h1"))
+        worker.process_message(dns_message("b.example.com", "h2", status="N"))
+
+        worker.settle_receipts(set())
+
+        assert deleted(worker) == []
+        assert sorted(released(worker)) == ["h1", "h2"]
+
+
+class TestSyncHostedZones:
+    """Test the zone stage for the domains committed in a batch"""
+
+    def test_activated_domains_ensured_in_one_call(self, worker, monkeypatch):
+        """Test activations go through ensure_hosted_zones_and_store and map to outcomes"""
+        worker.r53 = mock.Mock()
+        worker.r53.map.return_value = []
+        worker.changes = mock.Mock()
+        change = {"Id": "/change/C1", "Status": "PENDING"}
+
+        def ensure(db_pool, domains, region_name, created_by, on_created):
+            on_created("new.example.com", {"ChangeInfo": change})
+            return {
+                "old.example.com": (1, "ZOLD"),
+                "new.example.com": (2, "ZNEW"),
+                "unstored.example.com": (None, "ZUN"),
+                "failed.example.com": (None, None),
+            }
+
+        monkeypatch.setattr(sqs_dns_worker, "ensure_hosted_zones_and_store", ensure)
+
+        outcomes = worker.sync_hosted_zones(
+            [],
+            ["old.example.com", "new.example.com", "unstored.example.com", "failed.example.com"],
+        )
+
+        assert {domain: ok for domain, (ok, _) in outcomes.items()} == {
+            "old.example.com": True,
+            "new.example.com": True,
+            "unstored.example.com": False,
+            "failed.example.com": False,
+        }
+        assert outcomes["new.example.com"][1] == "activated, zone created"
+        worker.changes.track.assert_called_once_with(change)
+        assert worker.stats["hosted_zones_created"] == 1
@@ -224,6 +224,123 @@ class TestServiceStacks:
         template.has_resource("AWS::ECS::Service", {})
         template.has_resource("AWS::ECS::TaskDefinition", {})
 
+    def test_control_plane_backlog_autoscaling(self, cdk_app, test_environment, test_tags):
+        """Test ControlPlane service scales on the published backlog-per-task metric"""
+        network_stack = NetworkStack(cdk_app, "TestNetworkStack", env=test_environment)
+        shared_stack = SharedStack(
+            cdk_app, "TestSharedStack", env=test_environment, vpc=network_stack.vpc
+        )
+        db_stack = DatabaseStack(
+            cdk_app,
+            "TestDatabaseStack",
+            env=test_environment,
+            vpc=network_stack.vpc,
+            environment="test",
+            multi_az=False,
+            instance_class="db.t3.micro",
+            deletion_protection=False,
+        )
+
+        control_plane_stack = ControlPlaneServiceStack(
+            cdk_app,
+            "TestControlPlaneStack",
+            env=test_environment,
+            vpc=network_stack.vpc,
+            cluster=shared_stack.cluster,
+            image_uri=f"control-plane:{test_tags['control-plane']}",
+            db_secret=db_stack.secret,
+            environment="test",
+            ecs_task_security_group=shared_stack.ecs_task_sg,
+            service_name="control-plane-service",
+            max_capacity=3,
+        )
+
+        template = assertions.Template.from_stack(control_plane_stack)
+
+        # Verify backlog-per-task target tracking between 1 and max_capacity tasks
+        template.has_resource_properties(
+            "AWS::ApplicationAutoScaling::ScalableTarget",
+            {"MinCapacity": 1, "MaxCapacity": 3},
+        )
+        template.has_resource_properties(
+            "AWS::ApplicationAutoScaling::ScalingPolicy",
+            {
+                "PolicyType": "TargetTrackingScaling",
+                "TargetTrackingScalingPolicyConfiguration": assertions.Match.object_like(
+                    {
+                        "CustomizedMetricSpecification": assertions.Match.object_like(
+                            {
+                                "MetricName": "BacklogPerTask",
+                                "Namespace": "Storefront/ControlPlane",
+                            }
+                        ),
+                        "TargetValue": 50,
+                    }
+                ),
+            },
+        )
+
+    def test_control_plane_delegation_set_permissions(self, cdk_app, test_environment, test_tags):
+        """Test ControlPlane tasks may create the reusable delegation set and store its ID"""
+        network_stack = NetworkStack(cdk_app, "TestNetworkStack", env=test_environment)
+        shared_stack = SharedStack(
+            cdk_app, "TestSharedStack", env=test_environment, vpc=network_stack.vpc
+        )
+        db_stack = DatabaseStack(
+            cdk_app,
+            "TestDatabaseStack",
+            env=test_environment,
+            vpc=network_stack.vpc,
+            environment="test",
+            multi_az=False,
+            instance_class="db.t3.micro",
+            deletion_protection=False,
+        )
+
+        control_plane_stack = ControlPlaneServiceStack(
+            cdk_app,
+            "TestControlPlaneStack",
+            env=test_environment,
+            vpc=network_stack.vpc,
+            cluster=shared_stack.cluster,
+            image_uri=f"control-plane:{test_tags['control-plane']}",
+            db_secret=db_stack.secret,
+            environment="test",
+            ecs_task_security_group=shared_stack.ecs_task_sg,
+            service_name="control-plane-service",
+        )
+
+        template = assertions.Template.from_stack(control_plane_stack)
+
+        template.has_resource_properties(
+            "AWS::IAM::Policy",
+            {
+                "PolicyDocument": {
+                    "Statement": assertions.Match.array_with(
+                        [
+                            assertions.Match.object_like(
+                                {
+                                    "Action": assertions.Match.array_with(
+                                        ["route53:CreateReusableDelegationSet"]
+                                    ),
+                                    "Effect": "Allow",
+                                }
+                            ),
+                            assertions.Match.object_like(
+                                {
+                                    "Action": "ssm:PutParameter",
+                                    "Effect": "Allow",
+                                    "Resource": assertions.Match.string_like_regexp(
+                                        "/storefront-test/route53/delegation-set-id$"
+                                    ),
+                                }
+                            ),
+                        ]
+                    )
+                }
+            },
+        )
+
 
 class TestECRStack:
     """Test ECR repository creation"""
@@ -0,0 +1,140 @@
+"""
+Unit tests for the versioned tenant cache writes and rebuild
+"""
+
+from contextlib import contextmanager
+from unittest import mock
+
+import pytest
+from tenant_cache import PUBLISH_SCRIPT, TenantCache, decode_entry, encode_entry
+
+
+class FakeValkey:
+    """In-memory Valkey hash; the registered script applies PUBLISH_SCRIPT's version check"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.fail = None
+
+    def register_script(self, script):
+        assert script == PUBLISH_SCRIPT
+        return self._publish
+
+    def _publish(self, keys, args):
+        if self.fail:
+            raise self.fail
+        fields = self.hashes.setdefault(keys[0], {})
+        applied = 0
+        for index in range(0, len(args), 3):
+            field, value, version = args[index : index + 3]
+            current = fields.get(field)
+            if int(version) >= (decode_entry(current)[0] if current else -1):
+                fields[field] = value
+                applied += 1
+        return applied
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def exists(self, key):
+        return int(bool(self.hashes.get(key)))
+
+    def hscan_iter(self, key, count=None):
+        return iter(list(self.hashes.get(key, {}).items()))
+
+    def hdel(self, key, field):
+        return int(self.hashes.get(key, {}).pop(field, None) is not None)
+
+
+@pytest.fixture
+def client():
+    return FakeValkey()
+
+
+@pytest.fixture
+def cache(client):
+    return TenantCache(client, "dev")
+
+
+class TestEntries:
+    def test_round_trip(self):
+        assert decode_entry(encode_entry(5, "Y", "t-1")) == (5, "Y", "t-1")
+        assert decode_entry(encode_entry(5, "N", None)) == (5, "N", None)
+
+
+class TestPublish:
+    """Test versioned HSET: older writes never overwrite newer ones"""
+
+    def test_newer_version_overwrites(self, cache):
+        cache.publish([("a.example.com", "t-1", "Y")], version=1)
+        cache.publish([("a.example.com", "t-1", "N")], version=2)
+
+        assert cache.lookup("a.example.com") == ("t-1", "N")
+
+    def test_older_version_skipped(self, cache):
+        """Test a slow write arriving after a newer one is dropped and counted as stale"""
+        cache.publish([("a.example.com", "t-1", "N")], version=2)
+
+        assert cache.publish([("a.example.com", "t-1", "Y")], version=1) == 0
+
+        assert cache.lookup("a.example.com") == ("t-1", "N")
+        assert cache.stats["stale_skipped"] == 1
+
+    def test_publish_changes(self, cache, client):
+        applied = cache.publish_changes(
+            activations=[("a.example.com", "t-1")],
+            deactivations=["b.example.com", ("c.example.com", "t-3")],
+        )
+
+        assert applied == 3
+        assert cache.lookup("a.example.com") == ("t-1", "Y")
+        assert cache.lookup("b.example.com") == (None, "N")
+        assert cache.lookup("c.example.com") == ("t-3", "N")
+
+    def test_cache_error_swallowed(self, cache, client):
+        """Test a cache outage is logged and counted instead of failing the batch"""
+        client.fail = ConnectionError("timeout")
+
+        assert cache.publish([("a.example.com", "t-1", "Y")]) == 0
+        assert cache.stats["errors"] == 1
+
+    def test_disabled_without_client(self):
+        cache = TenantCache(None, "dev")
+
+        assert not cache.enabled
+        assert cache.publish([("a.example.com", "t-1", "Y")]) == 0
+
+
+class TestRebuild:
+    """Test reloading the hash from the domains table"""
+
+    @staticmethod
+    def db_pool(rows):
+        cur = mock.MagicMock()
+        cur.__enter__.return_value = cur
+        cur.fetchmany.side_effect = lambda size: [rows.pop(0) for _ in range(min(size, len(rows)))]
+        conn = mock.Mock()
+        conn.cursor.return_value = cur
+        db_pool = mock.Mock()
+
+        @contextmanager
+        def connection():
+            yield conn
+
+        db_pool.connection = connection
+        return db_pool
+
+    def test_rebuild_loads_and_prunes(self, cache, client, monkeypatch):
+        """Test table rows are loaded, stale fields removed and newer writes kept"""
+        monkeypatch.setattr("tenant_cache.current_version", lambda: 100)
+        cache.publish([("gone.example.com", "t-9", "Y")], version=50)
+        cache.publish([("a.example.com", "t-1", "N")], version=200)
+        cache.publish([("late.example.com", "t-2", "Y")], version=200)
+        rows = [("a.example.com", "t-1", "Y"), ("b.example.com", "t-2", "Y")]
+
+        assert cache.rebuild(self.db_pool(rows), batch_size=1) == 2
+
+        assert cache.lookup("a.example.com") == ("t-1", "N")
+        assert cache.lookup("b.example.com") == ("t-2", "Y")
+        assert cache.lookup("gone.example.com") is None
+        assert cache.lookup("late.example.com") == ("t-2", "Y")
@@ -0,0 +1,64 @@
+"""
+Unit tests for the bounded TTL cache
+"""
+
+import time
+
+import pytest
+from ttl_cache import MISSING, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestTTLCache:
+    """Test expiry, negative entries and LRU eviction"""
+
+    def test_entry_expires_after_ttl(self, clock):
+        cache = TTLCache(ttl=10)
+        cache.set("a", 1)
+
+        clock[0] += 9.9
+        assert cache.get("a") == 1
+        clock[0] += 0.1
+        assert cache.get("a") is MISSING
+
+        assert cache.stats == {"hits": 1, "misses": 1, "evictions": 0}
+        assert len(cache) == 0
+
+    def test_negative_entry_with_shorter_ttl(self, clock):
+        """Test a cached None is a hit until its own TTL runs out"""
+        cache = TTLCache(ttl=300)
+        cache.set("a", None, ttl=30)
+
+        assert cache.get("a") is None
+        clock[0] += 30
+        assert cache.get("a", default="absent") == "absent"
+
+    def test_least_recently_used_evicted(self, clock):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        cache.set("c", 3)
+
+        assert cache.get("b") is MISSING
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+        assert cache.stats["evictions"] == 1
+
+    def test_delete_and_clear(self):
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.delete("a")
+        cache.delete("missing")
+        assert cache.get("a") is MISSING
+
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,168 @@
+"""
+Unit tests for the hosted zone index: paged refresh, reconciliation and miss verification
+"""
+
+from contextlib import contextmanager
+from unittest import mock
+
+import pytest
+from zone_index import HostedZoneIndex
+
+
+def zone(name: str, zone_id: str, private: bool = False) -> dict:
+    return {"Name": f"{name}.", "Id": f"/hostedzone/{zone_id}", "Config": {"PrivateZone": private}}
+
+
+class FakeRoute53:
+    """Serves list_hosted_zones from a zone list, page_size zones per page"""
+
+    def __init__(self, zones, page_size: int = 2):
+        self.zones = list(zones)
+        self.page_size = page_size
+        self.list_hosted_zones = mock.Mock(side_effect=self._list)
+        self.list_hosted_zones_by_name = mock.Mock(side_effect=self._list_by_name)
+
+    def _list(self, MaxItems, Marker=None):
+        start = int(Marker) if Marker else 0
+        end = start + self.page_size
+        response = {"HostedZones": self.zones[start:end], "IsTruncated": end < len(self.zones)}
+        if response["IsTruncated"]:
+            response["NextMarker"] = str(end)
+        return response
+
+    def _list_by_name(self, DNSName, MaxItems):
+        # Route53 answers with the zones at or after DNSName in name order
+        names = sorted(self.zones, key=lambda zone: zone["Name"])
+        return {"HostedZones": [z for z in names if z["Name"] >= f"{DNSName}."][:1]}
+
+
+@pytest.fixture
+def route53():
+    return FakeRoute53(
+        [
+            zone("a.example.com", "ZA"),
+            zone("b.example.com", "ZB"),
+            zone("internal.example.com", "ZI", private=True),
+            zone("c.example.com", "ZC"),
+        ]
+    )
+
+
+@pytest.fixture
+def index(route53):
+    return HostedZoneIndex(route53, refresh_interval=0)
+
+
+class TestRefresh:
+    """Test the paged list_hosted_zones walk"""
+
+    def test_walk_resumes_from_marker(self, index, route53):
+        """Test a step fetches only its pages and the next step continues where it stopped"""
+        assert not index.refresh(pages=1)
+        assert index._zones == {"a.example.com": "ZA", "b.example.com": "ZB"}
+
+        assert index.refresh(pages=1)
+        assert route53.list_hosted_zones.call_args.kwargs["Marker"] == "2"
+        assert index._zones == {"a.example.com": "ZA", "b.example.com": "ZB", "c.example.com": "ZC"}
+        assert index.stats["list_calls"] == 2
+
+    def test_full_scan_restarts_listing(self, index, route53):
+        index.refresh(pages=1)
+
+        index.full_scan()
+
+        assert "Marker" not in route53.list_hosted_zones.call_args_list[1].kwargs
+        assert index.stats["zones_indexed"] == 3
+
+
+class TestReconciliation:
+    """Test what a finished pass drops from the index"""
+
+    def test_deleted_zone_dropped(self, index, route53):
+        index.full_scan()
+        del route53.zones[0]
+
+        index.full_scan()
+
+        assert "a.example.com" not in index._zones
+        assert index.stats["zones_indexed"] == 2
+
+    def test_zone_written_during_pass_kept(self, index, route53):
+        """Test a zone added mid-pass survives even though the listing did not return it"""
+        index.refresh(pages=1)
+        index.add("new.example.com", "/hostedzone/ZNEW")
+
+        index.refresh(pages=1)
+
+        assert index._zones["new.example.com"] == "ZNEW"
+
+    def test_stale_seeded_zone_dropped(self, index):
+        """Test a zone seeded before the pass started is dropped if the listing lacks it"""
+        index.add("gone.example.com", "ZGONE")
+        index._written["gone.example.com"] = 0
+
+        index.full_scan()
+
+        assert "gone.example.com" not in index._zones
+
+
+class TestSeedFromDb:
+    """Test loading the index from hosted_zone_ids"""
+
+    def test_rows_loaded(self, index):
+        cur = mock.MagicMock()
+        cur.__enter__.return_value = cur
+        cur.fetchall.return_value = [("A.example.com.", "/hostedzone/ZA"), ("b.example.com", None)]
+        conn = mock.MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value = cur
+        db_pool = mock.Mock()
+        db_pool.connection.return_value = conn
+
+        assert index.seed_from_db(db_pool) == 2
+        assert index._zones == {"a.example.com": "ZA"}
+
+    def test_database_error_seeds_nothing(self, index):
+        db_pool = mock.Mock()
+
+        @contextmanager
+        def connection():
+            raise RuntimeError("connection refused")
+            yield
+
+        db_pool.connection = connection
+
+        assert index.seed_from_db(db_pool) == 0
+        assert index._zones == {}
+
+
+class TestGetZoneId:
+    """Test hits, verified misses and write-through updates"""
+
+    def test_hit_makes_no_api_call(self, index, route53):
+        index.add("a.example.com", "ZA")
+
+        assert index.get_zone_id("A.Example.com.") == "ZA"
+        route53.list_hosted_zones_by_name.assert_not_called()
+        assert index.stats["hits"] == 1
+
+    def test_miss_verified_and_cached(self, index, route53):
+        """Test a zone created by another task is found on a miss and then served as a hit"""
+        assert index.get_zone_id("b.example.com") == "ZB"
+        assert index.get_zone_id("b.example.com") == "ZB"
+
+        route53.list_hosted_zones_by_name.assert_called_once()
+        assert index.stats["verify_calls"] == 1
+
+    def test_miss_not_matching_name(self, index, route53):
+        """Test the next zone in name order is not mistaken for the one asked for"""
+        assert index.get_zone_id("bb.example.com") is None
+        assert not index.exists("bb.example.com")
+
+    def test_removed_zone_verified_again(self, index, route53):
+        index.add("a.example.com", "ZA")
+
+        index.remove("a.example.com")
+
+        assert index.get_zone_id("a.example.com") == "ZA"
+        assert index.stats["verify_calls"] == 1